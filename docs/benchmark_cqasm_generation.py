@@ -0,0 +1,76 @@
+"""Micro-benchmark of the cQASM generation of the Quantum Inspire backend for the QisKit SDK.
+
+A random experiment with a mix of all supported gates, including parameterized and binary controlled gates, is
+translated to cQASM a number of times. The throughput in gates per second is reported, together with a checksum of
+the generated cQASM, so the output of different implementations of the translation can be compared.
+
+No connection to Quantum Inspire is made.
+
+    python benchmark_cqasm_generation.py [number_of_gates] [repeats]
+
+
+Copyright 2018-19 QuTech Delft. Licensed under the Apache License, Version 2.0.
+"""
+import hashlib
+import random
+import sys
+import time
+
+from qiskit.qobj import QasmQobjExperiment
+
+from quantuminspire.qiskit.backend_qx import QuantumInspireBackend
+
+NUMBER_OF_QUBITS = 10
+SINGLE_QUBIT_GATES = ['h', 'id', 's', 'sdg', 't', 'tdg', 'x', 'y', 'z']
+TWO_QUBIT_GATES = ['cx', 'cz', 'swap']
+ROTATION_GATES = ['rx', 'ry', 'rz', 'u1']
+
+
+def random_instruction(generator):
+    """ Creates a random Qiskit instruction of a supported gate as dict."""
+    kind = generator.random()
+    qubits = generator.sample(range(NUMBER_OF_QUBITS), 3)
+    if kind < 0.45:
+        return {'name': generator.choice(SINGLE_QUBIT_GATES), 'qubits': qubits[:1]}
+    if kind < 0.7:
+        return {'name': generator.choice(TWO_QUBIT_GATES), 'qubits': qubits[:2]}
+    if kind < 0.75:
+        return {'name': 'ccx', 'qubits': qubits}
+    if kind < 0.9:
+        return {'name': generator.choice(ROTATION_GATES), 'qubits': qubits[:1], 'params': [generator.uniform(-3, 3)]}
+    if kind < 0.95:
+        return {'name': 'u2', 'qubits': qubits[:1], 'params': [generator.uniform(-3, 3), 0.0]}
+    return {'name': 'u3', 'qubits': qubits[:1], 'params': [generator.uniform(-3, 3) for _ in range(3)]}
+
+
+def random_experiment(number_of_gates, seed=2019):
+    """ Creates a random experiment, every tenth gate is binary controlled."""
+    generator = random.Random(seed)
+    instructions = []
+    for index in range(number_of_gates):
+        instruction = random_instruction(generator)
+        if index % 10 == 9:
+            instructions.append({'name': 'bfunc', 'mask': '0x6', 'relation': '==', 'val': '0x2', 'register': index})
+            instruction['conditional'] = index
+        instructions.append(instruction)
+    instructions += [{'name': 'measure', 'qubits': [qubit], 'memory': [qubit]} for qubit in range(NUMBER_OF_QUBITS)]
+    return QasmQobjExperiment.from_dict({'instructions': instructions,
+                                         'header': {'n_qubits': NUMBER_OF_QUBITS, 'memory_slots': NUMBER_OF_QUBITS,
+                                                    'name': 'benchmark'}})
+
+
+def main(number_of_gates=100000, repeats=5):
+    experiment = random_experiment(number_of_gates)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        cqasm = QuantumInspireBackend._generate_cqasm(experiment, full_state_projection=False)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print('gates: {}, best of {}: {:.3f} s, {:.0f} gates/s'.format(number_of_gates, repeats, best,
+                                                                   number_of_gates / best))
+    print('cQASM sha256: {}'.format(hashlib.sha256(cqasm.encode()).hexdigest()))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:3]])
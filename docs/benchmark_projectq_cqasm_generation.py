@@ -0,0 +1,97 @@
+"""Micro-benchmark of the cQASM generation of the Quantum Inspire backend for ProjectQ.
+
+Grover iterations on a few qubits are compiled to the gate set of the backend until the circuit has the requested
+number of gates. The recorded commands are stored by a new backend and the cQASM is finalized, as the backend does on
+a flush, a number of times. The throughput in gates per second is reported, together with a checksum of the generated
+cQASM, so the output of different implementations of the backend can be compared.
+
+No connection to Quantum Inspire is made.
+
+    python benchmark_projectq_cqasm_generation.py [number_of_gates] [repeats]
+
+
+Copyright 2018-19 QuTech Delft. Licensed under the Apache License, Version 2.0.
+"""
+import hashlib
+import sys
+import time
+
+from projectq import MainEngine
+from projectq.cengines import DummyEngine
+from projectq.meta import Compute, Control, Uncompute
+from projectq.ops import All, Allocate, Deallocate, FlushGate, H, Measure, X, Z
+from projectq.setups import restrictedgateset
+
+from quantuminspire.projectq.backend_qx import QIBackend
+
+NUMBER_OF_QUBITS = 5
+
+
+class OfflineApi:
+    """ Provides the backend type of a simulator to the backend, no jobs are executed."""
+
+    @staticmethod
+    def get_backend_type(backend_type=None):
+        return {'is_hardware_backend': False, 'number_of_qubits': 26, 'max_number_of_shots': 4096,
+                'allowed_operations': {}}
+
+
+def grover_commands(number_of_gates):
+    """ Records the commands of Grover iterations that mark the alternating bit-string, compiled to the gate set of
+        the backend, until the circuit has at least number_of_gates gates."""
+    backend = QIBackend(quantum_inspire_api=OfflineApi())
+    recorder = DummyEngine(save_commands=True)
+    engine = MainEngine(backend=recorder, engine_list=restrictedgateset.get_engine_list(
+        one_qubit_gates=backend.one_qubit_gates, two_qubit_gates=backend.two_qubit_gates,
+        other_gates=backend.three_qubit_gates), verbose=False)
+    qubits = engine.allocate_qureg(NUMBER_OF_QUBITS)
+    oracle_out = engine.allocate_qubit()
+    All(H) | qubits
+    X | oracle_out
+    H | oracle_out
+    recorded_gates = recorded_commands = 0
+    while recorded_gates < number_of_gates:
+        with Compute(engine):
+            All(X) | qubits[1::2]
+        with Control(engine, qubits):
+            X | oracle_out
+        Uncompute(engine)
+        with Compute(engine):
+            All(H) | qubits
+            All(X) | qubits
+        with Control(engine, qubits[0:-1]):
+            Z | qubits[-1]
+        Uncompute(engine)
+        engine.flush(deallocate_qubits=False)
+        recorded_gates += count_gates(recorder.received_commands[recorded_commands:])
+        recorded_commands = len(recorder.received_commands)
+    All(Measure) | qubits
+    engine.flush(deallocate_qubits=False)
+    return engine, [command for command in recorder.received_commands if not isinstance(command.gate, FlushGate)]
+
+
+def count_gates(commands):
+    """ Counts the commands that are gates, the allocations of qubits are left out."""
+    return sum(1 for command in commands if command.gate not in (Allocate, Deallocate) and
+               not isinstance(command.gate, FlushGate))
+
+
+def main(number_of_gates=100000, repeats=5):
+    engine, commands = grover_commands(number_of_gates)
+    timings = []
+    for _ in range(repeats):
+        backend = QIBackend(quantum_inspire_api=OfflineApi())
+        backend.main_engine = engine
+        start = time.perf_counter()
+        backend.receive(commands)
+        backend._finalize_qasm()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    number_of_gates = count_gates(commands)
+    print('gates: {}, best of {}: {:.3f} s, {:.0f} gates/s'.format(number_of_gates, repeats, best,
+                                                                   number_of_gates / best))
+    print('cQASM sha256: {}'.format(hashlib.sha256(backend.cqasm().encode()).hexdigest()))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:3]])
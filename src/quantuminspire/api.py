@@ -810,6 +810,22 @@ class QuantumInspireAPI:
         }
         return result_obj
 
+    @staticmethod
+    def split_number_of_shots(number_of_shots: int, max_number_of_shots: int) -> List[int]:
+        """ Splits a number of shots that exceeds the maximum number of shots of a backend into the number of shots
+            for each of the smallest possible number of jobs. The shots are divided evenly over the jobs.
+
+        Args:
+            number_of_shots: The total number of shots.
+            max_number_of_shots: The maximum number of shots of a single job.
+
+        Returns:
+            The number of shots for each job, which add up to the total number of shots.
+        """
+        number_of_jobs = max(1, -(-number_of_shots // max_number_of_shots))
+        shots_per_job, remaining_shots = divmod(number_of_shots, number_of_jobs)
+        return [shots_per_job + 1] * remaining_shots + [shots_per_job] * (number_of_jobs - remaining_shots)
+
     def execute_qasm(self, qasm: str, backend_type: Optional[Union[Dict[str, Any], int, str]] = None,
                      number_of_shots: Optional[int] = None, collect_tries: Optional[int] = None,
                      default_number_of_shots: Optional[int] = None, identifier: Optional[str] = None,
@@ -0,0 +1,327 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import re
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+
+class _Gate(NamedTuple):
+    """ A gate line of the cQASM program that takes part in the optimization. """
+    name: str
+    qubits: Tuple[int, ...]
+    angle: float
+    prefix: str
+
+
+class CqasmOptimizer:
+    """ Peephole optimization of generated cQASM.
+
+        The gate lines of a cQASM program are scanned once. For each qubit the optimizer keeps the stack of gate
+        lines that act on it and were not removed, so a gate is compared with the last remaining gate on its qubits.
+        Gates on other qubits commute with both gates and are passed. The optimizer
+
+        - cancels adjacent inverse pairs, e.g. H and H, S and Sdag or CNOT and CNOT on the same qubits,
+        - merges adjacent rotations around the same axis (Rx, Ry, Rz and CR) into one rotation,
+        - drops identity gates and rotations with an angle of 0 at the printed precision.
+
+        Every other line (measurements, binary controlled gates, bundles, comments with qubit operands) is a barrier
+        for the qubits it mentions. Lines without qubit operands are barriers for all qubits, except for the header
+        lines, comments and the negations of classical bits, which do not act on qubits.
+
+        The number of gates of the last optimized program and the number of removed gates are kept in the
+        number_of_gates and number_of_removed_gates attributes.
+    """
+    GATE_LINE = re.compile(r'^\s*([A-Za-z][\w]*)\s+(q\[\d+\](?:\s*,\s*q\[\d+\])*)(?:\s*,\s*([-+\d.eE]+))?\s*$')
+    QUBIT_OPERAND = re.compile(r'q\[([\d\s,:]+)\]')
+    # the inverse of each self-inverse gate and of each gate that has an inverse gate in cQASM
+    INVERSE_GATES: Dict[str, str] = {'h': 'h', 'x': 'x', 'y': 'y', 'z': 'z', 's': 'sdag', 'sdag': 's',
+                                     't': 'tdag', 'tdag': 't', 'x90': 'mx90', 'mx90': 'x90', 'y90': 'my90',
+                                     'my90': 'y90', 'cnot': 'cnot', 'cz': 'cz', 'swap': 'swap', 'toffoli': 'toffoli'}
+    ROTATION_GATES = ('rx', 'ry', 'rz', 'cr')
+    IDENTITY_GATES = ('i', 'id')
+    # the gates of which the qubit operands can be exchanged
+    SYMMETRIC_GATES = ('cz', 'swap', 'cr')
+    # the lines without qubit operands that do not act on qubits
+    PASSIVE_KEYWORDS = ('', 'version', 'qubits', 'not')
+
+    def __init__(self, angle_format: str = '%.6f') -> None:
+        """ Creates an optimizer for cQASM programs.
+
+        Args:
+            angle_format: The format of the angles of merged rotations, the format used by the generator of the
+                          cQASM.
+        """
+        self.angle_format = angle_format
+        self.number_of_gates = 0
+        self.number_of_removed_gates = 0
+
+    def optimize(self, cqasm: str) -> str:
+        """ Optimizes a cQASM program. The lines that are kept are not changed, except for the angle of merged
+            rotations.
+
+        Args:
+            cqasm: The cQASM program.
+
+        Returns:
+            The optimized cQASM program.
+        """
+        lines: List[Optional[str]] = list(cqasm.split('\n'))
+        gates: Dict[int, _Gate] = {}
+        stacks: Dict[int, List[int]] = defaultdict(list)
+        self.number_of_gates = 0
+        self.number_of_removed_gates = 0
+        for index, line in enumerate(lines):
+            assert line is not None
+            gate = self._parse_gate(line)
+            if gate is None:
+                qubits = self._line_qubits(line)
+                if qubits:
+                    for qubit in qubits:
+                        stacks[qubit].append(index)
+                elif not self._is_passive(line):
+                    stacks.clear()
+                continue
+
+            self.number_of_gates += 1
+            if gate.name in self.IDENTITY_GATES or (gate.name in self.ROTATION_GATES and
+                                                    self._is_zero(gate.angle)):
+                lines[index] = None
+                self.number_of_removed_gates += 1
+                continue
+
+            previous_index = self._previous_gate(gate, gates, stacks)
+            if previous_index is not None:
+                previous = gates[previous_index]
+                if self.INVERSE_GATES.get(previous.name) == gate.name:
+                    self._remove(previous_index, lines, gates, stacks)
+                    lines[index] = None
+                    self.number_of_removed_gates += 2
+                    continue
+                if previous.name == gate.name and gate.name in self.ROTATION_GATES:
+                    angle = previous.angle + gate.angle
+                    lines[index] = None
+                    self.number_of_removed_gates += 1
+                    if self._is_zero(angle):
+                        self._remove(previous_index, lines, gates, stacks)
+                        self.number_of_removed_gates += 1
+                    else:
+                        lines[previous_index] = previous.prefix + self.angle_format % angle
+                        gates[previous_index] = previous._replace(angle=angle)
+                    continue
+
+            gates[index] = gate
+            for qubit in set(gate.qubits):
+                stacks[qubit].append(index)
+        return '\n'.join(line for line in lines if line is not None)
+
+    def _parse_gate(self, line: str) -> Optional[_Gate]:
+        """ Parses a line with a gate that takes part in the optimization.
+
+        Args:
+            line: The cQASM line.
+
+        Returns:
+            The gate, None when the line is not a gate that can be optimized.
+        """
+        match = self.GATE_LINE.match(line)
+        if match is None:
+            return None
+        name = match.group(1).lower()
+        is_rotation = name in self.ROTATION_GATES
+        if not is_rotation and name not in self.INVERSE_GATES and name not in self.IDENTITY_GATES:
+            return None
+        angle_text = match.group(3)
+        if is_rotation == (angle_text is None):
+            return None
+        qubits = tuple(int(operand) for operand in re.findall(r'\d+', match.group(2)))
+        if is_rotation:
+            return _Gate(name, qubits, float(angle_text), line[:match.start(3)])
+        return _Gate(name, qubits, 0.0, line)
+
+    def _line_qubits(self, line: str) -> List[int]:
+        """ Determines the qubits a line that is not optimized acts on. Qubit ranges and lists are expanded.
+
+        Args:
+            line: The cQASM line.
+
+        Returns:
+            The qubits mentioned in the line.
+        """
+        qubits: List[int] = []
+        for operand in self.QUBIT_OPERAND.findall(line):
+            for part in operand.split(','):
+                first, _, last = part.partition(':')
+                qubits.extend(range(int(first), int(last or first) + 1))
+        return qubits
+
+    def _is_passive(self, line: str) -> bool:
+        """ Checks whether a line without qubit operands does not act on the qubits.
+
+        Args:
+            line: The cQASM line without qubit operands.
+
+        Returns:
+            True for empty lines, comments, header lines and negations of classical bits.
+        """
+        stripped = line.strip()
+        return stripped.startswith('#') or stripped.split(' ', 1)[0].lower() in self.PASSIVE_KEYWORDS
+
+    def _is_zero(self, angle: float) -> bool:
+        """ Checks whether an angle is 0 at the printed precision.
+
+        Args:
+            angle: The angle of a rotation.
+
+        Returns:
+            True when the formatted angle is 0.
+        """
+        return float(self.angle_format % angle) == 0
+
+    def _previous_gate(self, gate: _Gate, gates: Dict[int, _Gate], stacks: Dict[int, List[int]]) -> Optional[int]:
+        """ Finds the last remaining gate on the qubits of a gate, when it acts on exactly the same qubits.
+
+        Args:
+            gate: The gate.
+            gates: The gates that were not removed, by line index.
+            stacks: The line indices of the remaining lines that act on each qubit.
+
+        Returns:
+            The line index of the previous gate, None when the qubits of the gate have no common last gate.
+        """
+        stack = stacks.get(gate.qubits[0])
+        if not stack:
+            return None
+        previous = gates.get(stack[-1])
+        if previous is None or len(previous.qubits) != len(gate.qubits):
+            return None
+        if previous.qubits != gate.qubits and not (gate.name in self.SYMMETRIC_GATES and
+                                                   sorted(previous.qubits) == sorted(gate.qubits)):
+            return None
+        if any(not stacks[qubit] or stacks[qubit][-1] != stack[-1] for qubit in gate.qubits):
+            return None
+        return stack[-1]
+
+    @staticmethod
+    def _remove(index: int, lines: List[Optional[str]], gates: Dict[int, _Gate],
+                stacks: Dict[int, List[int]]) -> None:
+        """ Removes a gate that is the last remaining gate on each of its qubits.
+
+        Args:
+            index: The line index of the gate.
+            lines: The lines of the program.
+            gates: The gates that were not removed, by line index.
+            stacks: The line indices of the remaining lines that act on each qubit.
+        """
+        gate = gates.pop(index)
+        lines[index] = None
+        for qubit in set(gate.qubits):
+            stacks[qubit].pop()
+
+
+class CqasmCompactor:
+    """ Compact emission of generated cQASM with parallel bundles and qubit ranges.
+
+        Consecutive gate lines are scheduled as soon as possible into layers: a gate is placed in the layer after
+        the last layer that acts on one of its qubits. Gates in the same layer act on disjoint qubits, so they
+        commute and are executed in parallel as a bundle, e.g. { H q[0] | CNOT q[1], q[2] }. The single qubit gates
+        of a layer with the same name and angle are combined to one gate on a qubit range or list, e.g.
+        H q[0:19] or X q[0,2:4].
+
+        Only the gates that CqasmOptimizer recognizes are compacted. Every other line (measurements, binary
+        controlled gates, negations, comments) ends the current group of layers and is kept as is.
+    """
+    GATE_LINE = re.compile(r'^(\s*([A-Za-z][\w]*)\s+)q\[(\d+)\]((?:\s*,\s*q\[\d+\])*)(.*)$')
+
+    @staticmethod
+    def _qubit_ranges(qubits: List[int]) -> str:
+        """ Formats qubit indices in cQASM range and list notation.
+
+        Args:
+            qubits: The qubit indices.
+
+        Returns:
+            The qubit operand without the brackets, e.g. '0:3,5' for qubits 0, 1, 2, 3 and 5.
+        """
+        parts = []
+        qubits = sorted(qubits)
+        start = 0
+        for index in range(1, len(qubits) + 1):
+            if index == len(qubits) or qubits[index] != qubits[index - 1] + 1:
+                first, last = qubits[start], qubits[index - 1]
+                parts.append(str(first) if first == last else f'{first}:{last}')
+                start = index
+        return ','.join(parts)
+
+    def compact(self, cqasm: str) -> str:
+        """ Compacts a cQASM program.
+
+        Args:
+            cqasm: The cQASM program.
+
+        Returns:
+            The cQASM program with the gates grouped into bundles and qubit ranges.
+        """
+        compacted_lines: List[str] = []
+        # the gates of each layer, the last layer of each qubit
+        layers: List[List[Tuple[str, Tuple[int, ...], str]]] = []
+        qubit_layers: Dict[int, int] = {}
+        for line in cqasm.split('\n'):
+            match = self.GATE_LINE.match(line)
+            name = match.group(2).lower() if match is not None else ''
+            if match is None or (name not in CqasmOptimizer.ROTATION_GATES and
+                                 name not in CqasmOptimizer.INVERSE_GATES and
+                                 name not in CqasmOptimizer.IDENTITY_GATES):
+                self._emit_layers(compacted_lines, layers)
+                layers = []
+                qubit_layers = {}
+                compacted_lines.append(line)
+                continue
+
+            qubits = (int(match.group(3)), *(int(qubit) for qubit in re.findall(r'\d+', match.group(4))))
+            layer = max(qubit_layers.get(qubit, -1) for qubit in qubits) + 1
+            if layer == len(layers):
+                layers.append([])
+            layers[layer].append((match.group(1), qubits, match.group(4) + match.group(5)))
+            for qubit in qubits:
+                qubit_layers[qubit] = layer
+        self._emit_layers(compacted_lines, layers)
+        return '\n'.join(compacted_lines)
+
+    def _emit_layers(self, lines: List[str], layers: List[List[Tuple[str, Tuple[int, ...], str]]]) -> None:
+        """ Appends a line for each layer of gates, a bundle when the layer has more than one gate.
+
+        Args:
+            lines: The cQASM lines to which the layers are appended.
+            layers: For each layer the gates, as the text before the first qubit, the qubits and the text after the
+                    first qubit.
+        """
+        for layer in layers:
+            # the single qubit gates with the same name and angle are combined, in the order of their first gate
+            combined: Dict[Tuple[str, str], List[int]] = {}
+            gates: List[Union[str, Tuple[str, str]]] = []
+            for prefix, qubits, suffix in layer:
+                if len(qubits) > 1:
+                    gates.append(f'{prefix.strip()} q[{qubits[0]}]{suffix}')
+                    continue
+                key = (prefix.strip(), suffix)
+                if key not in combined:
+                    combined[key] = []
+                    gates.append(key)
+                combined[key].append(qubits[0])
+            gate_lines = [gate if isinstance(gate, str) else
+                          f'{gate[0]} q[{self._qubit_ranges(combined[gate])}]{gate[1]}' for gate in gates]
+            lines.append(gate_lines[0] if len(gate_lines) == 1 else '{ ' + ' | '.join(gate_lines) + ' }')
@@ -0,0 +1,344 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import hashlib
+from array import array
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class CqasmDialect:
+    """ The cQASM templates with which a front-end serializes its gates, see GateSequence and CqasmWriter.
+
+        A gate template is formatted with the qubits of the gate, followed by the angle for a rotation. The template
+        of a binary controlled gate is formatted with the control text of the gate first. The templates contain no
+        other '%' characters than their conversion specifiers.
+    """
+
+    def __init__(self, templates: Dict[str, str], controlled_templates: Optional[Dict[str, str]] = None) -> None:
+        """ Compiles the templates to tables indexed by opcode. A front-end only appends the gates that have a
+            template in its dialect.
+
+        Args:
+            templates: The template of each gate, by opcode name.
+            controlled_templates: The template of each binary controlled gate, by opcode name.
+        """
+        self.templates: List[str] = [templates.get(name, '') for name in GateSequence.OPCODES]
+        self.controlled_templates: List[str] = [(controlled_templates or {}).get(name, '')
+                                                for name in GateSequence.OPCODES]
+        # the templates with the other conversions than those of the qubits escaped, to format the qubits first
+        self.qubit_templates: List[str] = [template.replace('%', '%%').replace('%%d', '%d')
+                                           for template in self.templates]
+
+
+class CqasmWriter:
+    """ Serializes gates to cQASM as they are appended, with the same interface as a GateSequence.
+
+        A front-end appends its gates to a writer when no pass works on the gate sequence, so the gates are
+        translated and formatted in a single pass.
+    """
+
+    def __init__(self, lines: List[str], dialect: CqasmDialect) -> None:
+        """ Starts a writer that appends to the lines that are already there.
+
+        Args:
+            lines: The cQASM lines to which the line of each gate is appended.
+            dialect: The templates of the front-end.
+        """
+        self.lines = lines
+        self._start = len(lines)
+        self._append = lines.append
+        self._templates = dialect.templates
+        self._controlled_templates = dialect.controlled_templates
+        self._has_angle = GateSequence.HAS_ANGLE
+
+    def __len__(self) -> int:
+        return len(self.lines) - self._start
+
+    def append(self, opcode: int, qubits: Sequence[int], angle: float = 0.0, control: str = '') -> None:
+        """ Appends the line of a gate, see GateSequence.append. """
+        if control:
+            arguments = (control, *qubits, angle) if self._has_angle[opcode] else (control, *qubits)
+            self._append(self._controlled_templates[opcode] % arguments)
+        elif self._has_angle[opcode]:
+            self._append(self._templates[opcode] % (*qubits, angle))
+        else:
+            self._append(self._templates[opcode] % tuple(qubits))
+
+    def append_line(self, text: str) -> None:
+        """ Appends a line as is, see GateSequence.append_line. """
+        self.lines.append(text)
+
+    def truncate(self, length: int) -> None:
+        """ Removes the lines after the first gates, see GateSequence.truncate. """
+        del self.lines[self._start + length:]
+
+
+class GateSequence:
+    """ A compact intermediate representation of a cQASM program, shared by the Qiskit and ProjectQ front-ends.
+
+        The gates are stored column-wise in arrays: the opcodes, the qubits of the gates one after the other and the
+        angles of the rotations. The argument of a gate is the index of the control text of a binary controlled gate,
+        or of the text of a line that is kept as is (opcode 'line'). These are rare, so only the gates with an
+        argument are in the arguments. The texts are interned, so gates with the same condition share their text.
+
+        The front-ends append their translated gates, the sequence is serialized to cQASM with the templates of a
+        CqasmDialect. The columns can be inspected as numpy arrays and the sequence has a digest for caching.
+    """
+    OPCODES: Tuple[str, ...] = ('line', 'i', 'h', 'x', 'y', 'z', 's', 'sdag', 't', 'tdag', 'rx', 'ry', 'rz', 'measure',
+                                'cnot', 'cz', 'swap', 'cr', 'toffoli')
+    OPCODE: Dict[str, int] = {name: opcode for opcode, name in enumerate(OPCODES)}
+    LINE = 0
+    MEASURE = OPCODE['measure']
+    # the number of qubits and whether the gate has an angle, for each opcode
+    NUMBER_OF_QUBITS: Tuple[int, ...] = tuple(3 if name == 'toffoli' else
+                                              2 if name in ('cnot', 'cz', 'swap', 'cr') else
+                                              0 if name == 'line' else 1 for name in OPCODES)
+    HAS_ANGLE: Tuple[bool, ...] = tuple(name in ('rx', 'ry', 'rz', 'cr') for name in OPCODES)
+    QUBITS_PER_GATE = 3
+    # the maximum number of gates that is serialized with a single format operation
+    RUN_LENGTH = 4096
+
+    def __init__(self) -> None:
+        self.opcodes = array('B')
+        self.qubits = array('i')
+        self.angles = array('d')
+        self.arguments: Dict[int, int] = {}
+        self.texts: List[str] = []
+        self._text_indices: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def _text_index(self, text: str) -> int:
+        """ Interns a text.
+
+        Args:
+            text: The text of a line or the control text of a gate.
+
+        Returns:
+            The index of the text in the texts of the sequence.
+        """
+        index = self._text_indices.get(text)
+        if index is None:
+            index = self._text_indices[text] = len(self.texts)
+            self.texts.append(text)
+        return index
+
+    def append(self, opcode: int, qubits: Sequence[int], angle: float = 0.0, control: str = '') -> None:
+        """ Appends a gate.
+
+        Args:
+            opcode: The opcode of the gate.
+            qubits: The qubits of the gate.
+            angle: The angle of a rotation, ignored for other gates.
+            control: The control text of a binary controlled gate, empty for other gates.
+        """
+        if control:
+            self.arguments[len(self.opcodes)] = self._text_index(control)
+        self.opcodes.append(opcode)
+        self.qubits.extend(qubits)
+        if self.HAS_ANGLE[opcode]:
+            self.angles.append(angle)
+
+    def append_line(self, text: str) -> None:
+        """ Appends a line that is serialized as is, e.g. a comment or an operation on classical bits.
+
+        Args:
+            text: The text of the line, including its line break.
+        """
+        self.arguments[len(self.opcodes)] = self._text_index(text)
+        self.opcodes.append(self.LINE)
+
+    def truncate(self, length: int) -> None:
+        """ Removes the gates after the first gates of the sequence.
+
+        Args:
+            length: The number of gates that is kept.
+        """
+        removed = self.opcodes[length:]
+        number_of_qubits = sum(map(self.NUMBER_OF_QUBITS.__getitem__, removed))
+        number_of_angles = sum(map(self.HAS_ANGLE.__getitem__, removed))
+        del self.opcodes[length:]
+        del self.qubits[len(self.qubits) - number_of_qubits:]
+        del self.angles[len(self.angles) - number_of_angles:]
+        for index in [index for index in self.arguments if index >= length]:
+            del self.arguments[index]
+
+    def remap_qubits(self, qubit_map: Sequence[int]) -> None:
+        """ Renumbers the qubits of the gates.
+
+        Args:
+            qubit_map: The new index of each qubit, indexed by its current index.
+        """
+        self.qubits = array('i', map(qubit_map.__getitem__, self.qubits))
+
+    @staticmethod
+    def light_cone(operations: Sequence[Tuple[Sequence[int], bool]], live_qubits: Iterable[int]) -> List[bool]:
+        """ Determines the operations in the causal cone of the observed qubits with a reverse pass. An operation
+            is in the cone when it is observed itself (e.g. a measurement) or when it operates on a qubit that is
+            live after it. The qubits of an operation in the cone are live before it.
+
+        Args:
+            operations: The qubits of each operation and whether the operation is observed.
+            live_qubits: The qubits that are observed after the last operation.
+
+        Returns:
+            For each operation, whether it is in the causal cone.
+        """
+        live = set(live_qubits)
+        in_cone = [False] * len(operations)
+        for index in range(len(operations) - 1, -1, -1):
+            qubits, observed = operations[index]
+            if observed or not live.isdisjoint(qubits):
+                in_cone[index] = True
+                live.update(qubits)
+        return in_cone
+
+    def prune(self, live_qubits: Iterable[int]) -> int:
+        """ Removes the gates outside the causal cone of the observed qubits, see light_cone. These gates cannot
+            affect the measured results. The measurements and the lines are observed, so they are always kept.
+
+        Args:
+            live_qubits: The qubits that are observed after the last gate, e.g. the qubits measured with full state
+                         projection.
+
+        Returns:
+            The number of removed gates.
+        """
+        gates = self.gates()
+        in_cone = self.light_cone([(qubits, opcode in (self.LINE, self.MEASURE)) for opcode, qubits, _, _ in gates],
+                                  live_qubits)
+        pruned = GateSequence()
+        for (opcode, qubits, angle, argument), kept in zip(gates, in_cone):
+            if not kept:
+                continue
+            if opcode == self.LINE:
+                pruned.append_line(self.texts[argument])
+            else:
+                pruned.append(opcode, qubits, angle, self.texts[argument] if argument >= 0 else '')
+        self.opcodes, self.qubits, self.angles = pruned.opcodes, pruned.qubits, pruned.angles
+        self.arguments, self.texts, self._text_indices = pruned.arguments, pruned.texts, pruned._text_indices
+        return len(gates) - len(pruned)
+
+    @staticmethod
+    def _argument_template(dialect: CqasmDialect, opcode: int, text: str) -> str:
+        """ Determines the template for the qubits of a gate with an argument, see emit.
+
+        Args:
+            dialect: The templates of the front-end.
+            opcode: The opcode of the gate.
+            text: The text of the argument of the gate.
+
+        Returns:
+            The text of a line, or the controlled template of the gate with the control text filled in. The text is
+            escaped for both format operations.
+        """
+        text = text.replace('%', '%%%%')
+        if opcode == GateSequence.LINE:
+            return text
+        return dialect.controlled_templates[opcode].replace('%', '%%').replace('%%d', '%d').replace('%%s', text)
+
+    def emit(self, lines: List[str], dialect: CqasmDialect) -> None:
+        """ Serializes the gates to cQASM. The gates are serialized in runs: the templates of the gates in a run are
+            joined, the qubits of all gates are formatted at once, after which the angles are.
+
+        Args:
+            lines: The cQASM lines to which the lines of the gates are appended.
+            dialect: The templates of the front-end.
+        """
+        argument_templates: Dict[Tuple[int, int], str] = {}
+        arguments = iter(self.arguments.items())
+        index, argument = next(arguments, (-1, -1))
+        qubit_offset = angle_offset = 0
+        for start in range(0, len(self.opcodes), self.RUN_LENGTH):
+            end = start + self.RUN_LENGTH
+            opcodes = self.opcodes[start:end]
+            templates = list(map(dialect.qubit_templates.__getitem__, opcodes))
+            while 0 <= index < end:
+                key = (opcodes[index - start], argument)
+                template = argument_templates.get(key)
+                if template is None:
+                    template = argument_templates[key] = self._argument_template(dialect, key[0],
+                                                                                 self.texts[argument])
+                templates[index - start] = template
+                index, argument = next(arguments, (-1, -1))
+            qubit_end = qubit_offset + sum(map(self.NUMBER_OF_QUBITS.__getitem__, opcodes))
+            angle_end = angle_offset + sum(map(self.HAS_ANGLE.__getitem__, opcodes))
+            lines.append(''.join(templates) % tuple(self.qubits[qubit_offset:qubit_end])
+                         % tuple(self.angles[angle_offset:angle_end]))
+            qubit_offset, angle_offset = qubit_end, angle_end
+
+    def serialize(self, dialect: CqasmDialect) -> str:
+        """ Serializes the gates to cQASM.
+
+        Args:
+            dialect: The templates of the front-end.
+
+        Returns:
+            The cQASM of the gates.
+        """
+        lines: List[str] = []
+        self.emit(lines, dialect)
+        return ''.join(lines)
+
+    def gates(self) -> List[Tuple[int, Tuple[int, ...], float, int]]:
+        """ Lists the gates of the sequence, e.g. for analysis passes.
+
+        Returns:
+            The opcode, the qubits, the angle (0 for gates without angle) and the argument (-1 for gates without
+            argument) of each gate.
+        """
+        qubits = iter(self.qubits)
+        angles = iter(self.angles)
+        return [(opcode, tuple(islice(qubits, self.NUMBER_OF_QUBITS[opcode])),
+                 next(angles) if self.HAS_ANGLE[opcode] else 0.0, self.arguments.get(index, -1))
+                for index, opcode in enumerate(self.opcodes)]
+
+    def as_arrays(self) -> Tuple['np.ndarray[Any, Any]', 'np.ndarray[Any, Any]', 'np.ndarray[Any, Any]',
+                                 'np.ndarray[Any, Any]']:
+        """ Copies the columns of the sequence to numpy arrays of a row per gate, e.g. for analysis passes.
+
+        Returns:
+            The opcodes, the qubits as an array with three qubits per gate (-1 when not used), the angles (0 for
+            gates without angle) and the arguments (-1 for gates without argument).
+        """
+        opcodes = np.array(self.opcodes, dtype=np.uint8)
+        qubits = np.full((len(opcodes), self.QUBITS_PER_GATE), -1, dtype=np.intc)
+        used = np.arange(self.QUBITS_PER_GATE) < np.array(self.NUMBER_OF_QUBITS)[opcodes, np.newaxis]
+        qubits[used] = np.array(self.qubits, dtype=np.intc)
+        angles = np.zeros(len(opcodes))
+        angles[np.array(self.HAS_ANGLE, dtype=bool)[opcodes]] = np.array(self.angles)
+        arguments = np.full(len(opcodes), -1, dtype=np.intc)
+        arguments[list(self.arguments)] = list(self.arguments.values())
+        return opcodes, qubits, angles, arguments
+
+    def digest(self) -> str:
+        """ Determines a digest of the gates, e.g. to cache results for identical circuits.
+
+        Returns:
+            The SHA-256 digest of the columns, the arguments and the texts of the sequence.
+        """
+        digest = hashlib.sha256()
+        arguments = array('i', [value for item in self.arguments.items() for value in item])
+        for column in (self.opcodes, self.qubits, self.angles, arguments):
+            digest.update(column.tobytes())
+        for text in self.texts:
+            digest.update(text.encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
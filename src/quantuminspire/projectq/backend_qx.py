@@ -21,39 +21,63 @@ limitations under the License.
 import sys
 import inspect
 import random
-from collections import defaultdict
-from functools import reduce
-from typing import List, Dict, Iterator, Union, Optional, Tuple, Any
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, reduce
+from heapq import heappop, heappush
+from typing import List, Dict, Callable, Iterable, Iterator, Union, Optional, Tuple, Any, TypeVar
 
 from projectq.cengines import BasicEngine
 from projectq.meta import LogicalQubitIDTag, get_control_count
 from projectq.ops import (NOT, Allocate, Barrier, Deallocate, FlushGate, H,
                           Measure, Ph, Rx, Ry, Rz, S, Sdag, Swap, T, Tdag, X,
-                          Y, Z, Command, CZ, C, R, CNOT, Toffoli)
+                          Y, Z, Command, CZ, C, R, CNOT, Toffoli, DaggeredGate, MatrixGate)
 from projectq.types import Qubit
 from quantuminspire.api import QuantumInspireAPI
+from quantuminspire.cqasm_optimizer import CqasmCompactor, CqasmOptimizer
 from quantuminspire.exceptions import AuthenticationError
 from quantuminspire.exceptions import ProjectQBackendError
+from quantuminspire.gate_sequence import CqasmDialect, GateSequence
 # shortcut for Controlled Phase-shift gate (CR)
 CR = C(R)
+Dispatched = TypeVar('Dispatched')
 
 
 class QIBackend(BasicEngine):  # type: ignore
     """ Backend for Quantum Inspire
 
     """
+    DIALECT = CqasmDialect({'i': '\ni q[%d]', 'h': '\nh q[%d]', 'x': '\nx q[%d]', 'y': '\ny q[%d]', 'z': '\nz q[%d]',
+                            's': '\ns q[%d]', 'sdag': '\nsdag q[%d]', 't': '\nt q[%d]', 'tdag': '\ntdag q[%d]',
+                            'rx': '\nrx q[%d],%.12g', 'ry': '\nry q[%d],%.12g', 'rz': '\nrz q[%d],%.12g',
+                            'measure': '\nmeasure q[%d]', 'cnot': '\ncnot q[%d], q[%d]', 'cz': '\ncz q[%d], q[%d]',
+                            'swap': '\nswap q[%d], q[%d]', 'cr': '\ncr q[%d],q[%d],%.12f',
+                            'toffoli': '\ntoffoli q[%d], q[%d], q[%d]'})
+    MEASURE = GateSequence.OPCODE['measure']
+    # the gates and control counts of which the translation and availability are determined on construction
+    DISPATCHED_GATES = ((NOT, 1), (X, 2), (Z, 1), (R(0), 1), (Swap, 0), (Barrier, 0), (Measure, 0), (Allocate, 0),
+                        (Deallocate, 0), (X, 0), (Y, 0), (Z, 0), (H, 0), (S, 0), (Sdag, 0), (T, 0), (Tdag, 0),
+                        (Rx(0), 0), (Ry(0), 0), (Rz(0), 0))
 
     def __init__(self, num_runs: int = 1024, verbose: int = 0, quantum_inspire_api: Optional[QuantumInspireAPI] = None,
-                 backend_type: Optional[Union[int, str]] = None) -> None:
+                 backend_type: Optional[Union[int, str]] = None, optimize: bool = False,
+                 compact: bool = False, prune: bool = False) -> None:
         """
         Initialize the Backend object.
 
         Args:
-            num_runs: Number of runs to collect statistics (default is 1024).
+            num_runs: Number of runs to collect statistics (default is 1024). When the number of runs exceeds the
+                      maximum number of shots of the backend, the runs are split over several jobs.
             verbose: Verbosity level, defaults to 0, which produces no extra output.
             quantum_inspire_api: Connection to QI platform, optional parameter.
             backend_type: Backend to use for execution. When no backend_type is provided, the default backend will be
                           used.
+            optimize: When True, the generated cQASM is optimized with a peephole pass that cancels inverse gate
+                      pairs, merges rotations and drops identities, see CqasmOptimizer.
+            compact: When True, the gates of the generated cQASM are grouped into parallel bundles and qubit ranges,
+                     see CqasmCompactor.
+            prune: When True, the gates outside the causal cone of the measured qubits are left out of the generated
+                   cQASM, see GateSequence.prune. These gates cannot affect the measured results.
         """
         BasicEngine.__init__(self)
         self._flushed: bool = False
@@ -65,8 +89,19 @@ class QIBackend(BasicEngine):  # type: ignore
         self._cqasm: str = str()
         self._measured_states: Dict[int, float] = {}
         self._measured_ids: List[int] = []
-        self._allocation_map: List[Tuple[int, int]] = []
+        # the simulation bit of each allocated physical bit, and the physical bit of each simulation bit in order of
+        # creation (-1 when de-allocated), see _allocate_qubit
+        self._simulated_ids: Dict[int, int] = {}
+        self._physical_ids: Dict[int, int] = {}
+        # the position in order of creation of each simulation bit, and the de-allocated simulation bits as a heap of
+        # (position, simulation bit), the heap can contain simulation bits that are allocated again
+        self._simulated_positions: Dict[int, int] = {}
+        self._free_simulated_ids: List[Tuple[int, int]] = []
+        self._max_simulated_id: int = -1
         self._max_qubit_id: int = -1
+        self._cqasm_optimizer: Optional[CqasmOptimizer] = CqasmOptimizer('%.12g') if optimize else None
+        self._cqasm_compactor: Optional[CqasmCompactor] = CqasmCompactor() if compact else None
+        self._prune: bool = prune
         if quantum_inspire_api is None:
             try:
                 quantum_inspire_api = QuantumInspireAPI()
@@ -75,7 +110,7 @@ class QIBackend(BasicEngine):  # type: ignore
                                           'provide a QuantumInspireAPI instance as parameter to QIBackend') from ex
         self._quantum_inspire_api: QuantumInspireAPI = quantum_inspire_api
         self._backend_type: Dict[str, Any] = self._quantum_inspire_api.get_backend_type(backend_type)
-        if num_runs < 1 or num_runs > self._backend_type['max_number_of_shots']:
+        if num_runs < 1:
             raise ProjectQBackendError(f'Invalid number of runs (num_runs={num_runs})')
         self._num_runs: int = num_runs
         self._full_state_projection = not self._backend_type["is_hardware_backend"]
@@ -84,6 +119,12 @@ class QIBackend(BasicEngine):  # type: ignore
         self._one_qubit_gates: Tuple[Any, ...] = self._get_one_qubit_gates()
         self._two_qubit_gates: Tuple[Any, ...] = self._get_two_qubit_gates()
         self._three_qubit_gates: Tuple[Any, ...] = self._get_three_qubit_gates()
+        # the memoized translation and availability of each gate, by gate type and control count, see _dispatch
+        self._store_handlers: Dict[Tuple[Any, int], Callable[[Command], None]] = {}
+        self._available_gates: Dict[Tuple[Any, int], bool] = {}
+        for gate, count in self.DISPATCHED_GATES:
+            self._dispatch(self._store_handlers, self._resolve_store_handler, gate, count)
+            self._dispatch(self._available_gates, self._resolve_availability, gate, count)
 
     def _get_one_qubit_gates(self) -> Tuple[Any, ...]:
         allowed_operations = self._backend_type['allowed_operations']
@@ -145,6 +186,18 @@ class QIBackend(BasicEngine):  # type: ignore
         """ Return cqasm code that is generated last. """
         return self._cqasm
 
+    @property
+    def qasm(self) -> str:
+        """ The cQASM code of the gates that are stored for the circuit, without version and qubits lines. """
+        return self._gates.serialize(self.DIALECT)
+
+    @qasm.setter
+    def qasm(self, qasm: str) -> None:
+        """ Replaces the stored gates of the circuit by cQASM code, which is kept as is. """
+        self._gates = GateSequence()
+        if qasm:
+            self._gates.append_line(qasm)
+
     def is_available(self, cmd: Command) -> bool:
         """
         Via this method the ProjectQ framework determines which commands (gates) are available in the backend.
@@ -159,6 +212,64 @@ class QIBackend(BasicEngine):  # type: ignore
         g = cmd.gate
         if self._verbose >= 3:
             print(f'call to is_available with cmd {cmd} (gate {g})')
+        available = self._available_gates.get((type(g), count))
+        if available is None:
+            available = self._dispatch(self._available_gates, self._resolve_availability, g, count)
+        return available
+
+    @staticmethod
+    def _dispatch_key(gate: Any) -> Any:
+        """ Determines the key by which the translation and availability of a gate are memoized. Gates of the same
+            type are equal, except for the angle of a rotation gate, so the key is the type of the gate. A daggered
+            gate is keyed by the type of the gate it is the inverse of as well.
+
+        Args:
+            gate: The gate of a command.
+
+        Returns:
+            The type of the gate, or None for a gate that is compared by more than its type (a gate class or a matrix
+            gate).
+        """
+        gate_type = type(gate)
+        if gate_type is DaggeredGate:
+            inner_key = QIBackend._dispatch_key(gate._gate)
+            return None if inner_key is None else (gate_type, inner_key)
+        if inspect.isclass(gate) or isinstance(gate, MatrixGate):
+            return None
+        return gate_type
+
+    def _dispatch(self, table: Dict[Tuple[Any, int], Dispatched], resolve: Callable[[Any, int], Dispatched],
+                  gate: Any, count: int) -> Dispatched:
+        """ Looks up the memoized value of a gate with a number of control qubits in a dispatch table. The value is
+            resolved and memoized when the table does not contain it yet.
+
+        Args:
+            table: The dispatch table, keyed by the key of the gate (see _dispatch_key) and the control count.
+            resolve: Determines the value for a gate and a control count.
+            gate: The gate of a command.
+            count: The number of control qubits of the command.
+
+        Returns:
+            The value of the gate for the control count.
+        """
+        key = self._dispatch_key(gate)
+        value = None if key is None else table.get((key, count))
+        if value is None:
+            value = resolve(gate, count)
+            if key is not None:
+                table[(key, count)] = value
+        return value
+
+    def _resolve_availability(self, g: Any, count: int) -> bool:
+        """ Determines whether a gate with a number of control qubits is available on the backend, see is_available.
+
+        Args:
+            g: The gate of a command.
+            count: The number of control qubits of the command.
+
+        Returns:
+            True when the gate is available on the Quantum Inspire backend.
+        """
         if g in (Measure, Allocate, Deallocate, Barrier):
             return True
         if g == NOT and count == 2:
@@ -192,6 +303,42 @@ class QIBackend(BasicEngine):  # type: ignore
         self._clear = True
         self.qasm = ""
 
+    @property
+    def _allocation_map(self) -> List[Tuple[int, int]]:
+        """ The assignments (simulation_bit, physical_bit) of the simulation bits in order of creation, see
+            _allocate_qubit. """
+        return list(self._physical_ids.items())
+
+    @_allocation_map.setter
+    def _allocation_map(self, allocation_map: List[Tuple[int, int]]) -> None:
+        self._physical_ids = dict(allocation_map)
+        self._simulated_ids = {physical_id: simulated_id for simulated_id, physical_id in allocation_map
+                               if physical_id != -1}
+        self._simulated_positions = {simulated_id: position for position, simulated_id in enumerate(self._physical_ids)}
+        self._free_simulated_ids = [(self._simulated_positions[simulated_id], simulated_id)
+                                    for simulated_id, physical_id in self._physical_ids.items() if physical_id == -1]
+        self._max_simulated_id = max(self._physical_ids, default=-1)
+
+    def _pop_free_simulated_id(self) -> Optional[int]:
+        """ Takes the first created de-allocated simulation bit from the heap of free simulation bits. Simulation bits
+            that were allocated again since they were de-allocated are skipped.
+
+        Returns:
+            The simulation bit, or None when no simulation bit is de-allocated.
+        """
+        while self._free_simulated_ids:
+            _, simulated_id = heappop(self._free_simulated_ids)
+            if self._physical_ids[simulated_id] == -1:
+                return simulated_id
+        return None
+
+    def _assign_simulated_id(self, simulated_id: int, physical_id: int) -> None:
+        """ Assigns a simulation bit to a physical bit in both directions of the allocation map. """
+        self._simulated_ids[physical_id] = simulated_id
+        self._simulated_positions.setdefault(simulated_id, len(self._physical_ids))
+        self._physical_ids[simulated_id] = physical_id
+        self._max_simulated_id = max(self._max_simulated_id, simulated_id)
+
     def _allocate_qubit(self, index_to_add: int) -> None:
         """ On a simulation backend it is possible to reuse qubits. The advantage of reusing qubits is that less
         qubits are needed in total for the algorithm.
@@ -205,14 +352,17 @@ class QIBackend(BasicEngine):  # type: ignore
         _allocation_map stores the assignments as tuples (simulation_bit, physical_bit) where 'physical_bit' is
         requested by ProjectQ and simulation_bit is the assignment to a bit in the simulator.
         A de-allocated physical bit is registered as -1, which means the corresponding simulation bit can be re-used.
+        The assignments are kept in a dictionary for each direction and the de-allocated simulation bits in a heap,
+        so allocating a qubit and looking up the simulation bit of a gate take constant time.
 
         We strive for x-to-x allocation for qubits, which means we want to allocate a physical qubit to its
         corresponding simulation qubit. We do this to respect as much as possible the qubits of the original algorithm
         in the generated cqasm for readability.
 
         Only when the requested physical bit is higher than the max number of bits supported by the backend, we try
-        to search for an de-allocatd ancilla bit to re-use. When an ancilla is re-used, we have to reset the qubit
-        which means we have to switch to non-full state projection.
+        to search for an de-allocatd ancilla bit to re-use, the first created de-allocated simulation bit is re-used.
+        When an ancilla is re-used, we have to reset the qubit which means we have to switch to non-full state
+        projection.
 
         Example: When physical bit 0..4 are allocated in reversed order we would still get:
         (0, 0), (1, 1), (2, 2), (3, 3), (4, 4)
@@ -235,26 +385,25 @@ class QIBackend(BasicEngine):  # type: ignore
         """
         if self._is_simulation_backend:
             # physical bit to add cannot be allocated already
-            if next(iter(x for x in self._allocation_map if x[1] == index_to_add), None) is not None:
+            if index_to_add in self._simulated_ids:
                 raise RuntimeError(f"Bit {index_to_add} is already allocated.")
 
             # check if the corresponding simulation bit is in the _allocation_map already,
             # we strive for x-to-x allocation, so when (x, -1) we should reuse this bit
-            allocation_entry = next(iter(x for x in self._allocation_map if x[0] == index_to_add), None)
+            physical_id = self._physical_ids.get(index_to_add)
             # also take into account the maximum number of bits we may use on the backend.
-            if allocation_entry is None and (index_to_add < self._max_number_of_qubits):
+            if physical_id is None and (index_to_add < self._max_number_of_qubits):
                 # map the bit to the corresponding simulation bit
-                self._allocation_map.append((index_to_add, index_to_add))
+                self._assign_simulated_id(index_to_add, index_to_add)
             else:
                 # check if the corresponding simulation bit was de-allocated (we strive for a x-to-x allocation)
-                if allocation_entry is None or allocation_entry[1] != -1:
-                    # The corresponding simulation bit is not found or this is a bit in the ancilla range
-                    # We look for a free spot, a previously de-allocated bit (-1)
-                    allocation_entry = next(iter(x for x in self._allocation_map if x[1] == -1), None)
+                # otherwise the corresponding simulation bit is not found or this is a bit in the ancilla range and
+                # we look for a free spot, a previously de-allocated bit (-1)
+                simulated_id = index_to_add if physical_id == -1 else self._pop_free_simulated_id()
 
-                if allocation_entry is None:
+                if simulated_id is None:
                     # no free spot, add a new simulation qubit
-                    self._allocation_map.append((max(self._allocation_map)[0] + 1, index_to_add))
+                    self._assign_simulated_id(self._max_simulated_id + 1, index_to_add)
                 else:
                     # we are reusing a de-allocated simulation bit, this situation turns the circuit into non-FSP
                     if self._full_state_projection:
@@ -262,13 +411,12 @@ class QIBackend(BasicEngine):  # type: ignore
 
                     # to reuse a de-allocated bit we do a prep_z first, which is better implemented as a
                     # measurement and binary controlled x-gate
-                    self.qasm += f"\nmeasure q[{allocation_entry[0]}]"
-                    self.qasm += f"\nc-x b[{allocation_entry[0]}], q[{allocation_entry[0]}]"
-                    index = self._allocation_map.index(allocation_entry)
-                    self._allocation_map[index] = (allocation_entry[0], index_to_add)
+                    self._gates.append(self.MEASURE, (simulated_id,))
+                    self._gates.append_line(f"\nc-x b[{simulated_id}], q[{simulated_id}]")
+                    self._assign_simulated_id(simulated_id, index_to_add)
 
             # keep track of the maximum qubit id on simulation backend
-            self._max_qubit_id = max(self._allocation_map)[0]
+            self._max_qubit_id = self._max_simulated_id
         else:
             # keep track of the maximum qubit id on hardware backend
             self._max_qubit_id = max(self._max_qubit_id, index_to_add)
@@ -283,13 +431,13 @@ class QIBackend(BasicEngine):  # type: ignore
         """
         if self._is_simulation_backend:
             # determine the qubits that are not de-allocated
-            allocation_entry = next(iter(x for x in self._allocation_map if x[1] == index_to_remove), None)
-            if allocation_entry is None:
+            simulated_id = self._simulated_ids.pop(index_to_remove, None)
+            if simulated_id is None:
                 raise RuntimeError(f"De-allocated bit {index_to_remove} was not allocated.")
             else:
                 # deallocate the corresponding simulation bit
-                index = self._allocation_map.index(allocation_entry)
-                self._allocation_map[index] = (allocation_entry[0], -1)
+                self._physical_ids[simulated_id] = -1
+                heappush(self._free_simulated_ids, (self._simulated_positions[simulated_id], simulated_id))
 
         if self._verbose >= 1:
             print(f'_store: Deallocate gate {(index_to_remove,)}')
@@ -306,12 +454,12 @@ class QIBackend(BasicEngine):  # type: ignore
             Allocated simulation bit position of physical qubit with id pqb_id.
         """
         if self._is_simulation_backend:
-            allocation_entry = next(iter(x for x in self._allocation_map if x[1] == physical_qubit_id), None)
-            if allocation_entry is None:
+            simulated_id = self._simulated_ids.get(physical_qubit_id)
+            if simulated_id is None:
                 raise RuntimeError(f"Bit position in simulation backend not found for"
                                    f" physical bit {physical_qubit_id}.")
             else:
-                return allocation_entry[0]
+                return simulated_id
         else:
             return physical_qubit_id
 
@@ -323,14 +471,15 @@ class QIBackend(BasicEngine):  # type: ignore
         for logical_qubit_id in self._measured_ids:
             physical_qubit_id = self._logical_to_physical(logical_qubit_id)
             sim_qubit_id = self._physical_to_simulated(physical_qubit_id)
-            self.qasm += f"\nmeasure q[{sim_qubit_id}]"
+            self._gates.append(self.MEASURE, (sim_qubit_id,))
         self._full_state_projection = False
 
     def _store(self, cmd: Command) -> None:
         """
         Temporarily store the command cmd.
 
-        Translates the command and stores the results in local variables.
+        Translates the command and stores the results in local variables. The gates are translated by the method
+        that is memoized for their gate type and control count, see _resolve_store_handler.
 
         Args:
             cmd: Command to store.
@@ -375,7 +524,7 @@ class QIBackend(BasicEngine):  # type: ignore
             # do not add the measurement statement when fsp is possible
             if not self._full_state_projection:
                 if self._is_simulation_backend:
-                    self.qasm += f"\nmeasure q[{sim_qubit_id}]"
+                    self._gates.append(self.MEASURE, (sim_qubit_id,))
             return
 
         # when we find a gate after measurements we don't have fsp
@@ -383,53 +532,86 @@ class QIBackend(BasicEngine):  # type: ignore
         if self._full_state_projection and len(self._measured_ids) != 0:
             self._switch_fsp_to_nonfsp()
 
-        if gate == NOT and get_control_count(cmd) == 1:
+        count = get_control_count(cmd)
+        store = self._store_handlers.get((type(gate), count))
+        if store is None:
+            store = self._dispatch(self._store_handlers, self._resolve_store_handler, gate, count)
+        store(cmd)
+
+    def _resolve_store_handler(self, gate: Any, count: int) -> Callable[[Command], None]:
+        """ Determines how a gate with a number of control qubits is translated, see _store.
+
+        Args:
+            gate: The gate of a command.
+            count: The number of control qubits of the command.
+
+        Returns:
+            The method that appends the gate of a command to the stored gates.
+        """
+        if gate == NOT and count == 1:
             # this case also covers the CX controlled gate
-            ctrl_pos = self._physical_to_simulated(cmd.control_qubits[0].id)
-            qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
-            self.qasm += f"\ncnot q[{ctrl_pos}], q[{qb_pos}]"
+            return partial(self._store_controlled_gate, GateSequence.OPCODE['cnot'])
         elif gate == Swap:
-            q0 = self._physical_to_simulated(cmd.qubits[0][0].id)
-            q1 = self._physical_to_simulated(cmd.qubits[1][0].id)
-            self.qasm += f"\nswap q[{q0}], q[{q1}]"
-        elif gate == X and get_control_count(cmd) == 2:
-            ctrl_pos1 = self._physical_to_simulated(cmd.control_qubits[0].id)
-            ctrl_pos2 = self._physical_to_simulated(cmd.control_qubits[1].id)
-            qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
-            self.qasm += f"\ntoffoli q[{ctrl_pos1}], q[{ctrl_pos2}], q[{qb_pos}]"
-        elif gate == Z and get_control_count(cmd) == 1:
-            ctrl_pos = self._physical_to_simulated(cmd.control_qubits[0].id)
-            qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
-            self.qasm += f"\ncz q[{ctrl_pos}], q[{qb_pos}]"
+            return self._store_swap_gate
+        elif gate == X and count == 2:
+            return self._store_toffoli_gate
+        elif gate == Z and count == 1:
+            return partial(self._store_controlled_gate, GateSequence.OPCODE['cz'])
         elif gate == Barrier:
-            qb_pos_list = [qb.id for qr in cmd.qubits for qb in qr]
-            qb_str = ', '.join([f'q[{self._physical_to_simulated(x)}]' for x in qb_pos_list])
-            self.qasm += f"\n# barrier gate {qb_str};"
-        elif isinstance(gate, (Rz, R)) and get_control_count(cmd) == 1:
-            ctrl_pos = self._physical_to_simulated(cmd.control_qubits[0].id)
-            qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
-            gate_name = 'cr'
-            self.qasm += f"\n{gate_name} q[{ctrl_pos}],q[{qb_pos}],{gate.angle:.12f}"
-        elif isinstance(gate, (Rx, Ry)) and get_control_count(cmd) == 1:
+            return self._store_barrier
+        elif isinstance(gate, (Rz, R)) and count == 1:
+            return partial(self._store_controlled_gate, GateSequence.OPCODE['cr'])
+        elif isinstance(gate, (Rx, Ry)) and count == 1:
             raise NotImplementedError('controlled Rx or Ry gate not implemented')
         elif isinstance(gate, (Rx, Ry, Rz)):
-            assert get_control_count(cmd) == 0
-            qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
+            assert count == 0
             gate_name = str(gate)[0:2].lower()
-            self.qasm += f"\n{gate_name} q[{qb_pos}],{gate.angle:.12g}"
-        elif gate == Tdag and get_control_count(cmd) == 0:
-            qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
-            self.qasm += f"\ntdag q[{qb_pos}]"
-        elif gate == Sdag and get_control_count(cmd) == 0:
-            qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
-            self.qasm += f"\nsdag q[{qb_pos}]"
+            return partial(self._store_gate, GateSequence.OPCODE[gate_name])
+        elif gate == Tdag and count == 0:
+            return partial(self._store_gate, GateSequence.OPCODE['tdag'])
+        elif gate == Sdag and count == 0:
+            return partial(self._store_gate, GateSequence.OPCODE['sdag'])
         elif isinstance(gate, tuple(type(gate) for gate in (X, Y, Z, H, S, T))):
-            assert get_control_count(cmd) == 0
+            assert count == 0
             gate_str = str(gate).lower()
-            qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
-            self.qasm += f"\n{gate_str} q[{qb_pos}]"
+            return partial(self._store_gate, GateSequence.OPCODE[gate_str])
         else:
-            raise NotImplementedError(f'cmd {(cmd,)} not implemented')
+            return self._store_not_implemented
+
+    def _store_gate(self, opcode: int, cmd: Command) -> None:
+        """ Stores a gate on a single qubit, the angle of a rotation gate is taken from the gate. """
+        qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
+        self._gates.append(opcode, (qb_pos,), cmd.gate.angle if GateSequence.HAS_ANGLE[opcode] else 0.0)
+
+    def _store_controlled_gate(self, opcode: int, cmd: Command) -> None:
+        """ Stores a gate with one control qubit, the angle of a rotation gate is taken from the gate. """
+        ctrl_pos = self._physical_to_simulated(cmd.control_qubits[0].id)
+        qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
+        self._gates.append(opcode, (ctrl_pos, qb_pos), cmd.gate.angle if GateSequence.HAS_ANGLE[opcode] else 0.0)
+
+    def _store_swap_gate(self, cmd: Command) -> None:
+        """ Stores a swap gate. """
+        q0 = self._physical_to_simulated(cmd.qubits[0][0].id)
+        q1 = self._physical_to_simulated(cmd.qubits[1][0].id)
+        self._gates.append(GateSequence.OPCODE['swap'], (q0, q1))
+
+    def _store_toffoli_gate(self, cmd: Command) -> None:
+        """ Stores an X gate with two control qubits. """
+        ctrl_pos1 = self._physical_to_simulated(cmd.control_qubits[0].id)
+        ctrl_pos2 = self._physical_to_simulated(cmd.control_qubits[1].id)
+        qb_pos = self._physical_to_simulated(cmd.qubits[0][0].id)
+        self._gates.append(GateSequence.OPCODE['toffoli'], (ctrl_pos1, ctrl_pos2, qb_pos))
+
+    def _store_barrier(self, cmd: Command) -> None:
+        """ Stores a barrier as a comment line. """
+        qb_pos_list = [qb.id for qr in cmd.qubits for qb in qr]
+        qb_str = ', '.join([f'q[{self._physical_to_simulated(x)}]' for x in qb_pos_list])
+        self._gates.append_line(f"\n# barrier gate {qb_str};")
+
+    @staticmethod
+    def _store_not_implemented(cmd: Command) -> None:
+        """ Raises the error for a command that cannot be translated to cQASM. """
+        raise NotImplementedError(f'cmd {(cmd,)} not implemented')
 
     def _logical_to_physical(self, logical_qubit_id: int) -> int:
         """
@@ -520,7 +702,7 @@ class QIBackend(BasicEngine):  # type: ignore
 
         Send the circuit via the Quantum Inspire API.
         """
-        if self.qasm == "":
+        if len(self._gates) == 0:
             return
 
         # Finally: add measurement commands for all measured qubits if no measurements are given.
@@ -535,34 +717,97 @@ class QIBackend(BasicEngine):  # type: ignore
         self._reset()
 
     def _finalize_qasm(self) -> None:
-        """ Finalize qasm (add version and qubits line). """
-        qasm = f'version 1.0\n# cQASM generated by Quantum Inspire {self.__class__} class\n' \
-               f'qubits {self._number_of_qubits}\n'
-        qasm += self.qasm
+        """ Finalize qasm (add version and qubits line). The lines of the stored gates are serialized after the
+            header and joined once, the gates are only serialized to a string of their own when the cQASM is
+            optimized or compacted. """
+        lines = [f'version 1.0\n# cQASM generated by Quantum Inspire {self.__class__} class\n'
+                 f'qubits {self._number_of_qubits}\n']
+        if self._prune:
+            self._prune_gates()
+        if self._cqasm_optimizer is None and self._cqasm_compactor is None:
+            self._gates.emit(lines, self.DIALECT)
+        else:
+            body = self.qasm
+            if self._cqasm_optimizer is not None:
+                body = self._cqasm_optimizer.optimize(body)
+                if self._verbose >= 1:
+                    print(f'cQASM optimization removed {self._cqasm_optimizer.number_of_removed_gates} of '
+                          f'{self._cqasm_optimizer.number_of_gates} gates')
+            if self._cqasm_compactor is not None:
+                body = self._cqasm_compactor.compact(body)
+            lines.append(body)
+        qasm = ''.join(lines)
 
         if self._verbose >= 2:
             print(qasm)
         self._cqasm = qasm
 
+    def _prune_gates(self) -> None:
+        """ Removes the stored gates outside the causal cone of the measured qubits. With full state projection
+            the measured qubits are observed at the end of the circuit, otherwise their measurement statements are
+            observed. When no qubits are measured, all qubits are observed at the end of the circuit.
+        """
+        if not self._full_state_projection:
+            live_qubits: Iterable[int] = ()
+        elif self._measured_ids:
+            live_qubits = [self._physical_to_simulated(self._logical_to_physical(logical_qubit_id))
+                           for logical_qubit_id in self._measured_ids]
+        else:
+            live_qubits = range(self._number_of_qubits)
+        number_of_gates = len(self._gates)
+        number_of_removed_gates = self._gates.prune(live_qubits)
+        if self._verbose >= 1:
+            print(f'Light-cone pruning removed {number_of_removed_gates} of {number_of_gates} gates')
+
     def _execute_cqasm(self) -> None:
         """ Execute self._cqasm through the API.
 
-        Sets self._quantum_inspire_result with the result object in the API response.
+        Sets self._quantum_inspire_result with the result object in the API response. When the number of runs
+        exceeds the maximum number of shots of the backend, the runs are split over jobs that are executed
+        concurrently (at most the maximum number of simultaneous jobs of the backend) and their results are merged.
 
         Raises:
             ProjectQBackendError: when raw_text in result from API is not empty (indicating a backend error).
         """
-        self._quantum_inspire_result = self._quantum_inspire_api.execute_qasm(
-            self._cqasm,
-            number_of_shots=self._num_runs,
-            backend_type=self._backend_type,
-            full_state_projection=self._full_state_projection
-        )
-
-        if not self._quantum_inspire_result.get('histogram', {}):
-            raw_text = self._quantum_inspire_result.get('raw_text', 'no raw_text in result structure')
-            raise ProjectQBackendError(
-                f'Result structure does not contain proper histogram. raw_text field: {raw_text}')
+        shots_per_job = QuantumInspireAPI.split_number_of_shots(self._num_runs,
+                                                                self._backend_type['max_number_of_shots'])
+        execute_qasm = partial(self._quantum_inspire_api.execute_qasm, self._cqasm, backend_type=self._backend_type,
+                               full_state_projection=self._full_state_projection)
+        if len(shots_per_job) == 1:
+            results = [execute_qasm(number_of_shots=shots_per_job[0])]
+        else:
+            max_workers = min(len(shots_per_job), self._backend_type.get('max_number_of_simultaneous_jobs') or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(lambda shots: execute_qasm(number_of_shots=shots), shots_per_job))
+
+        for result in results:
+            if not result.get('histogram', {}):
+                raw_text = result.get('raw_text', 'no raw_text in result structure')
+                raise ProjectQBackendError(
+                    f'Result structure does not contain proper histogram. raw_text field: {raw_text}')
+        self._quantum_inspire_result = results[0] if len(results) == 1 else \
+            QIBackend._merge_results(results, shots_per_job)
+
+    @staticmethod
+    def _merge_results(results: List[Dict[str, Any]], shots_per_job: List[int]) -> Dict[str, Any]:
+        """ Merges the results of jobs that executed the runs of the same circuit.
+
+        Args:
+            results: The result of each job.
+            shots_per_job: The number of shots of each job.
+
+        Returns:
+            The result of the first job, with the histogram of all jobs. The probability of each state is averaged
+            over the jobs, weighted by their number of shots.
+        """
+        number_of_shots = sum(shots_per_job)
+        histogram: Dict[str, float] = defaultdict(float)
+        for result, shots in zip(results, shots_per_job):
+            for state, probability in result['histogram'].items():
+                histogram[state] += probability * shots / number_of_shots
+        merged_result = OrderedDict(results[0])
+        merged_result['histogram'] = OrderedDict(histogram)
+        return merged_result
 
     def _filter_result_by_measured_qubits(self) -> None:
         """ Filters the raw result by collapsing states so that unmeasured qubits are ignored.
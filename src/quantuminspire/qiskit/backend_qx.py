@@ -15,11 +15,14 @@ See the License for the specific language governing permissions and
 limitations under the License.
 
 """
-import io
 import json
+import logging
+import re
 import uuid
-from collections import defaultdict, OrderedDict, Counter
-from typing import Dict, List, Tuple, Optional, Any
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Callable, Deque, Dict, List, Sequence, Set, Tuple, Optional, Any
 
 import numpy as np
 from coreapi.exceptions import ErrorMessage
@@ -27,16 +30,24 @@ from qiskit.providers import BaseBackend
 from qiskit.providers.models import QasmBackendConfiguration
 from qiskit.providers.models.backendconfiguration import GateConfig
 from qiskit.qobj import QasmQobj, QasmQobjExperiment
-from qiskit.result.models import ExperimentResult, ExperimentResultData
+from qiskit.result.models import ExperimentResult
 from qiskit.qobj import QobjExperimentHeader
 
 from quantuminspire.api import QuantumInspireAPI
+from quantuminspire.cqasm_optimizer import CqasmCompactor, CqasmOptimizer
 from quantuminspire.exceptions import QisKitBackendError
+from quantuminspire.gate_sequence import GateSequence
 from quantuminspire.job import QuantumInspireJob
-from quantuminspire.qiskit.circuit_parser import CircuitToString
+from quantuminspire.qiskit.circuit_parser import CircuitToString, CqasmTemplate
+from quantuminspire.qiskit.experiment_analysis import ExperimentAnalysis
+from quantuminspire.qiskit.measurement_plan import MeasurementPlan
 from quantuminspire.qiskit.qi_job import QIJob
+from quantuminspire.qiskit.qi_result import QIExperimentResultData
+from quantuminspire.qiskit.result_store import ResultStore
 from quantuminspire.version import __version__ as quantum_inspire_version
 
+logger = logging.getLogger(__name__)
+
 
 class QuantumInspireBackend(BaseBackend):  # type: ignore
     DEFAULT_CONFIGURATION = QasmBackendConfiguration(
@@ -55,9 +66,12 @@ class QuantumInspireBackend(BaseBackend):  # type: ignore
         max_experiments=1,
         coupling_map=None
     )
+    MAX_FETCH_WORKERS = 8
 
     def __init__(self, api: QuantumInspireAPI, provider: Any,
-                 configuration: Optional[QasmBackendConfiguration] = None) -> None:
+                 configuration: Optional[QasmBackendConfiguration] = None,
+                 result_store: Optional[ResultStore] = None,
+                 backend_type: Optional[Dict[str, Any]] = None) -> None:
         """ Python implementation of a quantum simulator using Quantum Inspire API.
 
         Args:
@@ -85,20 +99,53 @@ class QuantumInspireBackend(BaseBackend):  # type: ignore
                 | max_shots (int)            | Maximum number of shots supported.
                 | max_experiments (int)      | Optional: Maximum number of experiments (circuits) per job.
                 | coupling_map (list(tuple)) | Define the edges.
+            result_store: Local store for the results of completed jobs. When given, the results of a job are
+                downloaded once and served from the store afterwards.
+            backend_type: The properties of the backend type of the backend, as listed by the API. When not given,
+                the backend type is requested from the API by the name of the backend.
         """
         super().__init__(configuration=(configuration or
                                         QuantumInspireBackend.DEFAULT_CONFIGURATION),
                          provider=provider)
-        self.__backend: Dict[str, Any] = api.get_backend_type_by_name(self.name())
+        self.__backend: Dict[str, Any] = (OrderedDict(backend_type) if backend_type is not None
+                                          else api.get_backend_type_by_name(self.name()))
         self.__api: QuantumInspireAPI = api
+        self.__result_store = result_store
 
     @property
     def backend_name(self) -> str:
         return self.name()  # type: ignore
 
+    @property
+    def result_store(self) -> Optional[ResultStore]:
+        return self.__result_store
+
     def run(self, qobj: QasmQobj) -> QIJob:
         """ Submits a quantum job to the Quantum Inspire platform.
 
+            A number of shots larger than the maximum number of shots of the backend is split over several jobs per
+            experiment. The results of these jobs are merged into one experiment result.
+
+            When the qobj is assembled with pack_experiments=True, small experiments are packed onto disjoint qubit
+            ranges of a single job, see _pack_experiments. The result of such a job is split into the results of
+            its experiments by marginalizing over the qubits of each experiment.
+
+            When the qobj is assembled with optimize_cqasm=True, the generated cQASM is optimized with a peephole
+            pass that cancels inverse gate pairs, merges rotations and drops identities, see CqasmOptimizer. When
+            the qobj is assembled with compact_cqasm=True, the gates of the generated cQASM are grouped into parallel
+            bundles and qubit ranges, see CqasmCompactor.
+
+            When the qobj is assembled with compact_qubits=True, the qubits of each experiment are renumbered densely
+            and the cQASM only declares the qubits the experiment operates on, see _compact_qubit_map. A simulator
+            allocates the state of every declared qubit, so each unused qubit halves the cost of the simulation. The
+            measurements of the experiment are renumbered likewise, so the results are unchanged. Experiments with
+            conditional gates are not compacted, their conditions read the classical bits of the original qubits.
+
+            When the qobj is assembled with prune_gates=True, the gates outside the causal cone of the measured
+            qubits are left out of the experiments before they are translated, see _prune_experiment. These gates
+            cannot affect the results. Combined with compact_qubits, the qubits that are only operated on by pruned
+            gates are left out as well.
+
         Args:
             qobj: The quantum job with the Qiskit algorithm and quantum inspire backend.
 
@@ -107,21 +154,69 @@ class QuantumInspireBackend(BaseBackend):  # type: ignore
         """
         self.__validate_number_of_shots(qobj)
         number_of_shots = qobj.config.shots
+        shots_per_job = QuantumInspireAPI.split_number_of_shots(number_of_shots,
+                                                                self.__backend['max_number_of_shots'])
+        memory = bool(getattr(qobj.config, 'memory', False))
+        pack_experiments = bool(getattr(qobj.config, 'pack_experiments', False))
+        if pack_experiments:
+            self.__validate_packing()
+        compact_qubits = bool(getattr(qobj.config, 'compact_qubits', False))
+        if compact_qubits:
+            self.__validate_qubit_compaction()
 
         identifier = uuid.uuid1()
         project_name = 'qi-sdk-project-{}'.format(identifier)
-        project = self.__api.create_project(project_name, number_of_shots, self.__backend)
-        experiments = qobj.experiments
+        project = self.__api.create_project(project_name, shots_per_job[0], self.__backend)
+        prune_gates = bool(getattr(qobj.config, 'prune_gates', False))
+        experiments = [self._prune_experiment(experiment) for experiment in qobj.experiments] if prune_gates \
+            else qobj.experiments
         job = QIJob(self, str(project['id']), self.__api)
+        full_state_projections = []
+        packable = []
+        qubit_maps: List[Optional[List[int]]] = []
         for experiment in experiments:
-            self.__validate_number_of_clbits(experiment)
-            full_state_projection = self.__validate_full_state_projection(experiment)
-            if not full_state_projection:
-                QuantumInspireBackend.__validate_unsupported_measurements(experiment)
-            self._submit_experiment(experiment, number_of_shots, project=project,
-                                    full_state_projection=full_state_projection)
-
-        job.experiments = experiments
+            analysis = ExperimentAnalysis(experiment)
+            self.__validate_number_of_clbits(analysis)
+            if not analysis.full_state_projection:
+                QuantumInspireBackend.__validate_unsupported_measurements(analysis)
+            full_state_projections.append(analysis.full_state_projection)
+            packable.append(pack_experiments and analysis.full_state_projection and not analysis.has_conditional)
+            # the binary-controlled gates read the classical bits of the qubits, these are not renumbered
+            qubit_maps.append(self._compact_qubit_map(analysis.number_of_qubits, analysis.used_qubits)
+                              if compact_qubits and not analysis.has_conditional else None)
+
+        compiled_qasms = self._generate_cqasm_for_experiments(experiments, full_state_projections, qubit_maps)
+        if getattr(qobj.config, 'optimize_cqasm', False):
+            compiled_qasms = self._optimize_cqasm(compiled_qasms)
+        if getattr(qobj.config, 'compact_cqasm', False):
+            compactor = CqasmCompactor()
+            compiled_qasms = [compactor.compact(compiled_qasm) for compiled_qasm in compiled_qasms]
+        # identical experiments (e.g. in sweeps or readout calibrations) are executed only once
+        unique_experiments: Dict[Tuple[str, bool], List[int]] = OrderedDict()
+        for index, submission in enumerate(zip(compiled_qasms, full_state_projections)):
+            unique_experiments.setdefault(submission, []).append(index)
+        submissions = [(compiled_qasm, full_state_projection, indices)
+                       for (compiled_qasm, full_state_projection), indices in unique_experiments.items()]
+        number_of_qubits = [self._cqasm_number_of_qubits(experiments[indices[0]], qubit_maps[indices[0]])
+                            for _, _, indices in submissions]
+        bins = self._pack_experiments(number_of_qubits, [packable[indices[0]] for _, _, indices in submissions],
+                                      BaseBackend.configuration(self).n_qubits)
+        for packed_submissions in bins:
+            for job_shots in shots_per_job:
+                if len(packed_submissions) > 1:
+                    self._submit_packed_experiments(experiments, [(submissions[position][0], submissions[position][2])
+                                                                  for position in packed_submissions],
+                                                    job_shots, project=project, memory=memory,
+                                                    qubit_maps=qubit_maps)
+                    continue
+                compiled_qasm, full_state_projection, indices = submissions[packed_submissions[0]]
+                duplicates = [(index, experiments[index]) for index in indices[1:]]
+                self._submit_experiment(experiments[indices[0]], job_shots, project=project,
+                                        full_state_projection=full_state_projection, compiled_qasm=compiled_qasm,
+                                        experiment_index=indices[0], duplicates=duplicates, memory=memory,
+                                        qubit_maps=qubit_maps)
+
+        job.experiments = qobj.experiments
         return job
 
     def retrieve_job(self, job_id: str) -> QIJob:
@@ -137,48 +232,365 @@ class QuantumInspireBackend(BaseBackend):  # type: ignore
             QisKitBackendError: If job not found or error occurs during retrieval of the job.
         """
         try:
-            self.__api.get_project(int(job_id))
+            if self.__result_store is None or not self.__result_store.has_project(self.__api.base_uri, int(job_id)):
+                self.__api.get_project(int(job_id))
         except (ErrorMessage, ValueError):
             raise QisKitBackendError("Could not retrieve job with job_id '{}' ".format(job_id))
         return QIJob(self, job_id, self.__api)
 
     @staticmethod
-    def _generate_cqasm(experiment: QasmQobjExperiment, full_state_projection: bool = True) -> str:
+    def _cqasm_header(number_of_qubits: int) -> str:
+        """ Generates the cQASM lines that precede the translated instructions of an experiment.
+
+        Args:
+            number_of_qubits: The number of qubits used in the experiment.
+
+        Returns:
+            The version, comment and qubits lines of the cQASM program.
+        """
+        return 'version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits %d\n' % number_of_qubits
+
+    @staticmethod
+    def _prune_experiment(experiment: QasmQobjExperiment) -> QasmQobjExperiment:
+        """ Leaves the gates out of an experiment that cannot affect its results. A reverse pass over the
+            instructions determines the causal cone of the measured qubits, see GateSequence.light_cone. The
+            measurements are observed, when the experiment has no measurements all qubits are observed at the end.
+            A bfunc is kept when the binary controlled gate that uses it is kept. The reduction of the number of
+            instructions is logged.
+
+        Args:
+            experiment: The experiment with gate operations and header.
+
+        Returns:
+            The experiment with the instructions in the causal cone of the measured qubits.
+        """
+        instructions = experiment.instructions
+        operations: List[Tuple[Sequence[int], bool]] = []
+        measured = False
+        for instruction in instructions:
+            name = instruction.name
+            if name == 'measure':
+                measured = True
+                operations.append((instruction.qubits, True))
+            elif name in ('bfunc', 'barrier'):
+                operations.append(((), False))
+            else:
+                operations.append((instruction.qubits, False))
+        in_cone = GateSequence.light_cone(operations, () if measured else range(experiment.header.n_qubits))
+        bfunc_indices: Dict[int, Deque[int]] = defaultdict(deque)
+        for index, instruction in enumerate(instructions):
+            if instruction.name == 'bfunc':
+                bfunc_indices[instruction.register].append(index)
+            elif hasattr(instruction, 'conditional') and bfunc_indices[instruction.conditional]:
+                in_cone[bfunc_indices[instruction.conditional].popleft()] = in_cone[index]
+        pruned_instructions = [instruction for instruction, kept in zip(instructions, in_cone) if kept]
+        logger.info('Light-cone pruning removed %d of %d instructions of experiment %s',
+                    len(instructions) - len(pruned_instructions), len(instructions), experiment.header.name)
+        return QasmQobjExperiment(config=getattr(experiment, 'config', None), header=experiment.header,
+                                  instructions=pruned_instructions)
+
+    @staticmethod
+    def _compact_qubit_map(number_of_qubits: int, used_qubits: Set[int]) -> Optional[List[int]]:
+        """ Determines the renumbering of the qubits of an experiment to the qubits it operates on. The used qubits
+            keep their order, the first qubit is kept when the experiment operates on no qubits at all.
+
+        Args:
+            number_of_qubits: The number of qubits of the experiment.
+            used_qubits: The qubits operated on by the gates and measurements of the experiment.
+
+        Returns:
+            The qubit of the cQASM for each qubit of the experiment, -1 for the unused qubits. None when all qubits
+            are used.
+        """
+        if len(used_qubits) == number_of_qubits:
+            return None
+        qubit_map = [-1] * number_of_qubits
+        for new_qubit, qubit in enumerate(sorted(used_qubits or {0})):
+            qubit_map[qubit] = new_qubit
+        return qubit_map
+
+    @staticmethod
+    def _cqasm_number_of_qubits(experiment: QasmQobjExperiment, qubit_map: Optional[List[int]] = None) -> int:
+        """ Determines the number of qubits declared in the cQASM of an experiment.
+
+        Args:
+            experiment: The experiment that is converted to cQASM.
+            qubit_map: The renumbering of the qubits of the experiment, see _compact_qubit_map.
+
+        Returns:
+            The number of qubits of the experiment, or the number of qubits it is compacted to.
+        """
+        number_of_qubits: int = experiment.header.n_qubits
+        return number_of_qubits if qubit_map is None else max(qubit_map) + 1
+
+    @staticmethod
+    def _generate_cqasm(experiment: QasmQobjExperiment, full_state_projection: bool = True,
+                        qubit_map: Optional[List[int]] = None) -> str:
         """ Generates the cQASM from the Qiskit experiment.
 
         Args:
             experiment: The experiment that contains instructions to be converted to cQASM.
             full_state_projection: When False, the experiment is not suitable for full state projection
+            qubit_map: The renumbering of the qubits of the experiment, see _compact_qubit_map.
 
         Returns:
             The cQASM code that can be sent to the Quantum Inspire API.
         """
-        parser = CircuitToString(full_state_projection)
-        number_of_qubits = experiment.header.n_qubits
-        instructions = experiment.instructions
-        with io.StringIO() as stream:
-            stream.write('version 1.0\n')
-            stream.write('# cQASM generated by QI backend for Qiskit\n')
-            stream.write('qubits %d\n' % number_of_qubits)
-            for instruction in instructions:
-                parser.parse(stream, instruction)
-            return stream.getvalue()
+        parser = CircuitToString(full_state_projection, qubit_map)
+        lines = [QuantumInspireBackend._cqasm_header(QuantumInspireBackend._cqasm_number_of_qubits(experiment,
+                                                                                                 qubit_map))]
+        parser.emit(lines, experiment.instructions)
+        return ''.join(lines)
+
+    @staticmethod
+    def _generate_cqasm_template(experiment: QasmQobjExperiment, full_state_projection: bool = True,
+                                 qubit_map: Optional[List[int]] = None) -> CqasmTemplate:
+        """ Generates a cQASM template from the Qiskit experiment. The angles of the parameterized gates are left
+            open, binding a parameter set to the template gives the same cQASM as _generate_cqasm.
+
+        Args:
+            experiment: The experiment that contains instructions to be converted to a cQASM template.
+            full_state_projection: When False, the experiment is not suitable for full state projection
+            qubit_map: The renumbering of the qubits of the experiment, see _compact_qubit_map.
+
+        Returns:
+            The cQASM template of the experiment.
+        """
+        header = QuantumInspireBackend._cqasm_header(QuantumInspireBackend._cqasm_number_of_qubits(experiment,
+                                                                                                 qubit_map))
+        return CqasmTemplate(experiment.instructions, full_state_projection, header, qubit_map)
+
+    @staticmethod
+    def _generate_cqasm_for_experiments(experiments: List[QasmQobjExperiment], full_state_projections: List[bool],
+                                        qubit_maps: Optional[List[Optional[List[int]]]] = None) -> List[str]:
+        """ Generates the cQASM for a list of Qiskit experiments. Experiments that only differ in the angles of their
+            parameterized gates (e.g. a parameter sweep) are translated once to a cQASM template, to which the
+            parameter sets of all these experiments are bound at once.
+
+        Args:
+            experiments: The experiments that contain instructions to be converted to cQASM.
+            full_state_projections: For each experiment, whether the experiment is suitable for full state projection.
+            qubit_maps: For each experiment, the renumbering of its qubits, see _compact_qubit_map.
+
+        Returns:
+            The cQASM code for each of the experiments.
+        """
+        groups: Dict[Any, List[int]] = OrderedDict()
+        for index, (experiment, full_state_projection) in enumerate(zip(experiments, full_state_projections)):
+            qubit_map = None if qubit_maps is None else qubit_maps[index]
+            key = (experiment.header.n_qubits, full_state_projection, None if qubit_map is None else tuple(qubit_map),
+                   CqasmTemplate.structure_key(experiment.instructions))
+            groups.setdefault(key, []).append(index)
+
+        compiled_qasms: List[str] = [''] * len(experiments)
+        for indices in groups.values():
+            first_experiment = experiments[indices[0]]
+            full_state_projection = full_state_projections[indices[0]]
+            qubit_map = None if qubit_maps is None else qubit_maps[indices[0]]
+            if len(indices) == 1:
+                compiled_qasms[indices[0]] = QuantumInspireBackend._generate_cqasm(first_experiment,
+                                                                                   full_state_projection, qubit_map)
+                continue
+            template = QuantumInspireBackend._generate_cqasm_template(first_experiment, full_state_projection,
+                                                                      qubit_map)
+            parameter_sets = np.array([template.get_parameters(experiments[index].instructions)
+                                       for index in indices]).reshape(len(indices), -1)
+            for index, compiled_qasm in zip(indices, template.bind(parameter_sets)):
+                compiled_qasms[index] = compiled_qasm
+        return compiled_qasms
+
+    @staticmethod
+    def _optimize_cqasm(compiled_qasms: List[str]) -> List[str]:
+        """ Optimizes the cQASM of the experiments with the peephole optimization of CqasmOptimizer. The reduction
+            of the number of gates is logged.
+
+        Args:
+            compiled_qasms: The cQASM code for each of the experiments.
+
+        Returns:
+            The optimized cQASM code for each of the experiments.
+        """
+        optimizer = CqasmOptimizer()
+        optimized_qasms = []
+        number_of_gates = 0
+        number_of_removed_gates = 0
+        for compiled_qasm in compiled_qasms:
+            optimized_qasms.append(optimizer.optimize(compiled_qasm))
+            number_of_gates += optimizer.number_of_gates
+            number_of_removed_gates += optimizer.number_of_removed_gates
+        logger.info('cQASM optimization removed %d of %d gates', number_of_removed_gates, number_of_gates)
+        return optimized_qasms
 
     def _submit_experiment(self, experiment: QasmQobjExperiment, number_of_shots: int,
                            project: Optional[Dict[str, Any]] = None,
-                           full_state_projection: bool = True) -> QuantumInspireJob:
-        compiled_qasm = self._generate_cqasm(experiment, full_state_projection=full_state_projection)
-        measurements = self._collect_measurements(experiment)
-        user_data = {'name': experiment.header.name, 'memory_slots': experiment.header.memory_slots,
-                     'creg_sizes': experiment.header.creg_sizes, 'measurements': measurements}
+                           full_state_projection: bool = True,
+                           compiled_qasm: Optional[str] = None,
+                           experiment_index: int = 0,
+                           duplicates: Optional[List[Tuple[int, QasmQobjExperiment]]] = None,
+                           memory: bool = True,
+                           qubit_maps: Optional[List[Optional[List[int]]]] = None) -> QuantumInspireJob:
+        """ Submits the experiment as a job to the Quantum Inspire platform.
+
+        Args:
+            experiment: The experiment to execute.
+            number_of_shots: The number of times the experiment is executed.
+            project: The project the job is linked to.
+            full_state_projection: When False, the experiment is not suitable for full state projection.
+            compiled_qasm: The cQASM of the experiment, generated from the experiment when not given.
+            experiment_index: The index of the experiment in the qobj.
+            duplicates: The experiments (and their index in the qobj) that compile to the same cQASM as the experiment.
+                        The result of the job is also used as result for these experiments.
+            memory: When False, the memory of the experiments is not requested and the counts are determined
+                    from the histogram of the result, without downloading the single shot values.
+            qubit_maps: For each experiment in the qobj, the renumbering of its qubits, see _compact_qubit_map.
+
+        Returns:
+            The job that has been submitted.
+        """
+        def qubit_map(index: int) -> Optional[List[int]]:
+            return None if qubit_maps is None else qubit_maps[index]
+
+        if compiled_qasm is None:
+            compiled_qasm = self._generate_cqasm(experiment, full_state_projection, qubit_map(experiment_index))
+        user_data = self._experiment_user_data(experiment, experiment_index, qubit_map(experiment_index))
+        user_data['memory'] = memory
+        if duplicates:
+            user_data['duplicates'] = [self._experiment_user_data(duplicate, index, qubit_map(index))
+                                       for index, duplicate in duplicates]
         job_id = self.__api.execute_qasm_async(compiled_qasm, backend_type=self.__backend,
                                                number_of_shots=number_of_shots, project=project,
                                                job_name=experiment.header.name, user_data=json.dumps(user_data),
                                                full_state_projection=full_state_projection)
         return job_id
 
+    @staticmethod
+    def _pack_experiments(number_of_qubits: List[int], packable: List[bool], capacity: int) -> List[List[int]]:
+        """ Divides the experiments over jobs. Packable experiments are assigned first-fit to jobs of which the
+            total number of qubits does not exceed the capacity, each other experiment gets a job of its own.
+
+        Args:
+            number_of_qubits: The number of qubits of each experiment.
+            packable: For each experiment, whether it can be packed with other experiments in a job.
+            capacity: The maximum number of qubits of a job with packed experiments.
+
+        Returns:
+            The indices of the experiments for each job, in order of the first experiment of the job.
+        """
+        bins: List[List[int]] = []
+        bin_sizes: List[int] = []
+        for index, (size, can_pack) in enumerate(zip(number_of_qubits, packable)):
+            position = next((position for position, bin_size in enumerate(bin_sizes)
+                             if bin_size + size <= capacity), None) if can_pack else None
+            if position is None:
+                bins.append([index])
+                # a job with an experiment that cannot be packed is closed for other experiments
+                bin_sizes.append(size if can_pack else capacity + 1)
+            else:
+                bins[position].append(index)
+                bin_sizes[position] += size
+        return bins
+
+    @staticmethod
+    def _shift_qubits(cqasm: str, offset: int) -> str:
+        """ Moves the qubits operated on by cQASM instructions by an offset.
+
+        Args:
+            cqasm: The cQASM instructions, without header.
+            offset: The number of qubits the qubit indices are increased with.
+
+        Returns:
+            The cQASM instructions operating on the shifted qubits.
+        """
+        return re.sub(r'q\[([0-9,: ]+)\]',
+                      lambda qubits: 'q[{}]'.format(re.sub(r'\d+', lambda index: str(int(index.group()) + offset),
+                                                           qubits.group(1))), cqasm)
+
+    def _submit_packed_experiments(self, experiments: List[QasmQobjExperiment],
+                                   packed_experiments: List[Tuple[str, List[int]]], number_of_shots: int,
+                                   project: Optional[Dict[str, Any]] = None,
+                                   memory: bool = True,
+                                   qubit_maps: Optional[List[Optional[List[int]]]] = None) -> QuantumInspireJob:
+        """ Submits several experiments as one job to the Quantum Inspire platform. Each experiment is placed on
+            its own range of qubits, the first experiment on the lowest qubits. The measurements of each experiment
+            are moved to its range of qubits, so the result of the job converts to the result of each experiment.
+
+        Args:
+            experiments: The experiments of the qobj.
+            packed_experiments: The cQASM of the experiments to pack and the indices of the experiments in the qobj
+                                that compile to this cQASM.
+            number_of_shots: The number of times the experiments are executed.
+            project: The project the job is linked to.
+            memory: When False, the memory of the experiments is not requested.
+            qubit_maps: For each experiment in the qobj, the renumbering of its qubits, see _compact_qubit_map.
+
+        Returns:
+            The job that has been submitted.
+        """
+        qubit_maps = qubit_maps or [None] * len(experiments)
+        sizes = [self._cqasm_number_of_qubits(experiments[indices[0]], qubit_maps[indices[0]])
+                 for _, indices in packed_experiments]
+        total_number_of_qubits = sum(sizes)
+        packed_qasm = [self._cqasm_header(total_number_of_qubits)]
+        experiment_user_data = []
+        offset = 0
+        for (compiled_qasm, indices), number_of_qubits in zip(packed_experiments, sizes):
+            packed_qasm.append(self._shift_qubits(compiled_qasm[len(self._cqasm_header(number_of_qubits)):], offset))
+            # the measurements index the qubits from the most significant bit of the qubit register
+            position_offset = total_number_of_qubits - number_of_qubits - offset
+            for index in indices:
+                user_data = self._experiment_user_data(experiments[index], index, qubit_maps[index])
+                for measurement in user_data['measurements']['measurements']:
+                    measurement[0] += position_offset
+                experiment_user_data.append(user_data)
+            offset += number_of_qubits
+
+        first_experiment = experiments[packed_experiments[0][1][0]]
+        user_data = experiment_user_data[0]
+        user_data['memory'] = memory
+        user_data['packed'] = experiment_user_data[1:]
+        job_id = self.__api.execute_qasm_async(''.join(packed_qasm), backend_type=self.__backend,
+                                               number_of_shots=number_of_shots, project=project,
+                                               job_name=first_experiment.header.name, user_data=json.dumps(user_data),
+                                               full_state_projection=True)
+        return job_id
+
+    @staticmethod
+    def _experiment_user_data(experiment: QasmQobjExperiment, experiment_index: int,
+                              qubit_map: Optional[List[int]] = None) -> Dict[str, Any]:
+        """ Determines the data of the experiment that is stored with the job and which is needed to convert
+            the result of the job to the experiment result. When the qubits of the experiment are renumbered, the
+            measurements are renumbered likewise. The unused qubits are left out, their classical bits stay 0.
+
+        Args:
+            experiment: The experiment with gate operations and header.
+            experiment_index: The index of the experiment in the qobj.
+            qubit_map: The renumbering of the qubits of the experiment, see _compact_qubit_map.
+
+        Returns:
+            The header fields, the measurements and the index of the experiment.
+        """
+        measurements = QuantumInspireBackend._collect_measurements(experiment)
+        if qubit_map is not None:
+            # the measurements index the qubits from the most significant bit of the qubit register
+            last_qubit = experiment.header.n_qubits - 1
+            last_new_qubit = max(qubit_map)
+            measurements['measurements'] = [[last_new_qubit - qubit_map[last_qubit - position], clbit]
+                                            for position, clbit in measurements['measurements']
+                                            if qubit_map[last_qubit - position] >= 0]
+        return {'name': experiment.header.name, 'memory_slots': experiment.header.memory_slots,
+                'creg_sizes': experiment.header.creg_sizes, 'measurements': measurements,
+                'experiment_index': experiment_index}
+
     def get_experiment_results(self, qi_job: QIJob) -> List[ExperimentResult]:
-        """ Get results from experiments from the Quantum-inspire platform.
+        """ Get results from experiments from the Quantum-inspire platform. A job can hold the result of more than
+            one experiment when duplicate experiments were executed only once or experiments were packed. The shots
+            of an experiment can be split over several jobs, their results are merged. The experiment results are
+            returned in the order of the experiments in the qobj. When the memory was not requested, the single
+            shot values are only downloaded when the memory of an experiment result is accessed.
+
+            The results and the single shot values of the jobs are requested concurrently, using at most
+            MAX_FETCH_WORKERS simultaneous requests. When the backend has a result store, the results of completed
+            jobs are stored and served from the store on later calls.
 
         Args:
             qi_job: A job that has already been submitted and which execution is completed.
@@ -189,30 +601,191 @@ class QuantumInspireBackend(BaseBackend):  # type: ignore
         Returns:
             A list of experiment results; containing the data, execution time, status, etc.
         """
-        jobs = self.__api.get_jobs_from_project(int(qi_job.job_id()))
-        results = [self.__api.get_result_from_job(job['id']) for job in jobs]
-        experiment_results = []
-        for result, job in zip(results, jobs):
+        project_id = int(qi_job.job_id())
+        stored_project = None if self.__result_store is None else \
+            self.__result_store.get_project(self.__api.base_uri, project_id)
+        experiment_results: List[Tuple[int, ExperimentResult]] = []
+        with ThreadPoolExecutor(max_workers=self.MAX_FETCH_WORKERS) as executor:
+            if stored_project is None:
+                jobs = self.__api.get_jobs_from_project(project_id)
+                # the results are returned in job order, an error is raised for the first job that failed
+                results = list(executor.map(self.__api.get_result_from_job, [job['id'] for job in jobs]))
+                if self.__result_store is not None and all(job.get('status') == 'COMPLETE' for job in jobs):
+                    self.__result_store.store_project(self.__api.base_uri, project_id, jobs, results)
+            else:
+                jobs, results = stored_project
+            # jobs without histogram data are reported below, before their user data is used
+            all_user_data = [json.loads(str(job.get('user_data'))) if result.get('histogram', {}) else {}
+                             for result, job in zip(results, jobs)]
+            # jobs submitted without memory setting always have their memory converted
+            raw_data_futures = [executor.submit(self.__fetch_raw_data, project_id, job['id'], result['id'])
+                                if result.get('histogram', {}) and user_data.get('memory', True) else None
+                                for job, result, user_data in zip(jobs, results, all_user_data)]
+
+        for result, job, user_data, raw_data_future in zip(results, jobs, all_user_data, raw_data_futures):
             if not result.get('histogram', {}):
                 raise QisKitBackendError(
                     'Result from backend contains no histogram data!\n{}'.format(result.get('raw_text')))
 
-            user_data = json.loads(str(job.get('user_data')))
-            measurements = user_data.pop('measurements')
-            histogram_obj, memory_data = self.__convert_result_data(result, measurements)
-            full_state_histogram_obj = self.__convert_histogram(result, measurements)
-            experiment_result_data = ExperimentResultData(counts=histogram_obj,
-                                                          memory=memory_data)
-            experiment_result_data.probabilities = full_state_histogram_obj
-            header = QobjExperimentHeader.from_dict(user_data)
-            experiment_result_dictionary = {'name': job.get('name'), 'seed': 42, 'shots': job.get('number_of_shots'),
-                                            'data': experiment_result_data, 'status': 'DONE', 'success': True,
-                                            'time_taken': result.get('execution_time_in_seconds'), 'header': header}
-            experiment_results.append(ExperimentResult(**experiment_result_dictionary))
-        return experiment_results
+            # duplicate experiments and experiments packed into the job share its result
+            duplicates = user_data.pop('duplicates', []) + user_data.pop('packed', [])
+            memory = user_data.pop('memory', True)
+            # the raw data of the job is downloaded at most once for all its experiments
+            raw_data_loader = lru_cache(maxsize=None)(partial(self.__get_raw_data, project_id, job['id'], result,
+                                                              raw_data_future))
+            for experiment_user_data in [user_data] + duplicates:
+                # jobs submitted without experiment index are in the order of the experiments
+                experiment_index = experiment_user_data.pop('experiment_index', len(experiment_results))
+                name = str(job.get('name')) if experiment_user_data is user_data else experiment_user_data['name']
+                experiment_result = self.__get_experiment_result(job, result, raw_data_loader, memory, name,
+                                                                 experiment_user_data)
+                experiment_results.append((experiment_index, experiment_result))
+        experiment_results.sort(key=lambda indexed_result: indexed_result[0])
+        merged_results: List[ExperimentResult] = []
+        for position, (experiment_index, experiment_result) in enumerate(experiment_results):
+            if position > 0 and experiment_index == experiment_results[position - 1][0]:
+                merged_results[-1] = self.__merge_experiment_results(merged_results[-1], experiment_result)
+            else:
+                merged_results.append(experiment_result)
+        return merged_results
+
+    @staticmethod
+    def __merge_experiment_results(experiment_result: ExperimentResult,
+                                   other_result: ExperimentResult) -> ExperimentResult:
+        """ Merges the results of two jobs that executed the shots of the same experiment. The counts are added,
+            the probabilities are averaged weighted by the number of shots and the memory is concatenated.
+
+        Args:
+            experiment_result: The result of the first shots of the experiment.
+            other_result: The result of the other shots of the experiment.
+
+        Returns:
+            The experiment result of all shots.
+        """
+        number_of_shots = experiment_result.shots + other_result.shots
+        data, other_data = experiment_result.data, other_result.data
+        counts = dict(data.counts)
+        for state, count in other_data.counts.items():
+            counts[state] = counts.get(state, 0) + count
+        probabilities = {state: probability * experiment_result.shots / number_of_shots
+                         for state, probability in data.probabilities.items()}
+        for state, probability in other_data.probabilities.items():
+            probabilities[state] = probabilities.get(state, 0.0) + probability * other_result.shots / number_of_shots
+        merged_data = QIExperimentResultData(counts=counts, memory_loader=lambda: np.concatenate(
+            (data.memory_states, other_data.memory_states)))
+        merged_data.probabilities = probabilities
+        time_taken = (experiment_result.time_taken or 0) + (other_result.time_taken or 0)
+        return ExperimentResult(name=experiment_result.name, seed=experiment_result.seed, shots=number_of_shots,
+                                data=merged_data, status=experiment_result.status, success=experiment_result.success,
+                                time_taken=time_taken, header=experiment_result.header)
+
+    def __fetch_raw_data(self, project_id: int, job_id: int, result_id: int) -> List[int]:
+        """ Gets the raw data of a result from the result store, or downloads it when it is not stored.
+            Downloaded raw data of a stored job is added to the store.
+
+        Args:
+            project_id: The identification number of the project of the job.
+            job_id: The identification number of the job.
+            result_id: The identification number of the result of the job.
+
+        Returns:
+            The measured value of the qubits for each shot.
+        """
+        if self.__result_store is None:
+            raw_data: List[int] = self.__api.get_raw_data_from_result(result_id)
+            return raw_data
+        stored_raw_data = self.__result_store.get_raw_data(self.__api.base_uri, project_id, job_id)
+        if stored_raw_data is not None:
+            return stored_raw_data
+        raw_data = self.__api.get_raw_data_from_result(result_id)
+        self.__result_store.store_raw_data(self.__api.base_uri, project_id, job_id, raw_data)
+        return raw_data
+
+    def __get_raw_data(self, project_id: int, job_id: int, result: Dict[str, Any],
+                       raw_data_future: Optional['Future[List[int]]'] = None) -> List[int]:
+        """ Gets the single shot values of a result. When shots = 1, the backend returns an empty list as raw_data.
+            In this case a single shot value is sampled from the histogram.
+
+        Note:
+            To sample the single shot value a random float is generated in the range [0, 1). With this random number
+            the value from the probabilities histogram is taken where the added probabilities is greater this random
+            number.
+            Example: probability histogram is {[0x0, 0.2], [0x3, 0.4], [0x5, 0.1], [0x6, 0.3]}.
+            When random is in the range [0, 0.2) the first value of the probability histogram is taken (0x0).
+            When random is in the range [0.2, 0.6) the second value of the probability histogram is taken (0x3).
+            When random is in the range [0.6, 0.7) the third value of the probability histogram is taken (0x5).
+            When random is in the range [0.7, 1) the last value of the probability histogram is taken (0x6).
+
+        Args:
+            project_id: The identification number of the project of the job.
+            job_id: The identification number of the job.
+            result: The result output from the quantum inspire backend with full-
+                    state projection histogram output.
+            raw_data_future: The pending request for the raw data of the result. When not given, the raw data
+                             is requested.
+
+        Returns:
+            The measured value of the qubits for each shot.
+        """
+        if raw_data_future is None:
+            raw_data = self.__fetch_raw_data(project_id, job_id, result['id'])
+        else:
+            raw_data = raw_data_future.result()
+        if raw_data:
+            return raw_data
+
+        state_probabilities = result['histogram']
+        random_probability = np.random.rand()
+        sum_probability = 0.0
+        for qubit_register, probability in state_probabilities.items():
+            sum_probability += probability
+            if random_probability < sum_probability:
+                return [int(qubit_register)]
+        return []
+
+    def __get_experiment_result(self, job: Dict[str, Any], result: Dict[str, Any],
+                                raw_data_loader: Callable[[], List[int]], memory: bool, name: str,
+                                user_data: Dict[str, Any]) -> ExperimentResult:
+        """ Converts the result of a job to the result of an experiment executed by the job.
+
+            When the memory is not requested, the counts are determined from the histogram of the result and
+            the number of shots. The memory is then converted from the single shot values on first access.
+            A single shot is always sampled, because its histogram holds the probabilities of the states.
+
+        Args:
+            job: The job that executed the experiment.
+            result: The result output from the quantum inspire backend with full-
+                    state projection histogram output.
+            raw_data_loader: Function that returns the measured value of the qubits for each shot.
+            memory: Whether the memory of the experiment is requested.
+            name: The name of the experiment.
+            user_data: The header fields and the measurements of the experiment.
+
+        Returns:
+            The experiment result; containing the data, execution time, status, etc.
+        """
+        measurement_plan = MeasurementPlan(user_data.pop('measurements'), result['number_of_qubits'])
+        full_state_histogram_obj = self.__convert_histogram(result, measurement_plan)
+        number_of_shots: int = job['number_of_shots']
+        if memory or number_of_shots == 1:
+            histogram_obj, memory_states = self.__convert_result_data(raw_data_loader(), measurement_plan)
+            experiment_result_data = QIExperimentResultData(counts=histogram_obj, memory_states=memory_states)
+        else:
+            histogram_obj = self.__convert_probabilities_to_counts(full_state_histogram_obj, number_of_shots)
+            experiment_result_data = QIExperimentResultData(
+                counts=histogram_obj,
+                memory_loader=lambda: measurement_plan.classical_states(
+                    measurement_plan.to_qubit_states(raw_data_loader())))
+        experiment_result_data.probabilities = full_state_histogram_obj
+        header = QobjExperimentHeader.from_dict(user_data)
+        experiment_result_dictionary = {'name': name, 'seed': 42, 'shots': number_of_shots,
+                                        'data': experiment_result_data, 'status': 'DONE', 'success': True,
+                                        'time_taken': result.get('execution_time_in_seconds'), 'header': header}
+        return ExperimentResult(**experiment_result_dictionary)
 
     def __validate_number_of_shots(self, job: QasmQobj) -> None:
-        """ Checks whether the number of shots has a valid value.
+        """ Checks whether the number of shots has a valid value. A number of shots larger than the maximum number
+            of shots of the backend is valid, the shots are then split over several jobs.
 
         Args:
             job: The quantum job with the Qiskit algorithm and quantum inspire backend.
@@ -221,10 +794,30 @@ class QuantumInspireBackend(BaseBackend):  # type: ignore
             QisKitBackendError: When the value is not correct.
         """
         number_of_shots = job.config.shots
-        if number_of_shots < 1 or number_of_shots > self.__backend['max_number_of_shots']:
+        if number_of_shots < 1:
             raise QisKitBackendError('Invalid shots (number_of_shots={})'.format(number_of_shots))
 
-    def __validate_number_of_clbits(self, experiment: QasmQobjExperiment) -> None:
+    def __validate_packing(self) -> None:
+        """ Checks whether experiments can be packed onto disjoint qubit ranges of one job. The qubits of a
+            hardware backend have a fixed topology, so only simulator backends support packing.
+
+        Raises:
+            QisKitBackendError: When the backend is not a simulator.
+        """
+        if not BaseBackend.configuration(self).simulator:
+            raise QisKitBackendError('Packing of experiments is only supported by simulator backends')
+
+    def __validate_qubit_compaction(self) -> None:
+        """ Checks whether the qubits of experiments can be renumbered. The qubits of a hardware backend have a
+            fixed topology, so only simulator backends support qubit compaction.
+
+        Raises:
+            QisKitBackendError: When the backend is not a simulator.
+        """
+        if not BaseBackend.configuration(self).simulator:
+            raise QisKitBackendError('Compaction of qubits is only supported by simulator backends')
+
+    def __validate_number_of_clbits(self, analysis: ExperimentAnalysis) -> None:
         """ Checks whether the number of classical bits has a value cQASM can support.
 
             1. When number of classical bits is less than 1 an error is raised.
@@ -240,46 +833,23 @@ class QuantumInspireBackend(BaseBackend):  # type: ignore
                 this circuit cannot be translated to valid cQASM.
 
         Args:
-            experiment: The experiment with gate operations and header.
+            analysis: The analysis of the experiment.
 
         Raises:
             QisKitBackendError: When the value is not correct.
         """
-        number_of_clbits = experiment.header.memory_slots
+        number_of_clbits = analysis.number_of_clbits
         if number_of_clbits < 1:
             raise QisKitBackendError("Invalid amount of classical bits ({})!".format(number_of_clbits))
 
         if BaseBackend.configuration(self).conditional:
-            number_of_qubits = experiment.header.n_qubits
-            if number_of_clbits > number_of_qubits:
-                # no problem when there are no conditional gate operations
-                for instruction in experiment.instructions:
-                    if hasattr(instruction, 'conditional'):
-                        raise QisKitBackendError("Number of classical bits must be less than or equal to the"
-                                                 " number of qubits when using conditional gate operations")
-
-    @staticmethod
-    def __validate_full_state_projection(experiment: QasmQobjExperiment) -> bool:
-        """ FSP (Full State Projection) can be used when no measurements are found in the circuit or when no
-            other gates are found after measurements.
-
-        Args:
-            experiment: The experiment with gate operations and header.
-
-        Returns:
-            True when FSP can be used, otherwise False.
-        """
-        fsp = True
-        measurement_found = False
-        for instruction in experiment.instructions:
-            if instruction.name == 'measure':
-                measurement_found = True
-            elif measurement_found:
-                fsp = False
-        return fsp
+            # no problem when there are no conditional gate operations
+            if number_of_clbits > analysis.number_of_qubits and analysis.has_conditional:
+                raise QisKitBackendError("Number of classical bits must be less than or equal to the"
+                                         " number of qubits when using conditional gate operations")
 
     @staticmethod
-    def __validate_unsupported_measurements(experiment: QasmQobjExperiment) -> None:
+    def __validate_unsupported_measurements(analysis: ExperimentAnalysis) -> None:
         """ When using non-FSP (not full state projection) certain measurements cannot be handled correctly because
             cQASM isn't as flexible as Qiskit in measuring to specific classical bits.
             Therefore some Qiskit constructions are not supported in QI:
@@ -288,22 +858,13 @@ class QuantumInspireBackend(BaseBackend):  # type: ignore
             2. When a classical register is used for the measurement of more than one quantum register
 
         Args:
-            experiment: The experiment with gate operations and header.
+            analysis: The analysis of the experiment.
 
         Raises:
             QisKitBackendError: When the circuit contains an invalid non-FSP measurement
         """
-        measurements: List[List[int]] = []
-        for instruction in experiment.instructions:
-            if instruction.name == 'measure':
-                for q, m in measurements:
-                    if q == instruction.qubits[0] and m != instruction.memory[0]:
-                        raise QisKitBackendError('Measurement of qubit {} to different classical registers '
-                                                 'is not supported'.format(q))
-                    if q != instruction.qubits[0] and m == instruction.memory[0]:
-                        raise QisKitBackendError('Measurement of different qubits to the same classical register {0} '
-                                                 'is not supported'.format(m))
-                measurements.append([instruction.qubits[0], instruction.memory[0]])
+        if analysis.unsupported_measurement is not None:
+            raise QisKitBackendError(analysis.unsupported_measurement)
 
     @staticmethod
     def _collect_measurements(experiment: QasmQobjExperiment) -> Dict[str, Any]:
@@ -318,41 +879,10 @@ class QuantumInspireBackend(BaseBackend):  # type: ignore
             a list of [qubit_index, classical_bit_index], which represents the measurement of a qubit to a
             classical bit, and the second field in the dict is the number of classical bits (int).
         """
-        header = experiment.header
-        number_of_qubits = header.n_qubits
-        number_of_clbits = header.memory_slots
-
-        operations = experiment.instructions
-        measurements = [[number_of_qubits - 1 - m.qubits[0],
-                         number_of_clbits - 1 - m.memory[0]]
-                        for m in operations if m.name == 'measure']
-        if not measurements:
-            measurements = [[index, index] for index in range(number_of_qubits)]
-        return {'measurements': measurements, 'number_of_clbits': number_of_clbits}
-
-    @staticmethod
-    def __qubit_to_classical_hex(qubit_register: str, measurements: Dict[str, Any], number_of_qubits: int) -> str:
-        """ This function converts the qubit register data to the hexadecimal representation of the classical state.
-
-        Args:
-            qubit_register: The measured value of the qubits represented as int.
-            measurements: The dictionary contains a measured qubits/classical bits map (list) and the
-                          number of classical bits (int).
-            number_of_qubits: Number of qubits used in the algorithm.
-
-        Returns:
-            The hexadecimal value of the classical state.
-        """
-        qubit_state = ('{0:0{1}b}'.format(int(qubit_register), number_of_qubits))
-        classical_state = ['0'] * measurements['number_of_clbits']
-        for q, c in measurements['measurements']:
-            classical_state[c] = qubit_state[q]
-        classical_state_str = ''.join(classical_state)
-        classical_state_hex = hex(int(classical_state_str, 2))
-        return classical_state_hex
+        return ExperimentAnalysis(experiment).measurements
 
     @staticmethod
-    def __convert_histogram(result: Dict[str, Any], measurements: Dict[str, Any]) -> Dict[str, float]:
+    def __convert_histogram(result: Dict[str, Any], measurement_plan: MeasurementPlan) -> Dict[str, float]:
         """ The quantum inspire backend always uses full state projection. The SDK user
             can measure not all qubits and change the combined classical bits. This function
             converts the result to a histogram output that represents the probabilities
@@ -361,75 +891,52 @@ class QuantumInspireBackend(BaseBackend):  # type: ignore
         Args:
             result: The result output from the quantum inspire backend with full-
                     state projection histogram output.
-            measurements: The dictionary contains a measured qubits/classical bits map (list) and the
-                          number of classical bits (int).
+            measurement_plan: The conversion of qubit register values to classical states of the experiment.
 
         Returns:
             The resulting full state histogram with probabilities.
         """
-        output_histogram_probabilities: Dict[str, float] = defaultdict(lambda: 0)
-        number_of_qubits = result['number_of_qubits']
         state_probability: Dict[str, float] = result['histogram']
-        for qubit_register, probability in state_probability.items():
-            classical_state_hex = QuantumInspireBackend.__qubit_to_classical_hex(qubit_register, measurements,
-                                                                                 number_of_qubits)
-            output_histogram_probabilities[classical_state_hex] += probability
+        return measurement_plan.convert_histogram(state_probability)
 
-        sorted_histogram_probabilities: List[Tuple[str, float]] = sorted(output_histogram_probabilities.items(),
-                                                                         key=lambda kv: int(kv[0], 16))
-        return dict(sorted_histogram_probabilities)
+    @staticmethod
+    def __convert_probabilities_to_counts(probabilities: Dict[str, float], number_of_shots: int) -> Dict[str, int]:
+        """ Determines the counts histogram from the probabilities of the classical states. The counts are rounded
+            with the largest remainder method, so they add up to the number of shots.
 
-    def __convert_result_data(self, result: Dict[str, Any], measurements: Dict[str, Any]) -> Tuple[Dict[str, int],
-                                                                                                   List[str]]:
-        """ The quantum inspire backend returns the single shot values as raw data. This function
-            converts this list of single shot values to hexadecimal memory data according the Qiskit spec.
-            From this memory data the counts histogram is constructed by counting the single shot values.
+        Args:
+            probabilities: The probabilities of the classical states.
+            number_of_shots: The number of times the experiment is executed.
 
-        Note:
-            When shots = 1, the backend returns an empty list as raw_data. This is a special case. In this case the
-            resulting memory data consists of 1 value and the count histogram consists of 1 instance of this value.
-            To determine this value a random float is generated in the range [0, 1). With this random number the
-            value from this probabilities histogram is taken where the added probabilities is greater this random
-            number.
-            Example: probability histogram is {[0x0, 0.2], [0x3, 0.4], [0x5, 0.1], [0x6, 0.3]}.
-            When random is in the range [0, 0.2) the first value of the probability histogram is taken (0x0).
-            When random is in the range [0.2, 0.6) the second value of the probability histogram is taken (0x3).
-            When random is in the range [0.6, 0.7) the third value of the probability histogram is taken (0x5).
-            When random is in the range [0.7, 1) the last value of the probability histogram is taken (0x6).
+        Returns:
+            The counts of the classical states, leaving out the states that are not counted.
+        """
+        expected_counts = np.fromiter(probabilities.values(), dtype=float, count=len(probabilities)) * number_of_shots
+        counts = np.floor(expected_counts).astype(np.int64)
+        remaining_shots = min(max(number_of_shots - int(counts.sum()), 0), len(counts))
+        if remaining_shots:
+            largest_remainders = np.argsort(counts - expected_counts, kind='stable')[:remaining_shots]
+            counts[largest_remainders] += 1
+        return {state: count for state, count in zip(probabilities.keys(), counts.tolist()) if count}
+
+    @staticmethod
+    def __convert_result_data(raw_data: List[int], measurement_plan: MeasurementPlan) -> Tuple[Dict[str, int],
+                                                                                             'np.ndarray[Any, Any]']:
+        """ The quantum inspire backend returns the single shot values as raw data. This function
+            converts this list of single shot values to the integer classical states of the shots.
+            The classical states of all shots are determined at once and counted to construct the counts
+            histogram. Hexadecimal values are only formatted for the distinct classical states.
 
         Args:
-            result: The result output from the quantum inspire backend with full-
-                    state projection histogram output.
-            measurements: The dictionary contains a measured qubits/classical bits map (list) and the
-                          number of classical bits (int).
+            raw_data: The measured value of the qubits for each shot.
+            measurement_plan: The conversion of qubit register values to classical states of the experiment.
 
         Returns:
             The result consists of two formats for the result. The first result is the histogram with count data,
-            the second result is a list with converted hexadecimal memory values for each shot.
+            the second result is an array with the integer classical state of each shot. The memory of the
+            experiment result is formatted from these states according the Qiskit spec when it is accessed.
         """
-        memory_data = []
-        histogram_data: Dict[str, int] = defaultdict(lambda: 0)
-        number_of_qubits: int = result['number_of_qubits']
-        raw_data = self.__api.get_raw_data_from_result(result['id'])
-        if raw_data:
-            for raw_qubit_register in raw_data:
-                classical_state_hex = QuantumInspireBackend.__qubit_to_classical_hex(str(raw_qubit_register),
-                                                                                     measurements, number_of_qubits)
-                memory_data.append(classical_state_hex)
-            histogram_data = {elem: count for elem, count in Counter(memory_data).items()}
-        else:
-            state_probabilities = result['histogram']
-            random_probability = np.random.rand()
-            sum_probability = 0.0
-            for qubit_register, probability in state_probabilities.items():
-                sum_probability += probability
-                if random_probability < sum_probability:
-                    classical_state_hex = QuantumInspireBackend.__qubit_to_classical_hex(qubit_register, measurements,
-                                                                                         number_of_qubits)
-                    memory_data.append(classical_state_hex)
-                    histogram_data[classical_state_hex] = 1
-                    break
-
-        sorted_histogram_data: List[Tuple[str, int]] = sorted(histogram_data.items(), key=lambda kv: int(kv[0], 16))
-        histogram_obj = OrderedDict(sorted_histogram_data)
-        return dict(histogram_obj), memory_data
+        classical_states = measurement_plan.classical_states(measurement_plan.to_qubit_states(raw_data))
+        unique_states, counts = np.unique(classical_states, return_counts=True)
+        histogram_obj = dict(zip(MeasurementPlan.to_hex(unique_states), counts.tolist()))
+        return histogram_obj, classical_states
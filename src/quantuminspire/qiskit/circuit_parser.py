@@ -15,24 +15,72 @@ See the License for the specific language governing permissions and
 limitations under the License.
 
 """
-import copy
+import itertools
+from collections import defaultdict, deque
+from functools import lru_cache
 import numpy as np
 from io import StringIO
-from typing import Optional, Tuple, List
+from typing import Any, Deque, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple, List, Union
 from qiskit.qobj import QasmQobjInstruction
 from quantuminspire.exceptions import ApiError
+from quantuminspire.gate_sequence import CqasmDialect, CqasmWriter, GateSequence
 
 
 class CircuitToString:
-    """ Contains the translational elements to convert the Qiskit circuits to cQASM code."""
-
-    def __init__(self, full_state_projection: bool = True) -> None:
-        self.bfunc_instructions: List[QasmQobjInstruction] = []
+    """ Contains the translational elements to convert the Qiskit circuits to cQASM code.
+
+        The gates are translated with a precompiled dispatch table to the opcodes of a GateSequence, the u-gates to
+        their rotations. The gates are formatted with the cQASM templates of the Qiskit front-end as they are
+        translated, a gate sequence is only built when its qubits are renumbered.
+    """
+    # the opcode of each gate that translates to a single gate of the sequence
+    GATE_OPCODES: Dict[str, int] = {name: GateSequence.OPCODE[opcode_name] for name, opcode_name in
+                                    {'cz': 'cz', 'cx': 'cnot', 'ccx': 'toffoli', 'h': 'h', 'id': 'i', 's': 's',
+                                     'sdg': 'sdag', 'swap': 'swap', 't': 't', 'tdg': 'tdag', 'x': 'x', 'y': 'y',
+                                     'z': 'z', 'rx': 'rx', 'ry': 'ry', 'rz': 'rz'}.items()}
+    GATE_TEMPLATES: Dict[str, str] = {'cz': 'CZ q[%d], q[%d]\n',
+                                      'cnot': 'CNOT q[%d], q[%d]\n',
+                                      'toffoli': 'Toffoli q[%d], q[%d], q[%d]\n',
+                                      'h': 'H q[%d]\n',
+                                      'i': 'I q[%d]\n',
+                                      's': 'S q[%d]\n',
+                                      'sdag': 'Sdag q[%d]\n',
+                                      'swap': 'SWAP q[%d], q[%d]\n',
+                                      't': 'T q[%d]\n',
+                                      'tdag': 'Tdag q[%d]\n',
+                                      'x': 'X q[%d]\n',
+                                      'y': 'Y q[%d]\n',
+                                      'z': 'Z q[%d]\n',
+                                      'rx': 'Rx q[%d], %.6f\n',
+                                      'ry': 'Ry q[%d], %.6f\n',
+                                      'rz': 'Rz q[%d], %.6f\n',
+                                      'measure': 'measure q[%d]\n'}
+    # the binary controlled gates are formatted with the multi-bits control string followed by the qubits
+    DIALECT = CqasmDialect(GATE_TEMPLATES, {name: 'C-' + template.replace(' ', ' %s', 1)
+                                            for name, template in GATE_TEMPLATES.items() if name != 'measure'})
+    # the template of each gate without angle, by gate name, to format these gates in place when the cQASM is
+    # written directly
+    LINE_TEMPLATES: Dict[str, str] = {name: template for (name, opcode), template in
+                                      zip(GATE_OPCODES.items(), map(DIALECT.templates.__getitem__,
+                                                                    GATE_OPCODES.values()))
+                                      if not GateSequence.HAS_ANGLE[opcode]}
+    U_GATES = ('u', 'u1', 'u2', 'u3')
+    U_GATE_ROTATIONS = (GateSequence.OPCODE['rz'], GateSequence.OPCODE['ry'], GateSequence.OPCODE['rz'])
+    MEASURE = GateSequence.OPCODE['measure']
+    # the gates that translate to no cQASM
+    EMPTY_GATES = ('barrier',)
+
+    def __init__(self, full_state_projection: bool = True, qubit_map: Optional[Sequence[int]] = None) -> None:
+        # the stored bfunc instructions of each register, in order of appearance
+        self.bfunc_instructions: Dict[int, Deque[QasmQobjInstruction]] = defaultdict(deque)
         self.full_state_projection = full_state_projection
+        # the qubit of the cQASM for each qubit of the circuit, when the qubits are renumbered
+        self.qubit_map = qubit_map
+        # the negation line of the classical bits that are still negated after the last binary controlled gate
+        self._negation_line = ''
 
     @staticmethod
-    def _gate_not_supported(_stream: StringIO, instruction: QasmQobjInstruction, _binary_control: Optional[str] = None)\
-            -> None:
+    def _gate_not_supported(instruction: QasmQobjInstruction) -> None:
         """ Called when a gate is not supported with the backend. Throws an exception (ApiError)
 
         Args:
@@ -48,551 +96,58 @@ class CircuitToString:
             raise ApiError(f'Gate {instruction.name.lower()} not supported')
 
     @staticmethod
-    def _cz(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the controlled Z element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('CZ q[{0}], q[{1}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_cz(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled controlled Z element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        stream.write('C-CZ {0}q[{1}], q[{2}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _cx(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the controlled X element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('CNOT q[{0}], q[{1}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_cx(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled controlled X element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        stream.write('C-CNOT {0}q[{1}], q[{2}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _ccx(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the Toffoli element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('Toffoli q[{0}], q[{1}], q[{2}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_ccx(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary controlled Toffoli element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        stream.write('C-Toffoli {0}q[{1}], q[{2}], q[{3}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _h(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the H element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('H q[{0}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_h(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled H element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        stream.write('C-H {0}q[{1}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _id(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the ID element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('I q[{0}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_id(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled ID element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        stream.write('C-I {0}q[{1}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _s(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the S element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('S q[{0}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_s(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled S element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('C-S {0}q[{1}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _sdg(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the Sdag element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('Sdag q[{0}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_sdg(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled Sdag element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('C-Sdag {0}q[{1}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _swap(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the SWAP element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('SWAP q[{0}], q[{1}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_swap(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled SWAP element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('C-SWAP {0}q[{1}], q[{2}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _t(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the T element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('T q[{0}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_t(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled T element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('C-T {0}q[{1}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _tdg(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the Tdag element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('Tdag q[{0}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_tdg(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled Tdag element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('C-Tdag {0}q[{1}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _x(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the X element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('X q[{0}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_x(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled X element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('C-X {0}q[{1}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _y(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the Y element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('Y q[{0}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_y(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled Y element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        stream.write('C-Y {0}q[{1}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _z(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the Z element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        stream.write('Z q[{0}]\n'.format(*instruction.qubits))
-
-    @staticmethod
-    def _c_z(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled Z element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        stream.write('C-Z {0}q[{1}]\n'.format(binary_control, *instruction.qubits))
-
-    @staticmethod
-    def _r(stream: StringIO, instruction: QasmQobjInstruction, axis: str) -> None:
-        """ Translates the Rotation element for an axis (x,y,z).
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            axis: The axis for which the Rotation operator is parsed ('x', 'y' or 'z').
-
-        """
-        angle_q0 = float(instruction.params[0])
-        stream.write('R{0} q[{1}], {2:.6f}\n'.format(axis, *instruction.qubits, angle_q0))
-
-    @staticmethod
-    def _c_r(stream: StringIO, instruction: QasmQobjInstruction, axis: str, binary_control: str) -> None:
-        """ Translates the binary-controlled Rotation element for an axis (x,y,z).
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            axis: The axis for which the Rotation operator is parsed ('x', 'y' or 'z').
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        angle_q0 = float(instruction.params[0])
-        stream.write('C-R{0} {1}q[{2}], {3:.6f}\n'.format(axis, binary_control, *instruction.qubits, angle_q0))
-
-    @staticmethod
-    def _rx(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the Rx element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        CircuitToString._r(stream, instruction, 'x')
-
-    @staticmethod
-    def _c_rx(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled Rx element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        CircuitToString._c_r(stream, instruction, 'x', binary_control)
-
-    @staticmethod
-    def _ry(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the Ry element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        CircuitToString._r(stream, instruction, 'y')
-
-    @staticmethod
-    def _c_ry(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled Ry element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        CircuitToString._c_r(stream, instruction, 'y', binary_control)
-
-    @staticmethod
-    def _rz(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the Rz element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        CircuitToString._r(stream, instruction, 'z')
-
-    @staticmethod
-    def _c_rz(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled Rz element.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        CircuitToString._c_r(stream, instruction, 'z', binary_control)
-
-    @staticmethod
-    def _u(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the U element to U3. The u element is used by qiskit for the u_base gate and when a u0-gate
-            is used in the circuit but not supported as a basis gate for the backend.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        CircuitToString._u3(stream, instruction)
-
-    @staticmethod
-    def _c_u(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled U element to binary-controlled U3.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        CircuitToString._c_u3(stream, instruction, binary_control)
-
-    @staticmethod
-    def _u1(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the U1(lambda) element to U3(0, 0, lambda). A copy of the circuit is made to prevent
-            side-effects for the caller.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        temp_instruction = copy.deepcopy(instruction)
-        temp_instruction.params[0:0] = (0, 0)
-        CircuitToString._u3(stream, temp_instruction)
-
-    @staticmethod
-    def _c_u1(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled U1(lambda) element to U3(0, 0, lambda). A copy of the circuit is
-        made to prevent side-effects for the caller.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        temp_instruction = copy.deepcopy(instruction)
-        temp_instruction.params[0:0] = (0, 0)
-        CircuitToString._c_u3(stream, temp_instruction, binary_control)
-
-    @staticmethod
-    def _u2(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the U2(phi, lambda) element to U3(pi/2, phi, lambda). A copy of the circuit is made to prevent
-            side-effects for the caller.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        temp_instruction = copy.deepcopy(instruction)
-        temp_instruction.params.insert(0, np.pi/2)
-        CircuitToString._u3(stream, temp_instruction)
-
-    @staticmethod
-    def _c_u2(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled U2(phi, lambda) element to U3(pi/2, phi, lambda). A copy of the
-        circuit is made to prevent side-effects for the caller.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        temp_instruction = copy.deepcopy(instruction)
-        temp_instruction.params.insert(0, np.pi/2)
-        CircuitToString._c_u3(stream, temp_instruction, binary_control)
-
-    @staticmethod
-    def _u3(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the U3(theta, phi, lambda) element to 3 rotation gates.
-            Any single qubit operation (a 2x2 unitary matrix) can be written as the product of rotations.
-            As an example, a unitary single-qubit gate can be expressed as a combination of
-            Rz and Ry rotations (Nielsen and Chuang, 10th edition, section 4.2).
+    def _u_angles(name: str, params: List[Any]) -> Tuple[float, float, float]:
+        """ Determines the angles of the rotations of a u-gate. Any single qubit operation (a 2x2 unitary matrix)
+            can be written as the product of rotations. As an example, a unitary single-qubit gate can be expressed
+            as a combination of Rz and Ry rotations (Nielsen and Chuang, 10th edition, section 4.2).
             U(theta, phi, lambda) = Rz(phi)Ry(theta)Rz(lambda).
             Note: The expression above is the matrix multiplication, when implementing this in a gate circuit,
             the gates need to be executed in reversed order.
-            Any rotation of 0 radials is left out of the resulting circuit.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        gates = ['Rz', 'Ry', 'Rz']
-        angles = list(float(instruction.params[i]) for i in [2, 0, 1])
-        index_q0 = [instruction.qubits[0]] * 3
-        for triplet in zip(gates, index_q0, angles):
-            if triplet[2] != 0:
-                stream.write('{0} q[{1}], {2:.6f}\n'.format(*triplet))
-
-    @staticmethod
-    def _c_u3(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled U3(theta, phi, lambda) element to 3 rotation gates.
-            See gate _u3 for more information.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
-
-        """
-        gates = ['C-Rz', 'C-Ry', 'C-Rz']
-        binary_controls = [binary_control] * 3
-        angles = list(float(instruction.params[i]) for i in [2, 0, 1])
-        index_q0 = [instruction.qubits[0]] * 3
-        for quadruplets in zip(gates, binary_controls, index_q0, angles):
-            if quadruplets[3] != 0:
-                stream.write('{0} {1}q[{2}], {3:.6f}\n'.format(*quadruplets))
-
-    @staticmethod
-    def _barrier(stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the | element. No cQASM is added for this gate.
-
-        Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-
-        """
-        pass
-
-    @staticmethod
-    def _c_barrier(stream: StringIO, instruction: QasmQobjInstruction, binary_control: str) -> None:
-        """ Translates the binary-controlled | element. No cQASM is added for this gate.
+            The U1(lambda) element is U3(0, 0, lambda), the U2(phi, lambda) element is U3(pi/2, phi, lambda) and the
+            u element, which is used by qiskit for the u_base gate and for a u0-gate that is not supported as a basis
+            gate for the backend, is U3.
 
         Args:
-            stream: The string-io stream to where the resulting cQASM is written.
-            instruction: The Qiskit instruction to translate to cQASM.
-            binary_control: The multi-bits control string. The gate is executed when all specified classical bits are 1.
+            name: The name of the u-gate (u, u1, u2 or u3).
+            params: The parameters of the u-gate.
 
+        Returns:
+            The angles of the Rz, Ry and Rz rotation, in the order they are executed.
         """
-        pass
+        if name == 'u1':
+            return float(params[0]), 0.0, 0.0
+        if name == 'u2':
+            return float(params[1]), np.pi / 2, float(params[0])
+        return float(params[2]), float(params[0]), float(params[1])
 
-    def _measure(self, stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Translates the measure element. No cQASM is added for this gate when FSP is used.
+    def _translate_gate(self, sequence: Union[GateSequence, CqasmWriter], instruction: QasmQobjInstruction,
+                        binary_control: str = '') -> None:
+        """ Translates a gate and appends it to a gate sequence. The rotations of a u-gate of 0 radials are left out.
 
         Args:
-            stream: The string-io stream to where the resulting cQASM is written.
+            sequence: The gate sequence to which the gate is appended.
             instruction: The Qiskit instruction to translate to cQASM.
+            binary_control: The multi-bits control string of a binary controlled gate, empty for other gates.
+                            The gate is executed when all specified classical bits are 1.
 
+        Raises:
+            ApiError: the gate is not supported by the circuit parser.
         """
-        if not self.full_state_projection:
-            stream.write('measure q[{0}]\n'.format(*instruction.qubits))
+        name = instruction.name.lower()
+        opcode = self.GATE_OPCODES.get(name)
+        if opcode is not None:
+            angle = float(instruction.params[0]) if GateSequence.HAS_ANGLE[opcode] else 0.0
+            sequence.append(opcode, instruction.qubits, angle, binary_control)
+        elif name in self.U_GATES:
+            qubits = instruction.qubits[:1]
+            for opcode, angle in zip(self.U_GATE_ROTATIONS, self._u_angles(name, instruction.params)):
+                if angle != 0:
+                    sequence.append(opcode, qubits, angle, binary_control)
+        elif name == 'measure' and not binary_control:
+            if not self.full_state_projection:
+                sequence.append(self.MEASURE, instruction.qubits[:1])
+        elif name not in self.EMPTY_GATES:
+            self._gate_not_supported(instruction)
 
     @staticmethod
     def get_mask_data(mask: int) -> Tuple[int, int]:
@@ -620,32 +175,28 @@ class CircuitToString:
             bit_value <<= 1
         return lowest_mask_bit, mask_length
 
-    def _parse_bin_ctrl_gate(self, stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Parses a binary controlled gate. A binary controlled gate name is preceded by 'c-'.
-            The gate is executed when a specific measurement is true. Multiple measurement outcomes are used
-            to control the quantum operation. This measurement is a combination of classical bits being 1 and others
-            being 0. Because cQASM only supports measurement outcomes of 1, any other bits in the
-            masked bit pattern first have to be inverted with the not-operator. The same inversion also has to
-            take place after the binary controlled quantum operation.
-            The mask can be one or more bits and start at any bit depending on the instruction and the declaration
-            of classical bits.
-            The resulting stream will be expanded with something like:
-            not b[the 0-bits in the value relative to the mask changed to 1]
-            c-gate [classical bits in the mask], other arguments
-            not b[the 0-bits reset to 0 again]
-            When the c-gate results in an empty string (e.g. binary controlled u(0, 0, 0) or barrier gate),
-            nothing is added to the stream.
+    def _get_binary_control(self, instruction: QasmQobjInstruction) -> Tuple[str, str]:
+        """ Consumes the stored bfunc for a binary controlled gate and determines the cQASM parts needed to
+            execute the gate conditionally. See _translate_bin_ctrl_gate for a description of these parts.
+            The first stored bfunc of the register of the gate is used.
 
         Args:
-            stream: The string-io stream to where the resulting cQASM is written.
             instruction: The Qiskit instruction to translate to cQASM.
 
+        Returns:
+            The negation line for the classical bits that have to be 0 (empty when no bits are negated) and the
+            multi-bits control string for the binary controlled gate.
+
+        Raises:
+            ApiError: the bfunc is not found or it contains a relation or mask that is not supported.
         """
         conditional_reg_idx = instruction.conditional
-        conditional = next((x for x in self.bfunc_instructions if x.register == conditional_reg_idx), None)
-        if conditional is None:
+        conditionals = self.bfunc_instructions.get(conditional_reg_idx)
+        if not conditionals:
             raise ApiError(f'Conditional not found: reg_idx = {conditional_reg_idx}')
-        self.bfunc_instructions.remove(conditional)
+        conditional = conditionals.popleft()
+        if not conditionals:
+            del self.bfunc_instructions[conditional_reg_idx]
 
         conditional_type = conditional.relation
         if conditional_type != '==':
@@ -653,8 +204,23 @@ class CircuitToString:
         mask = int(conditional.mask, 16)
         if mask == 0:
             raise ApiError(f'Conditional statement {instruction.name.lower()} without a mask')
-        lowest_mask_bit, mask_length = self.get_mask_data(mask)
-        val = int(conditional.val, 16)
+        return self._binary_control_strings(mask, int(conditional.val, 16))
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _binary_control_strings(mask: int, val: int) -> Tuple[str, str]:
+        """ Determines the cQASM parts needed to execute a gate conditionally for a bfunc mask and value. The parts
+            are cached, as circuits tend to use a few distinct conditions for many binary controlled gates.
+
+        Args:
+            mask: The mask of the classical bits of the condition, not 0.
+            val: The value of the classical bits for which the gate is executed.
+
+        Returns:
+            The negation line for the classical bits that have to be 0 (empty when no bits are negated) and the
+            multi-bits control string for the binary controlled gate.
+        """
+        lowest_mask_bit, mask_length = CircuitToString.get_mask_data(mask)
         masked_val = mask & val
 
         # form the negation to the 0-values of the measurement registers, when value == mask no bits are negated
@@ -669,38 +235,380 @@ class CircuitToString:
         else:
             # form multi bits control - qasm-single-gate-multiple-qubits
             binary_control = f'b[{lowest_mask_bit}:{lowest_mask_bit + mask_length - 1}], '
+        return negate_zeroes_line, binary_control
+
+    def _switch_negation(self, negate_zeroes_line: str) -> str:
+        """ Determines the negation lines needed before a binary controlled gate. The classical bits negated for the
+            previous binary controlled gate stay negated when the gate negates the same bits. Otherwise they are
+            restored first, after which the bits of the gate are negated.
+
+        Args:
+            negate_zeroes_line: The negation line of the binary controlled gate, empty when no bits are negated.
+
+        Returns:
+            The negation lines to add before the gate, empty when the negated bits do not change.
+        """
+        negation_line = self._negation_line
+        self._negation_line = negate_zeroes_line
+        if negation_line == negate_zeroes_line:
+            return ''
+        return negation_line + negate_zeroes_line
+
+    def _restore_negated_bits(self) -> str:
+        """ Determines the negation line that restores the classical bits negated for the previous binary controlled
+            gates, e.g. before a gate that is not binary controlled or at the end of the circuit.
+
+        Returns:
+            The negation line to add, empty when no bits are negated.
+        """
+        negation_line = self._negation_line
+        self._negation_line = ''
+        return negation_line
+
+    def _translate_bin_ctrl_gate(self, sequence: Union[GateSequence, CqasmWriter],
+                                 instruction: QasmQobjInstruction) -> None:
+        """ Translates a binary controlled gate. A binary controlled gate name is preceded by 'c-'.
+            The gate is executed when a specific measurement is true. Multiple measurement outcomes are used
+            to control the quantum operation. This measurement is a combination of classical bits being 1 and others
+            being 0. Because cQASM only supports measurement outcomes of 1, any other bits in the
+            masked bit pattern first have to be inverted with the not-operator. The same inversion also has to
+            take place after the binary controlled quantum operation.
+            The mask can be one or more bits and start at any bit depending on the instruction and the declaration
+            of classical bits.
+            The resulting lines will be expanded with something like:
+            not b[the 0-bits in the value relative to the mask changed to 1]
+            c-gate [classical bits in the mask], other arguments
+            not b[the 0-bits reset to 0 again]
+            When the c-gate results in no lines (e.g. binary controlled u(0, 0, 0) or barrier gate),
+            nothing is added.
+            Consecutive binary controlled gates often negate the same bits. The bits are then negated once before
+            the first gate and reset after the last one, see _switch_negation. The rotations of a binary controlled
+            u-gate depend on its angles, so a u-gate that negates other bits keeps its own negation lines.
+
+        Args:
+            sequence: The gate sequence to which the gate is appended.
+            instruction: The Qiskit instruction to translate to cQASM.
+
+        """
+        negate_zeroes_line, binary_control = self._get_binary_control(instruction)
+        if negate_zeroes_line == self._negation_line:
+            self._translate_gate(sequence, instruction, binary_control)
+            return
+        if instruction.name.lower() in self.U_GATES:
+            negation_line = self._restore_negated_bits()
+            if negation_line:
+                sequence.append_line(negation_line)
+            length = len(sequence)
+            # negate the measurement registers that has to be 0, and reverse them afterwards
+            if negate_zeroes_line:
+                sequence.append_line(negate_zeroes_line)
+            self._translate_gate(sequence, instruction, binary_control)
+            if len(sequence) == length + bool(negate_zeroes_line):
+                sequence.truncate(length)
+            elif negate_zeroes_line:
+                sequence.append_line(negate_zeroes_line)
+            return
+        negation_line = self._negation_line
+        negation_lines = self._switch_negation(negate_zeroes_line)
+        length = len(sequence)
+        # negate the measurement registers that has to be 0, they are reversed after the last gate that needs them
+        sequence.append_line(negation_lines)
+        self._translate_gate(sequence, instruction, binary_control)
+        if len(sequence) == length + 1:
+            sequence.truncate(length)
+            self._negation_line = negation_line
+
+    def translate(self, sequence: Union[GateSequence, CqasmWriter],
+                  instructions: Iterable[QasmQobjInstruction]) -> None:
+        """ Translates gates to the gate sequence of a circuit. When a gate is a binary controlled gate, Qiskit uses
+            two instructions to handle it. The first instruction is a so-called bfunc with the conditional information
+            (mask, value to check etc.) which is stored for later use. The next instruction is the actual gate which
+            must be executed conditionally. This gate is translated by _translate_bin_ctrl_gate, which reads the
+            earlier stored bfunc. The classical bits negated for the last binary controlled gates are restored before
+            the next gate that is not binary controlled. They stay negated after the last instruction, so the
+            instructions of a circuit can be translated in parts, see emit.
+
+        Args:
+            sequence: The gate sequence, or the writer of the cQASM, to which the gates are appended.
+            instructions: The Qiskit instructions to translate to cQASM.
+
+        Raises:
+            ApiError: a gate or conditional in the circuit is not supported by the circuit parser.
+        """
+        opcodes = self.GATE_OPCODES
+        has_angle = GateSequence.HAS_ANGLE
+        append = sequence.append
+        if isinstance(sequence, CqasmWriter):
+            line_templates, write = self.LINE_TEMPLATES, sequence.lines.append
+        else:
+            line_templates, write = {}, sequence.append_line
+        negated = bool(self._negation_line)
+        for instruction in instructions:
+            name = instruction.name
+            if name == 'bfunc':
+                self.bfunc_instructions[instruction.register].append(instruction)
+            elif hasattr(instruction, 'conditional'):
+                self._translate_bin_ctrl_gate(sequence, instruction)
+                negated = bool(self._negation_line)
+            else:
+                if negated:
+                    sequence.append_line(self._restore_negated_bits())
+                    negated = False
+                template = line_templates.get(name)
+                if template is not None:
+                    write(template % tuple(instruction.qubits))
+                    continue
+                opcode = opcodes.get(name)
+                if opcode is None:
+                    self._translate_gate(sequence, instruction)
+                elif has_angle[opcode]:
+                    append(opcode, instruction.qubits, float(instruction.params[0]))
+                else:
+                    append(opcode, instruction.qubits)
+
+    def emit(self, lines: List[str], instructions: Iterable[QasmQobjInstruction], last: bool = True) -> None:
+        """ Translates gates to cQASM, see translate. The gates are formatted as they are translated. When the
+            parser has a qubit map, the gates are translated to a gate sequence instead, which is serialized at once
+            after its qubits are renumbered.
+
+        Args:
+            lines: The cQASM lines to which the lines of the gates are appended.
+            instructions: The Qiskit instructions to translate to cQASM.
+            last: When True, the instructions are the last ones of the circuit and the classical bits that are still
+                  negated are restored. When False, the next instructions of the circuit are emitted by a next call.
 
-        with StringIO() as gate_stream:
-            # add the gate
-            gate_name = f'_c_{instruction.name.lower()}'
-            gate_function = getattr(self, gate_name, getattr(self, "_gate_not_supported"))
-            gate_function(gate_stream, instruction, binary_control)
-            line = gate_stream.getvalue()
-            if len(line) != 0:
-                # negate the measurement registers that has to be 0
-                stream.write(negate_zeroes_line)
-                stream.write(line)
-                # reverse the measurement registers that had to be 0
-                stream.write(negate_zeroes_line)
+        Raises:
+            ApiError: a gate or conditional in the circuit is not supported by the circuit parser.
+        """
+        if self.qubit_map is None:
+            writer = CqasmWriter(lines, self.DIALECT)
+            self.translate(writer, instructions)
+            if last and self._negation_line:
+                writer.append_line(self._restore_negated_bits())
+            return
+        sequence = GateSequence()
+        self.translate(sequence, instructions)
+        if last and self._negation_line:
+            sequence.append_line(self._restore_negated_bits())
+        sequence.remap_qubits(self.qubit_map)
+        sequence.emit(lines, self.DIALECT)
 
     def parse(self, stream: StringIO, instruction: QasmQobjInstruction) -> None:
-        """ Parses a gate. For each type of gate a separate (private) parsing method is defined and called.
-            The resulting cQASM code is written to the stream. When the gate is a binary controlled
-            gate, Qiskit uses two instructions to handle it. The first instruction is a so-called bfunc with the
-            conditional information (mask, value to check etc.) which is stored for later use.
-            The next instruction is the actual gate which must be executed conditionally. The parsing is
-            forwarded to method _parse_bin_ctrl_gate which reads the earlier stored bfunc.
-            When a gate is not supported _gate_not_supported is called which raises an exception.
+        """ Parses a gate and writes the resulting cQASM code to the stream. See translate for the translation of
+            the gates.
 
         Args:
             stream: The string-io stream to where the resulting cQASM is written.
             instruction: The Qiskit instruction to translate to cQASM.
         """
-        if instruction.name == 'bfunc':
-            self.bfunc_instructions.append(instruction)
-        elif hasattr(instruction, 'conditional'):
-            self._parse_bin_ctrl_gate(stream, instruction)
+        lines: List[str] = []
+        self.emit(lines, (instruction,))
+        stream.write(''.join(lines))
+
+
+class _GateSlots(NamedTuple):
+    """ The cQASM lines of one parameterized gate in a CqasmTemplate. Each line is either a literal string or a
+        (prefix, column) pair, where column is the index of the angle in the parameter set that completes the line.
+    """
+    lines: List[Union[str, Tuple[str, int]]]
+    skip_zero_angles: bool
+    negate_zeroes_line: str
+
+
+class CqasmTemplate:
+    """ A cQASM skeleton of a circuit in which the angles of the parameterized gates are left open as slots.
+
+        Variational algorithms execute the same circuit structure many times with different rotation angles.
+        The template translates the structure once. Binding a set of parameters only fills in the angles, which is
+        done vectorized for a whole array of parameter sets. The bound programs are identical to the cQASM the
+        CircuitToString parser generates for the circuit with these parameters.
+    """
+    PARAMETERIZED_GATES = ('rx', 'ry', 'rz', 'u', 'u1', 'u2', 'u3')
+
+    def __init__(self, instructions: List[QasmQobjInstruction], full_state_projection: bool = True,
+                 header: str = '', qubit_map: Optional[Sequence[int]] = None) -> None:
+        """ Compiles the instructions to a cQASM template.
+
+        Args:
+            instructions: The Qiskit instructions of the circuit.
+            full_state_projection: When False, the circuit is not suitable for full state projection.
+            header: The cQASM text that precedes the translated instructions.
+            qubit_map: The qubit of the cQASM for each qubit of the circuit, when the qubits are renumbered.
+
+        Raises:
+            ApiError: a gate or conditional in the circuit is not supported by the circuit parser.
+        """
+        self._segments: List[Union[str, _GateSlots]] = []
+        self._number_of_parameters = 0
+        self._qubit_map = qubit_map
+        parser = CircuitToString(full_state_projection, qubit_map)
+        lines = [header]
+        for instruction in instructions:
+            name = instruction.name.lower()
+            if name not in CqasmTemplate.PARAMETERIZED_GATES:
+                parser.emit(lines, (instruction,), last=False)
+                continue
+            negate_zeroes_line, binary_control = '', ''
+            if hasattr(instruction, 'conditional'):
+                negate_zeroes_line, binary_control = parser._get_binary_control(instruction)
+            # the negations of the classical bits are shared with the adjacent binary controlled gates like the
+            # parser does, see CircuitToString._translate_bin_ctrl_gate
+            if binary_control and negate_zeroes_line == parser._negation_line:
+                negate_zeroes_line = ''
+            elif binary_control and name not in CircuitToString.U_GATES:
+                lines.append(parser._switch_negation(negate_zeroes_line))
+                negate_zeroes_line = ''
+            else:
+                lines.append(parser._restore_negated_bits())
+            self._segments.append(''.join(lines))
+            lines = []
+            self._segments.append(self._compile_gate(instruction, binary_control, negate_zeroes_line))
+        parser.emit(lines, ())
+        self._segments.append(''.join(lines))
+
+    @property
+    def number_of_parameters(self) -> int:
+        """ The number of angles in a parameter set. """
+        return self._number_of_parameters
+
+    @staticmethod
+    def structure_key(instructions: List[QasmQobjInstruction]) -> Tuple[Any, ...]:
+        """ Determines a key for the structure of a circuit. Circuits with the same key only differ in the angles of
+            their parameterized gates and can be generated with the same CqasmTemplate.
+
+        Args:
+            instructions: The Qiskit instructions of the circuit.
+
+        Returns:
+            A hashable key of the circuit structure.
+        """
+        def field(instruction: QasmQobjInstruction, name: str) -> Any:
+            # the assembler sets list-valued fields, e.g. the register of a measurement in a conditional circuit
+            value = getattr(instruction, name, None)
+            return tuple(value) if isinstance(value, list) else value
+
+        key = []
+        for instruction in instructions:
+            name = instruction.name.lower()
+            is_parameterized = name in CqasmTemplate.PARAMETERIZED_GATES
+            parameters = '' if is_parameterized else repr(getattr(instruction, 'params', None))
+            key.append((name, tuple(getattr(instruction, 'qubits', ())), tuple(getattr(instruction, 'memory', ())),
+                        *(field(instruction, field_name)
+                          for field_name in ('conditional', 'register', 'relation', 'mask', 'val')), parameters))
+        return tuple(key)
+
+    def _compile_gate(self, instruction: QasmQobjInstruction, binary_control: str,
+                      negate_zeroes_line: str) -> _GateSlots:
+        """ Translates a parameterized gate to its cQASM lines with angle slots. The rotations are the same as the
+            ones CircuitToString generates for the gate (see CircuitToString._u_angles for the u-gates).
+
+        Args:
+            instruction: The parameterized Qiskit instruction.
+            binary_control: The multi-bits control string, empty for a gate that is not binary controlled.
+            negate_zeroes_line: The negation line of the binary controlled gate, empty when no bits are negated or
+                                when the bits are negated by the lines preceding the gate.
+
+        Returns:
+            The cQASM lines of the gate.
+        """
+        name = instruction.name.lower()
+        qubit = instruction.qubits[0] if self._qubit_map is None else self._qubit_map[instruction.qubits[0]]
+        prefix = 'C-' if binary_control else ''
+
+        def rotation(gate: str) -> str:
+            return f'{prefix}{gate} {binary_control}q[{qubit}], '
+
+        column = self._number_of_parameters
+        self._number_of_parameters += len(instruction.params)
+        lines: List[Union[str, Tuple[str, int]]]
+        if name in ('rx', 'ry', 'rz'):
+            lines = [(rotation(f'R{name[1]}'), column)]
+            return _GateSlots(lines, False, negate_zeroes_line)
+        if name == 'u1':
+            lines = [(rotation('Rz'), column)]
+        elif name == 'u2':
+            lines = [(rotation('Rz'), column + 1), '{0}{1:.6f}\n'.format(rotation('Ry'), np.pi / 2),
+                     (rotation('Rz'), column)]
         else:
-            gate_name = f'_{instruction.name.lower()}'
-            gate_function = getattr(self, gate_name, getattr(self, "_gate_not_supported"))
-            gate_function(stream, instruction)
+            lines = [(rotation('Rz'), column + 2), (rotation('Ry'), column), (rotation('Rz'), column + 1)]
+        return _GateSlots(lines, True, negate_zeroes_line)
+
+    def get_parameters(self, instructions: List[QasmQobjInstruction]) -> 'np.ndarray[Any, Any]':
+        """ Collects the parameter set of a circuit with the same structure as the template.
+
+        Args:
+            instructions: The Qiskit instructions of the circuit.
+
+        Returns:
+            The angles of the parameterized gates, in the order of the template slots.
+
+        Raises:
+            ApiError: the number of angles does not match the template.
+        """
+        parameters = [float(parameter) for instruction in instructions
+                      if instruction.name.lower() in CqasmTemplate.PARAMETERIZED_GATES
+                      for parameter in instruction.params]
+        if len(parameters) != self._number_of_parameters:
+            raise ApiError(f'Circuit has {len(parameters)} parameters, template expects '
+                           f'{self._number_of_parameters}')
+        return np.array(parameters, dtype=float)
+
+    def bind(self, parameter_sets: Any) -> List[str]:
+        """ Generates the cQASM programs for an array of parameter sets.
+
+        Args:
+            parameter_sets: A 2-dimensional array with a parameter set on each row, or a single parameter set.
+
+        Returns:
+            A cQASM program for each parameter set.
+
+        Raises:
+            ApiError: the size of the parameter sets does not match the template.
+        """
+        values = np.asarray(parameter_sets, dtype=float)
+        if values.ndim == 1:
+            values = values.reshape(1, -1)
+        if values.ndim != 2 or values.shape[1] != self._number_of_parameters:
+            raise ApiError(f'Parameter sets with shape {values.shape} do not match the '
+                           f'{self._number_of_parameters} template parameters')
+        number_of_sets = values.shape[0]
+        angles = np.empty(values.shape, dtype=object)
+        angles[...] = [['%.6f' % angle for angle in parameter_set] for parameter_set in values.tolist()]
+        non_zero = values != 0
+
+        columns: List[Any] = []
+        for segment in self._segments:
+            if isinstance(segment, str):
+                columns.append(itertools.repeat(segment, number_of_sets))
+            else:
+                columns.append(self._bind_gate(segment, angles, non_zero).tolist())
+        return [''.join(program) for program in zip(*columns)]
+
+    @staticmethod
+    def _bind_gate(gate: _GateSlots, angles: 'np.ndarray[Any, Any]',
+                   non_zero: 'np.ndarray[Any, Any]') -> 'np.ndarray[Any, Any]':
+        """ Fills in the angles of a parameterized gate for all parameter sets at once. Rotations of 0 radians are
+            left out for the u-gates, a binary controlled gate that results in no rotations is left out completely.
+
+        Args:
+            gate: The cQASM lines of the gate.
+            angles: The formatted angles of all parameter sets.
+            non_zero: For all parameter sets, whether the angles differ from 0.
+
+        Returns:
+            The cQASM of the gate for each parameter set.
+        """
+        text = np.full(angles.shape[0], '', dtype=object)
+        for line in gate.lines:
+            if isinstance(line, str):
+                text += line
+                continue
+            prefix, column = line
+            filled = prefix + angles[:, column] + '\n'
+            if gate.skip_zero_angles:
+                filled[~non_zero[:, column]] = ''
+            text += filled
+        if gate.negate_zeroes_line:
+            wrapped = gate.negate_zeroes_line + text + gate.negate_zeroes_line
+            text = np.where(text != '', wrapped, '')
+        return text
@@ -0,0 +1,107 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from qiskit.qobj import QasmQobjExperiment
+
+
+class ExperimentAnalysis:
+    """ The properties of an experiment that are needed to validate and submit it, determined in a single pass
+    over its instructions.
+
+    Attributes:
+        number_of_qubits: The number of qubits of the experiment.
+        number_of_clbits: The number of classical bits of the experiment.
+        full_state_projection: True when no gates follow the measurements of the experiment, so full state
+                               projection (FSP) can be used.
+        has_conditional: True when the experiment contains conditional gate operations.
+        measurements: The measured qubits and classical bits. The list of measurements holds for each measurement
+                      a list of [qubit_index, classical_bit_index] in the bit order of the result, the full-state
+                      measured qubits when the experiment has no measurements. The second field is the number of
+                      classical bits.
+        unsupported_measurement: The error message of the first measurement that cannot be handled when
+                                 full state projection is not used. None when all measurements can be handled.
+        used_qubits: The qubits operated on by the gates and measurements of the experiment.
+    """
+
+    def __init__(self, experiment: QasmQobjExperiment) -> None:
+        """ Analyses the instructions of an experiment.
+
+        Args:
+            experiment: The experiment with gate operations and header.
+        """
+        header = experiment.header
+        self.number_of_qubits: int = header.n_qubits
+        self.number_of_clbits: int = header.memory_slots
+        self.full_state_projection = True
+        self.has_conditional = False
+        self.unsupported_measurement: Optional[str] = None
+        self.used_qubits: Set[int] = set()
+
+        measurement_found = False
+        measured_qubits: List[List[int]] = []
+        # the classical bit of each measured qubit and the qubit of each used classical bit, with the index of the
+        # first measurement that introduced them
+        qubit_targets: Dict[int, Tuple[int, int]] = {}
+        clbit_sources: Dict[int, Tuple[int, int]] = {}
+        for instruction in experiment.instructions:
+            if hasattr(instruction, 'conditional'):
+                self.has_conditional = True
+            if instruction.name != 'barrier':
+                self.used_qubits.update(getattr(instruction, 'qubits', ()))
+            if instruction.name == 'measure':
+                measurement_found = True
+                qubit, clbit = instruction.qubits[0], instruction.memory[0]
+                if self.unsupported_measurement is None:
+                    self.__check_measurement(qubit, clbit, len(measured_qubits), qubit_targets, clbit_sources)
+                measured_qubits.append([self.number_of_qubits - 1 - qubit, self.number_of_clbits - 1 - clbit])
+            elif measurement_found:
+                self.full_state_projection = False
+
+        if not measured_qubits:
+            measured_qubits = [[index, index] for index in range(self.number_of_qubits)]
+        self.measurements: Dict[str, Any] = {'measurements': measured_qubits,
+                                             'number_of_clbits': self.number_of_clbits}
+
+    def __check_measurement(self, qubit: int, clbit: int, index: int, qubit_targets: Dict[int, Tuple[int, int]],
+                            clbit_sources: Dict[int, Tuple[int, int]]) -> None:
+        """ Checks whether a measurement can be handled when full state projection is not used. cQASM isn't as
+            flexible as Qiskit in measuring to specific classical bits, a qubit cannot be measured to different
+            classical bits and a classical bit cannot be used for the measurement of different qubits.
+
+            Until the first unsupported measurement each measured qubit has a single classical bit and each used
+            classical bit has a single qubit, so the conflicts are found with a lookup. When both a conflicting qubit
+            and a conflicting classical bit exist, the conflict with the earliest measurement is reported.
+
+        Args:
+            qubit: The measured qubit.
+            clbit: The classical bit the qubit is measured to.
+            index: The index of the measurement among the measurements of the experiment.
+            qubit_targets: The classical bit of each measured qubit and the index of its first measurement.
+            clbit_sources: The measured qubit of each classical bit and the index of its first measurement.
+        """
+        target_clbit, qubit_index = qubit_targets.get(qubit, (clbit, index))
+        source_qubit, clbit_index = clbit_sources.get(clbit, (qubit, index))
+        if target_clbit != clbit and (source_qubit == qubit or qubit_index < clbit_index):
+            self.unsupported_measurement = 'Measurement of qubit {} to different classical registers ' \
+                                           'is not supported'.format(qubit)
+        elif source_qubit != qubit:
+            self.unsupported_measurement = 'Measurement of different qubits to the same classical register {0} ' \
+                                           'is not supported'.format(clbit)
+        else:
+            qubit_targets.setdefault(qubit, (clbit, index))
+            clbit_sources.setdefault(clbit, (qubit, index))
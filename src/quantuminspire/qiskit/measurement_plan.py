@@ -0,0 +1,114 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+
+class MeasurementPlan:
+    """ Converts measured qubit register values to classical state values of an experiment.
+
+    The qubit to classical bit mapping of the experiment is compiled once into lookup tables, one table for each
+    byte of the qubit register that contains measured qubits. A table maps each value of its byte to the classical
+    bits these qubits are measured to. The classical state of a qubit register value is the bitwise or of the table
+    entries of its bytes, which is determined for whole arrays of qubit register values at once.
+    """
+
+    BITS_PER_TABLE = 8
+
+    def __init__(self, measurements: Dict[str, Any], number_of_qubits: int) -> None:
+        """ Compiles the lookup tables of the measurements.
+
+        Args:
+            measurements: The dictionary contains a measured qubits/classical bits map (list) and the
+                          number of classical bits (int), as collected by
+                          QuantumInspireBackend._collect_measurements.
+            number_of_qubits: Number of qubits used in the algorithm.
+        """
+        self.number_of_qubits = number_of_qubits
+        self.number_of_clbits: int = measurements['number_of_clbits']
+        # beyond 63 bits the states do not fit in a 64-bit integer and Python integers are used
+        self.dtype = np.int64 if max(self.number_of_qubits, self.number_of_clbits) < 64 else object
+        # a later measurement to the same classical bit overwrites the earlier one
+        clbit_sources = {self.number_of_clbits - 1 - c: self.number_of_qubits - 1 - q
+                         for q, c in measurements['measurements']}
+        table_bits: Dict[int, List[Tuple[int, int]]] = {}
+        for clbit, qubit in clbit_sources.items():
+            table_bits.setdefault(qubit // self.BITS_PER_TABLE, []).append((qubit % self.BITS_PER_TABLE, clbit))
+        byte_values = np.arange(2 ** self.BITS_PER_TABLE)
+        self._tables: List[Tuple[int, 'np.ndarray[Any, Any]']] = []
+        for byte_index, bits in sorted(table_bits.items()):
+            table = np.zeros(2 ** self.BITS_PER_TABLE, dtype=self.dtype)
+            for bit, clbit in bits:
+                table |= ((byte_values >> bit) & 1).astype(self.dtype) << clbit
+            self._tables.append((byte_index * self.BITS_PER_TABLE, table))
+
+    def to_qubit_states(self, qubit_registers: List[Any]) -> 'np.ndarray[Any, Any]':
+        """ Converts qubit register values, given as integers or as decimal strings, to an array.
+
+        Args:
+            qubit_registers: The measured values of the qubits.
+
+        Returns:
+            The measured values of the qubits in an array with the data type of the plan.
+        """
+        if self.dtype is object:
+            return np.array([int(value) for value in qubit_registers], dtype=object)
+        return np.fromiter(map(int, qubit_registers), dtype=np.int64, count=len(qubit_registers))
+
+    def classical_states(self, qubit_states: 'np.ndarray[Any, Any]') -> 'np.ndarray[Any, Any]':
+        """ Determines the classical state values of an array of qubit register values.
+
+        Args:
+            qubit_states: The measured values of the qubits, as returned by to_qubit_states.
+
+        Returns:
+            The integer values of the classical states.
+        """
+        classical_states = np.zeros(len(qubit_states), dtype=self.dtype)
+        for shift, table in self._tables:
+            byte_values = ((qubit_states >> shift) & 0xFF).astype(np.int64)
+            classical_states |= table[byte_values]
+        return classical_states
+
+    def convert_histogram(self, histogram: Dict[str, float]) -> Dict[str, float]:
+        """ Converts a full state histogram of qubit register values to the histogram of the classical states.
+            The probabilities of qubit register values with the same classical state are added.
+
+        Args:
+            histogram: The probabilities of the qubit register values, keyed by the decimal string of the value.
+
+        Returns:
+            The probabilities of the classical states keyed by their hexadecimal value, sorted by classical state.
+        """
+        qubit_states = self.to_qubit_states(list(histogram.keys()))
+        unique_states, inverse = np.unique(self.classical_states(qubit_states), return_inverse=True)
+        probabilities = np.bincount(inverse, weights=np.fromiter(histogram.values(), dtype=float, count=len(histogram)),
+                                    minlength=len(unique_states))
+        return dict(zip(self.to_hex(unique_states), probabilities.tolist()))
+
+    @staticmethod
+    def to_hex(classical_states: 'np.ndarray[Any, Any]') -> List[str]:
+        """ Formats classical state values as hexadecimal strings.
+
+        Args:
+            classical_states: The integer values of the classical states.
+
+        Returns:
+            The hexadecimal value of each classical state.
+        """
+        return list(map(hex, classical_states.tolist()))
@@ -0,0 +1,204 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from qiskit import ClassicalRegister, QuantumCircuit
+from qiskit.result import Result
+
+from quantuminspire.exceptions import QisKitBackendError
+
+
+class PauliEstimator:
+    """ Estimates the expectation values of observables that are weighted sums of Pauli terms.
+
+    The Pauli terms of all observables are grouped into sets of qubit-wise commuting terms. Each group is measured
+    with one circuit, which rotates the measured qubits to the basis of the group. The expectation values of all
+    terms of a group follow from the parity of the measured classical states, which is computed vectorized over the
+    integer states of the probability histogram (or counts) of the experiment.
+
+        estimator = PauliEstimator([{'ZZ': 1.0, 'XX': 0.5}, {'ZI': 1.0}])
+        circuits = estimator.measurement_circuits(ansatz)
+        result = execute(circuits, qi_backend, shots=1024).result()
+        values, variances = estimator.estimate(result)
+
+    A Pauli label is ordered like a Qiskit bit string: the last character of the label acts on qubit 0.
+    """
+    PAULI_OPERATORS = 'IXYZ'
+
+    def __init__(self, observables: List[Dict[str, float]]) -> None:
+        """ Groups the Pauli terms of the observables into qubit-wise commuting groups.
+
+        Args:
+            observables: The observables, each given as a dict of Pauli labels and their coefficients.
+
+        Raises:
+            QisKitBackendError: When a Pauli label is invalid or the labels differ in length.
+        """
+        labels = list(dict.fromkeys(label for observable in observables for label in observable))
+        self.number_of_qubits = len(labels[0]) if labels else 0
+        for label in labels:
+            if len(label) != self.number_of_qubits or any(pauli not in self.PAULI_OPERATORS for pauli in label):
+                raise QisKitBackendError('Invalid Pauli label {}'.format(label))
+
+        self.bases: List[str] = []
+        group_labels: List[List[str]] = []
+        self.__identity_coefficients = np.array([observable.get('I' * self.number_of_qubits, 0.0)
+                                                 for observable in observables], dtype=float)
+        for label in labels:
+            if label == 'I' * self.number_of_qubits:
+                continue
+            position = next((position for position, basis in enumerate(self.bases)
+                             if self.__commutes(basis, label)), None)
+            if position is None:
+                self.bases.append(label)
+                group_labels.append([label])
+            else:
+                self.bases[position] = ''.join(pauli if pauli != 'I' else basis_pauli
+                                               for basis_pauli, pauli in zip(self.bases[position], label))
+                group_labels[position].append(label)
+
+        # the qubits of the Z-basis measurement that determine the parity, and the coefficient of each term
+        self.__masks = [np.array([int(''.join('0' if pauli == 'I' else '1' for pauli in label), 2)
+                                  for label in terms], dtype=object if self.number_of_qubits > 63 else np.int64)
+                        for terms in group_labels]
+        self.__coefficients = [np.array([[observable.get(label, 0.0) for label in terms]
+                                         for observable in observables], dtype=float)
+                               for terms in group_labels]
+
+    @staticmethod
+    def __commutes(basis: str, label: str) -> bool:
+        """ Checks whether a Pauli term is qubit-wise commuting with the terms of a group.
+
+        Args:
+            basis: The measurement basis of the group.
+            label: The Pauli label of the term.
+
+        Returns:
+            True when the term acts on each qubit with identity or the Pauli operator of the basis.
+        """
+        return all(pauli == 'I' or basis_pauli in ('I', pauli) for basis_pauli, pauli in zip(basis, label))
+
+    def measurement_circuits(self, circuit: QuantumCircuit) -> List[QuantumCircuit]:
+        """ Creates a circuit for each group that measures the state prepared by a circuit in the basis of the group.
+            The circuits can be executed together as the experiments of one job.
+
+        Args:
+            circuit: The circuit that prepares the state, without classical bits.
+
+        Returns:
+            For each group, the circuit followed by the basis rotations and the measurement of qubit i to
+            classical bit i for each qubit the terms of the group act on.
+
+        Raises:
+            QisKitBackendError: When the circuit has classical bits or does not have the number of qubits of the
+                                Pauli labels.
+        """
+        if circuit.num_clbits > 0 or circuit.num_qubits != self.number_of_qubits:
+            raise QisKitBackendError('The circuit must have {} qubits and no classical bits'.format(
+                self.number_of_qubits))
+
+        circuits = []
+        for index, basis in enumerate(self.bases):
+            measurement_circuit = circuit.copy(name='{}_{}'.format(circuit.name, basis))
+            classical_register = ClassicalRegister(self.number_of_qubits, 'pauli{}'.format(index))
+            measurement_circuit.add_register(classical_register)
+            for qubit, pauli in enumerate(reversed(basis)):
+                if pauli == 'I':
+                    continue
+                if pauli == 'Y':
+                    measurement_circuit.sdg(qubit)
+                if pauli in 'XY':
+                    measurement_circuit.h(qubit)
+                measurement_circuit.measure(qubit, classical_register[qubit])
+            circuits.append(measurement_circuit)
+        return circuits
+
+    def estimate(self, result: Result, experiments: Optional[List[Any]] = None,
+                 use_probabilities: bool = True) -> Tuple['np.ndarray[Any, Any]', 'np.ndarray[Any, Any]']:
+        """ Estimates the expectation values of the observables from the results of the measurement circuits.
+
+        Args:
+            result: The result of the measurement circuits.
+            experiments: The experiment (index or name) in the result for each measurement circuit. By default the
+                         measurement circuits are the first experiments in the result.
+            use_probabilities: When True, the probability histograms of the results are used, otherwise the counts.
+
+        Returns:
+            The expectation value of each observable and the variance of each estimated expectation value.
+
+        Raises:
+            QisKitBackendError: When a result has no probabilities (use_probabilities is True) or no counts
+                                (use_probabilities is False).
+        """
+        if experiments is None:
+            experiments = list(range(len(self.bases)))
+        values = self.__identity_coefficients.copy()
+        variances = np.zeros_like(values)
+        for experiment, masks, coefficients in zip(experiments, self.__masks, self.__coefficients):
+            experiment_result = result._get_experiment(experiment)
+            histogram_name = 'probabilities' if use_probabilities else 'counts'
+            histogram = getattr(experiment_result.data, histogram_name, None)
+            if histogram is None:
+                raise QisKitBackendError('No {0} for experiment "{1}"'.format(histogram_name, experiment))
+            states, weights = self.__histogram_to_arrays(histogram, masks.dtype)
+            weights = weights / weights.sum()
+
+            # the eigenvalue of each term for each state, combined to the value of each observable for each state
+            eigenvalues = 1 - 2 * self._parity(states[:, np.newaxis] & masks[np.newaxis, :],
+                                               self.number_of_qubits).astype(float)
+            state_values = eigenvalues @ coefficients.T
+            group_values = weights @ state_values
+            values += group_values
+            variances += (weights @ state_values ** 2 - group_values ** 2) / experiment_result.shots
+        return values, variances
+
+    @staticmethod
+    def __histogram_to_arrays(histogram: Dict[str, Any],
+                              dtype: Any) -> Tuple['np.ndarray[Any, Any]', 'np.ndarray[Any, Any]']:
+        """ Converts a histogram with hexadecimal classical states to arrays.
+
+        Args:
+            histogram: The probability or count of each hexadecimal classical state.
+            dtype: The type of the integer states.
+
+        Returns:
+            The integer classical states and their probability or count.
+        """
+        states = np.array([int(state, 16) for state in histogram], dtype=dtype)
+        weights = np.fromiter(histogram.values(), dtype=float, count=len(histogram))
+        return states, weights
+
+    @staticmethod
+    def _parity(values: 'np.ndarray[Any, Any]', number_of_bits: int) -> 'np.ndarray[Any, Any]':
+        """ Computes the parity of the set bits of integer values, by folding the bits onto the lowest bit.
+
+        Args:
+            values: The integer values.
+            number_of_bits: The number of low bits of the values that can be set.
+
+        Returns:
+            1 for each value with an odd number of set bits, 0 for the other values.
+        """
+        shift = 1
+        while shift < number_of_bits:
+            shift <<= 1
+        values = values.copy()
+        while shift > 1:
+            shift >>= 1
+            values ^= values >> shift
+        return values & 1
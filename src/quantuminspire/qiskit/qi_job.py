@@ -21,6 +21,7 @@ from qiskit.providers import BaseJob, JobError, JobTimeoutError
 from qiskit.providers.jobstatus import JobStatus, JOB_FINAL_STATES
 from qiskit.qobj import QasmQobj, QasmQobjExperiment
 from quantuminspire.qiskit.qi_result import QIResult
+from quantuminspire.qiskit.result_store import ResultStore
 from quantuminspire.api import QuantumInspireAPI
 from quantuminspire.version import __version__ as quantum_inspire_version
 
@@ -96,11 +97,18 @@ class QIJob(BaseJob):  # type: ignore
 
     def status(self) -> JobStatus:
         """
-        Query the quantum-inspire platform for the status of the job.
+        Query the quantum-inspire platform for the status of the job. A job of which the results are in the
+        result store of the backend is done, the platform is not queried.
 
         Returns:
             The status of the job.
         """
+        result_store = getattr(self._backend, 'result_store', None)
+        if isinstance(result_store, ResultStore) and result_store.has_project(self._api.base_uri,
+                                                                              int(self._job_id)):
+            self._status = JobStatus.DONE
+            return self._status
+
         jobs = self._api.get_jobs_from_project(int(self._job_id))
         number_of_jobs = len(jobs)
         cancelled = len([job for job in jobs if job['status'] == 'CANCELLED'])
@@ -14,14 +14,102 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
-from typing import List, Union, Dict, Any
+from typing import List, Union, Dict, Any, Callable, Optional
+
+import numpy as np
 from qiskit.exceptions import QiskitError
 from qiskit.result import postprocess, Result
-from qiskit.result.models import ExperimentResult
+from qiskit.result.models import ExperimentResult, ExperimentResultData
 
 from quantuminspire.exceptions import QisKitBackendError
 
 
+class QIExperimentResultData(ExperimentResultData):  # type: ignore
+    """
+    Experiment result data that holds the memory as an array of integer classical states. The hexadecimal memory
+    strings are only formatted when the memory is accessed. The classical states can be loaded on first access,
+    so the single shot values are only downloaded from the Quantum Inspire platform when the memory is used.
+    """
+    def __init__(self, counts: Optional[Dict[str, int]] = None, memory: Optional[List[str]] = None,
+                 memory_states: Optional['np.ndarray[Any, Any]'] = None,
+                 memory_loader: Optional[Callable[[], 'np.ndarray[Any, Any]']] = None, **kwargs: Any) -> None:
+        """
+        Construct a new QIExperimentResultData object.
+
+        Args:
+            counts: the counts histogram of the classical states.
+            memory: the hexadecimal classical state of each shot.
+            memory_states: the integer classical state of each shot.
+            memory_loader: function that determines the integer classical states when they are accessed and were
+                           not given.
+            kwargs: other experiment result data (snapshots, statevector, unitary).
+        """
+        self._memory = memory
+        self._memory_states = memory_states
+        self._memory_loader = memory_loader
+        super().__init__(counts=counts, **kwargs)
+
+    @property
+    def memory_states(self) -> 'np.ndarray[Any, Any]':
+        """ The integer classical state of each shot, loaded on first access.
+
+        Raises:
+            AttributeError: when the experiment result data has no memory.
+        """
+        if self._memory_states is None:
+            if self._memory_loader is not None:
+                self._memory_states = self._memory_loader()
+                self._memory_loader = None
+            elif self._memory is not None:
+                states = [int(state, 16) for state in self._memory]
+                wide_states = any(state.bit_length() > 63 for state in states)
+                self._memory_states = np.array(states, dtype=object if wide_states else np.int64)
+            else:
+                raise AttributeError("'QIExperimentResultData' object has no attribute 'memory_states'")
+        return self._memory_states
+
+    @property
+    def memory(self) -> List[str]:
+        """ The hexadecimal classical state of each shot, formatted on first access.
+
+        Raises:
+            AttributeError: when the experiment result data has no memory.
+        """
+        if self._memory is None:
+            try:
+                memory_states = self.memory_states
+            except AttributeError:
+                raise AttributeError("'QIExperimentResultData' object has no attribute 'memory'") from None
+            unique_states, inverse = np.unique(memory_states, return_inverse=True)
+            unique_hex = np.array(list(map(hex, unique_states.tolist())), dtype=object)
+            self._memory = unique_hex[inverse].tolist()
+        return self._memory
+
+    @memory.setter
+    def memory(self, memory: List[str]) -> None:
+        self._memory = memory
+        self._memory_states = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ Return a dictionary format representation of the experiment result data. Memory that has not been
+        formatted yet is left out, so that converting the data does not format or download the memory.
+
+        Returns:
+            The dictionary form of the experiment result data.
+        """
+        out_dict = {}
+        for field in ['counts', 'snapshots', 'statevector', 'unitary']:
+            if hasattr(self, field):
+                out_dict[field] = getattr(self, field)
+        if self._memory is not None:
+            out_dict['memory'] = self._memory
+        return out_dict
+
+    def load_memory(self) -> None:
+        """ Formats the memory when it is available and not formatted yet. """
+        getattr(self, 'memory', None)
+
+
 class QIResult(Result):  # type: ignore
     """
     A result object returned by QIJob:
@@ -50,6 +138,71 @@ class QIResult(Result):  # type: ignore
         super().__init__(backend_name, backend_version, qobj_id, job_id, success,
                          results, date, status, header, **kwargs)
 
+    def get_memory(self, experiment: Any = None) -> Any:
+        """Get the sequence of memory states (readouts) for each shot. Memory that is loaded on first access is
+        loaded before the Qiskit get_memory method from Result is used.
+
+        Args:
+            experiment (str or QuantumCircuit or Schedule or int or None): the index of the
+                experiment, as specified by ``data()``.
+
+        Returns:
+            List[str] or np.ndarray: the list of each outcome, formatted according to registers in circuit.
+        """
+        try:
+            data = self._get_experiment(experiment).data
+        except QiskitError:
+            data = None
+        if isinstance(data, QIExperimentResultData):
+            data.load_memory()
+        return super().get_memory(experiment)
+
+    def get_memory_states(self, experiment: Any = None) -> Union['np.ndarray[Any, Any]',
+                                                                 List['np.ndarray[Any, Any]']]:
+        """Get the integer classical state of each shot of an experiment. Unlike get_memory, no string is
+        created for each shot. Bit i of a state is the value of classical bit i.
+
+        Args:
+            experiment (str or QuantumCircuit or Schedule or int or None): the index of the
+                experiment, as specified by ``get_data()``.
+
+        Returns:
+            One or more arrays which hold the classical state of each shot for each result.
+
+        Raises:
+            QisKitBackendError: raised if there is no memory in a result for the experiment(s).
+        """
+        if experiment is None:
+            exp_keys = range(len(self.results))
+        else:
+            exp_keys = [experiment]  # type: ignore
+
+        state_list: List['np.ndarray[Any, Any]'] = []
+        for key in exp_keys:
+            memory_states = getattr(self._get_experiment(key).data, 'memory_states', None)
+            if memory_states is None:
+                raise QisKitBackendError('No memory for experiment "{0}"'.format(key))
+            state_list.append(memory_states)
+
+        # Return first item of state_list if size is 1
+        if len(state_list) == 1:
+            return state_list[0]
+        else:
+            return state_list
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a dictionary format representation of the result. The memory that is available for the
+        experiments is formatted, so it is part of the dictionary.
+
+        Returns:
+            The dictionary form of the result.
+        """
+        for experiment_result in self.results:
+            if isinstance(experiment_result.data, QIExperimentResultData) and \
+                    experiment_result.data._memory_states is not None:
+                experiment_result.data.load_memory()
+        return super().to_dict()  # type: ignore
+
     def get_probabilities(self, experiment: Any = None) -> Union[Dict[str, float], List[Dict[str, float]]]:
 
         """Get the probability data of an experiment. The probability data is added as a separate result by
@@ -14,8 +14,9 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
+import time
 from copy import copy
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Union
 
 import coreapi
 from qiskit.providers import BaseProvider
@@ -25,24 +26,29 @@ from quantuminspire.api import QuantumInspireAPI
 from quantuminspire.credentials import get_token_authentication, get_basic_authentication
 from quantuminspire.exceptions import ApiError
 from quantuminspire.qiskit.backend_qx import QuantumInspireBackend
+from quantuminspire.qiskit.result_store import ResultStore
 
 QI_URL = 'https://api.quantum-inspire.com'
 
 
 class QuantumInspireProvider(BaseProvider):  # type: ignore
     """ Provides a backend and an api for a single Quantum Inspire account. """
+    BACKENDS_CACHE_TTL = 300.0
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self._backends: List[QuantumInspireBackend] = []
+        self._backends_expiration_time = 0.0
         self._api: Optional[QuantumInspireAPI] = None
+        self._result_store: Optional[ResultStore] = None
 
     def __str__(self) -> str:
         return 'QI'
 
     def backends(self, name: Optional[str] = None, **kwargs: Any) -> List[QuantumInspireBackend]:
         """
-        Provides a list of backends.
+        Provides a list of backends. The backends are constructed once and cached for BACKENDS_CACHE_TTL seconds,
+        after which the backend types are listed again.
 
         Args:
             name: Name of the requested backend.
@@ -54,17 +60,27 @@ class QuantumInspireProvider(BaseProvider):  # type: ignore
         if self._api is None:
             raise ApiError('Authentication details have not been set.')
 
-        available_backends = self._api.get_backend_types()
+        if time.monotonic() >= self._backends_expiration_time:
+            self._backends = []
+            for backend in self._api.get_backend_types():
+                if backend['is_allowed']:
+                    config = copy(QuantumInspireBackend.DEFAULT_CONFIGURATION)
+                    self._adjust_backend_configuration(config, backend)
+                    self._backends.append(QuantumInspireBackend(self._api, provider=self, configuration=config,
+                                                                result_store=self._result_store,
+                                                                backend_type=backend))
+            self._backends_expiration_time = time.monotonic() + self.BACKENDS_CACHE_TTL
+
         if name is not None:
-            available_backends = list(filter(lambda b: b['name'] == name, available_backends))
-        backends = []
-        for backend in available_backends:
-            if backend['is_allowed']:
-                config = copy(QuantumInspireBackend.DEFAULT_CONFIGURATION)
-                self._adjust_backend_configuration(config, backend)
-                backends.append(QuantumInspireBackend(self._api, provider=self, configuration=config))
+            return [backend for backend in self._backends if backend.name() == name]
+        return list(self._backends)
 
-        return backends
+    def refresh_backends(self) -> None:
+        """
+        Clears the cached backends, the backend types are listed again when the backends are requested.
+        """
+        self._backends = []
+        self._backends_expiration_time = 0.0
 
     @staticmethod
     def _adjust_backend_configuration(config: QasmBackendConfiguration, backend: Dict[str, Any]) -> None:
@@ -158,3 +174,16 @@ class QuantumInspireProvider(BaseProvider):  # type: ignore
             qi_url: URL that points to quantum-inspire api. Default value: 'https://api.quantum-inspire.com'.
         """
         self._api = QuantumInspireAPI(qi_url, authentication)
+        self.refresh_backends()
+
+    def set_result_store(self, result_store: Optional[Union[ResultStore, str]]) -> None:
+        """
+        Sets the local store for the results of completed jobs, used by the backends that are provided afterwards.
+        The results of a job are then downloaded once and served from the store when the job is retrieved again.
+
+        Args:
+            result_store: The result store or the file of the SQLite database of the result store. When None, the
+                          results are not stored.
+        """
+        self._result_store = ResultStore(result_store) if isinstance(result_store, str) else result_store
+        self.refresh_backends()
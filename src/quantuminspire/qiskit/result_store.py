@@ -0,0 +1,166 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ResultStore:
+    """ Local store for the results of completed Quantum Inspire jobs.
+
+    The jobs, their results and the raw data of the results are kept in an SQLite database, keyed by the base uri of
+    the Quantum Inspire API, the project id (the job id of a QIJob) and the job id. The ids are only unique on one
+    server, so projects of different servers (e.g. staging and production) that share a store are kept apart. The
+    results of completed jobs cannot change, so once a project is stored its results are served from the store
+    instead of being downloaded again from the Quantum Inspire platform.
+
+        store = ResultStore('~/quantum-inspire-results.sqlite')
+        QI.set_result_store(store)
+    """
+    # the version of the tables, stored as user version of the database
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: str = ':memory:') -> None:
+        """ Opens the store, the database is created when it does not exist.
+
+        Args:
+            path: The file of the SQLite database. By default the store is kept in memory.
+        """
+        self.path = path if path == ':memory:' else os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            schema_version = self._connection.execute('PRAGMA user_version').fetchone()[0]
+            if schema_version < self.SCHEMA_VERSION:
+                # the stored results of an older schema are not keyed by server, they are downloaded again
+                self._connection.execute('DROP TABLE IF EXISTS projects')
+                self._connection.execute('DROP TABLE IF EXISTS jobs')
+                self._connection.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS projects '
+                                     '(base_uri TEXT, project_id INTEGER, job_ids TEXT NOT NULL, '
+                                     'PRIMARY KEY (base_uri, project_id))')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS jobs '
+                                     '(base_uri TEXT, project_id INTEGER, job_id INTEGER, job TEXT NOT NULL, '
+                                     'result TEXT NOT NULL, raw_data BLOB, PRIMARY KEY (base_uri, project_id, job_id))')
+
+    def close(self) -> None:
+        """ Closes the database of the store. """
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _server(base_uri: str) -> str:
+        """ Normalizes the base uri of the API, so a uri with and without trailing slash is the same server. """
+        return base_uri.rstrip('/')
+
+    def has_project(self, base_uri: str, project_id: int) -> bool:
+        """ Checks whether the results of all jobs of a project are stored.
+
+        Args:
+            base_uri: The base uri of the Quantum Inspire API of the project.
+            project_id: The identification number of the project.
+
+        Returns:
+            True when the project is stored, otherwise False.
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT 1 FROM projects WHERE base_uri = ? AND project_id = ?',
+                                           (self._server(base_uri), project_id)).fetchone()
+        return row is not None
+
+    def get_project(self, base_uri: str,
+                    project_id: int) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """ Gets the jobs of a project and their results.
+
+        Args:
+            base_uri: The base uri of the Quantum Inspire API of the project.
+            project_id: The identification number of the project.
+
+        Returns:
+            The jobs of the project, in the order they were stored, and the result of each job. None is returned
+            when the project is not stored.
+        """
+        server = self._server(base_uri)
+        with self._lock:
+            row = self._connection.execute('SELECT job_ids FROM projects WHERE base_uri = ? AND project_id = ?',
+                                           (server, project_id)).fetchone()
+            if row is None:
+                return None
+            stored_jobs = dict((job_id, (job, result)) for job_id, job, result in self._connection.execute(
+                'SELECT job_id, job, result FROM jobs WHERE base_uri = ? AND project_id = ?', (server, project_id)))
+        job_ids = json.loads(row[0])
+        jobs = [json.loads(stored_jobs[job_id][0]) for job_id in job_ids]
+        results = [json.loads(stored_jobs[job_id][1]) for job_id in job_ids]
+        return jobs, results
+
+    def store_project(self, base_uri: str, project_id: int, jobs: List[Dict[str, Any]],
+                      results: List[Dict[str, Any]]) -> None:
+        """ Stores the jobs of a project and their results. The jobs are expected to be completed.
+
+        Args:
+            base_uri: The base uri of the Quantum Inspire API of the project.
+            project_id: The identification number of the project.
+            jobs: The jobs of the project.
+            results: The result of each job.
+        """
+        server = self._server(base_uri)
+        job_ids = [job['id'] for job in jobs]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO jobs (base_uri, project_id, job_id, job, result) VALUES (?, ?, ?, ?, ?)',
+                [(server, project_id, job['id'], json.dumps(job), json.dumps(result))
+                 for job, result in zip(jobs, results)])
+            self._connection.execute('INSERT OR REPLACE INTO projects (base_uri, project_id, job_ids) VALUES (?, ?, ?)',
+                                     (server, project_id, json.dumps(job_ids)))
+
+    def get_raw_data(self, base_uri: str, project_id: int, job_id: int) -> Optional[List[int]]:
+        """ Gets the raw data of the result of a job.
+
+        Args:
+            base_uri: The base uri of the Quantum Inspire API of the project.
+            project_id: The identification number of the project.
+            job_id: The identification number of the job.
+
+        Returns:
+            The measured value of the qubits for each shot. None is returned when the raw data is not stored.
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT raw_data FROM jobs '
+                                           'WHERE base_uri = ? AND project_id = ? AND job_id = ?',
+                                           (self._server(base_uri), project_id, job_id)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        raw_data: List[int] = json.loads(zlib.decompress(row[0]).decode())
+        return raw_data
+
+    def store_raw_data(self, base_uri: str, project_id: int, job_id: int, raw_data: List[int]) -> None:
+        """ Stores the raw data of the result of a stored job, compressed.
+
+        Args:
+            base_uri: The base uri of the Quantum Inspire API of the project.
+            project_id: The identification number of the project.
+            job_id: The identification number of the job.
+            raw_data: The measured value of the qubits for each shot.
+        """
+        compressed_raw_data = zlib.compress(json.dumps(raw_data, separators=(',', ':')).encode())
+        with self._lock, self._connection:
+            self._connection.execute('UPDATE jobs SET raw_data = ? '
+                                     'WHERE base_uri = ? AND project_id = ? AND job_id = ?',
+                                     (compressed_raw_data, self._server(base_uri), project_id, job_id))
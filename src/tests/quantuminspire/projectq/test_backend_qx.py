@@ -27,7 +27,7 @@ from projectq.meta import LogicalQubitIDTag
 from projectq.ops import (CNOT, NOT, Allocate, Barrier,
                           Deallocate, FlushGate, H, Measure,
                           Ph, Rx, Ry, Rz, S, Sdag, Swap, T, Tdag, Toffoli, X,
-                          Y, Z, R)
+                          Y, Z, R, SqrtX, get_inverse)
 
 from quantuminspire.exceptions import ProjectQBackendError, AuthenticationError
 from quantuminspire.projectq.backend_qx import QIBackend
@@ -196,6 +196,23 @@ class TestProjectQBackend(unittest.TestCase):
         self.assertRaisesRegex(ProjectQBackendError, 'Invalid number of runs \(num_runs=0\)',
                                QIBackend, num_runs, 0, self.api)
 
+    def test_run_splits_runs_over_jobs(self):
+        self.api.get_backend_type = MagicMock(return_value=self.simulator_backend_type)
+        qi_backend = QIBackendNonProtected(num_runs=5000, quantum_inspire_api=self.api)
+        qi_backend.qasm = "_"
+        qi_backend.measured_ids = [0]
+        qi_backend.allocation_map = [(0, 0)]
+        qi_backend.main_engine = MagicMock()
+        qi_backend.main_engine.mapper.current_mapping = [0]
+        results = iter([{'histogram': {'0': 0.5, '1': 0.5}, 'raw_text': ''},
+                        {'histogram': {'1': 1.0}, 'raw_text': ''}])
+        self.api.execute_qasm = MagicMock(side_effect=lambda *args, **kwargs: next(results))
+        qi_backend.run()
+        self.assertEqual(2, self.api.execute_qasm.call_count)
+        self.assertListEqual([2500, 2500], [call[1]['number_of_shots']
+                                            for call in self.api.execute_qasm.call_args_list])
+        self.assertDictEqual({'0': 0.25, '1': 0.75}, dict(qi_backend.quantum_inspire_result['histogram']))
+
     def test_init_raises_no_account_authentication_error(self):
         json.load = MagicMock()
         json.load.return_value = {'faulty_key': 'faulty_token'}
@@ -244,6 +261,28 @@ class TestProjectQBackend(unittest.TestCase):
                      S, Sdag, Swap, H, X, Y, Z, Rx(0.1), Ry(0.2), Rz(0.3)]:
             self.__is_available_assert_equal(gate, True)
 
+    def test_is_available_memoized_by_gate_type(self):
+        self.__is_available_assert_equal(get_inverse(SqrtX), False)
+        self.__is_available_assert_equal(Rx, False, count=1)
+        backend = QIBackend(quantum_inspire_api=MockApiClient())
+        self.assertTrue(backend.is_available(MagicMock(gate=Tdag, control_qubits=[])))
+        self.assertFalse(backend.is_available(MagicMock(gate=get_inverse(SqrtX), control_qubits=[])))
+        self.assertTrue(backend.is_available(MagicMock(gate=Rz(0.5), control_qubits=[])))
+        self.assertFalse(backend.is_available(MagicMock(gate=Rz(0.5), control_qubits=[MagicMock()])))
+        self.assertNotIn((type(Rx), 1), backend._available_gates)
+
+    def test_store_dispatched_by_gate_type(self):
+        backend = QIBackend(quantum_inspire_api=MockApiClient())
+        backend.main_engine = MagicMock(mapper=None)
+        backend.receive([MagicMock(gate=Allocate, qubits=[[MagicMock(id=identity)]]) for identity in range(2)])
+        backend.receive([MagicMock(gate=gate, qubits=[[MagicMock(id=1)]], control_qubits=controls)
+                         for gate, controls in [(Rz(0.5), []), (Rz(0.25), []), (R(0.5), [MagicMock(id=0)]),
+                                                (Tdag, []), (Sdag, []), (NOT, [MagicMock(id=0)])]])
+        self.assertEqual('\nrz q[1],0.5\nrz q[1],0.25\ncr q[0],q[1],0.500000000000\ntdag q[1]\nsdag q[1]'
+                         '\ncnot q[0], q[1]', backend.qasm)
+        command = MagicMock(gate=get_inverse(SqrtX), qubits=[[MagicMock(id=1)]], control_qubits=[])
+        self.assertRaisesRegex(NotImplementedError, 'not implemented', backend.receive, [command])
+
     def test_reset_is_cleared(self):
         self.qi_backend.clear = True
         self.qi_backend.reset()
@@ -324,6 +363,22 @@ class TestProjectQBackend(unittest.TestCase):
         self.__store_function(backend, 1, Measure)
         self.assertEqual(backend.qasm, "\nh q[0]\ncnot q[0], q[1]")
 
+    def test_prune_gates_outside_light_cone(self):
+        api = MockApiClient()
+        backend = QIBackend(quantum_inspire_api=api, verbose=1, prune=True)
+        backend.main_engine = MagicMock(mapper=None)
+        for identity in range(3):
+            self.__store_function(backend, identity, Allocate)
+        self.__store_function(backend, 0, H)
+        self.__store_function(backend, 2, H)
+        self.__store_function(backend, 1, NOT, count=1)
+        self.__store_function(backend, 1, H)
+        self.__store_function(backend, 0, Measure)
+        with patch('sys.stdout', new_callable=io.StringIO) as std_mock:
+            backend._finalize_qasm()
+        self.assertTrue(backend.cqasm().endswith('\nh q[0]\ncnot q[0], q[1]'))
+        self.assertIn('Light-cone pruning removed 2 of 4 gates', std_mock.getvalue())
+
     def test_store_returns_correct_qasm_non_fsp_program_1(self):
         api = MockApiClient()
         backend = QIBackend(quantum_inspire_api=api)
@@ -585,6 +640,21 @@ class TestProjectQBackend(unittest.TestCase):
         self.assertEqual(len(self.qi_backend.allocation_map), 5)
         self.assertEqual(self.qi_backend.allocation_map, [(0, 0), (1, 1), (3, 6), (2, 2), (4, -1)])
 
+    def test_allocate_reuses_first_deallocated_bit(self):
+        self.qi_backend.max_number_of_qubits = 3
+        self.qi_backend.main_engine = MagicMock()
+        self.qi_backend.allocation_map = [(0, 0), (2, -1), (1, -1)]
+        self.qi_backend.receive([MagicMock(gate=Allocate, qubits=[[MagicMock(id=index)]]) for index in (5, 6, 7)])
+        self.assertEqual(self.qi_backend.allocation_map, [(0, 0), (2, 5), (1, 6), (3, 7)])
+        self.assertEqual(self.qi_backend.number_of_qubits, 4)
+
+        # a simulation bit that is allocated x-to-x again is not reused for another bit
+        self.qi_backend.receive([MagicMock(gate=Deallocate, qubits=[[MagicMock(id=0)]]),
+                                 MagicMock(gate=Allocate, qubits=[[MagicMock(id=0)]]),
+                                 MagicMock(gate=Allocate, qubits=[[MagicMock(id=8)]])])
+        self.assertEqual(self.qi_backend.allocation_map, [(0, 0), (2, 5), (1, 6), (3, 7), (4, 8)])
+        self.assertEqual(self.qi_backend._physical_to_simulated(8), 4)
+
     def test_allocate_8_simulator_has_8(self):
         command_alloc0 = MagicMock(gate=Allocate, qubits=[[MagicMock(id=0)]])
         command_alloc1 = MagicMock(gate=Allocate, qubits=[[MagicMock(id=1)]])
@@ -792,6 +862,30 @@ class TestProjectQBackend(unittest.TestCase):
         self.assertTrue(std_output.startswith('version 1.0\n# cQASM generated by Quantum Inspire'))
         self.assertTrue('qubits 0' in std_output)
 
+    def test_run_optimizes_cqasm(self):
+        self.api.get_backend_type = MagicMock(return_value=self.simulator_backend_type)
+        qi_backend = QIBackendNonProtected(quantum_inspire_api=self.api, verbose=1, optimize=True)
+        qi_backend.qasm = "\nh q[0]\nrz q[1],0.25\nh q[0]\nrz q[1],0.5"
+        qi_backend.measured_ids = [0]
+        qi_backend.allocation_map = [(0, 0), (1, 1)]
+        qi_backend.main_engine = MagicMock()
+        qi_backend.main_engine.mapper.current_mapping = [0, 1]
+        with patch('sys.stdout', new_callable=io.StringIO) as std_mock:
+            qi_backend.run()
+        self.assertTrue(self.api.execute_qasm.call_args[0][0].endswith('qubits 0\n\nrz q[1],0.75'))
+        self.assertIn('cQASM optimization removed 3 of 4 gates', std_mock.getvalue())
+
+    def test_run_compacts_cqasm(self):
+        self.api.get_backend_type = MagicMock(return_value=self.simulator_backend_type)
+        qi_backend = QIBackendNonProtected(quantum_inspire_api=self.api, compact=True)
+        qi_backend.qasm = "\nh q[0]\nh q[1]\nx q[2]"
+        qi_backend.measured_ids = [0]
+        qi_backend.allocation_map = [(0, 0), (1, 1), (2, 2)]
+        qi_backend.main_engine = MagicMock()
+        qi_backend.main_engine.mapper.current_mapping = [0, 1, 2]
+        qi_backend.run()
+        self.assertTrue(self.api.execute_qasm.call_args[0][0].endswith('\n\n{ h q[0:1] | x q[2] }'))
+
     def test_run_raises_error_no_result(self):
         with patch('sys.stdout', new_callable=io.StringIO):
             self.qi_backend.qasm = "_"
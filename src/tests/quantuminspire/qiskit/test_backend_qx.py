@@ -17,22 +17,27 @@ limitations under the License.
 """
 
 import json
+import time
 import unittest
 from collections import OrderedDict
-from unittest.mock import Mock, patch
+from copy import copy
+from unittest.mock import ANY, Mock, patch
 
 import numpy as np
 import qiskit
 from coreapi.exceptions import ErrorMessage
+from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister
+from qiskit.compiler import assemble
 from qiskit.providers.models import QasmBackendConfiguration
 from qiskit.providers.models.backendconfiguration import GateConfig
 from qiskit.qobj import QasmQobjExperiment, QasmQobj
 
 from quantuminspire.api import QuantumInspireAPI
-from quantuminspire.exceptions import QisKitBackendError
+from quantuminspire.exceptions import ApiError, QisKitBackendError
 from quantuminspire.qiskit.backend_qx import QuantumInspireBackend
 from quantuminspire.qiskit.qi_job import QIJob
 from quantuminspire.qiskit.quantum_inspire_provider import QuantumInspireProvider
+from quantuminspire.qiskit.result_store import ResultStore
 from quantuminspire.version import __version__ as quantum_inspire_version
 
 
@@ -155,6 +160,500 @@ class TestQiSimulatorPy(unittest.TestCase):
         job = simulator.run(qobj)
         self.assertEqual('42', job.job_id())
 
+    def test_run_generates_parameter_sweep_from_template(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        experiments = []
+        for angle in [0.0, 0.5, 1.5]:
+            experiment = json.loads(json.dumps(qobj_dict['experiments'][0]))
+            experiment['instructions'] = [{'name': 'h', 'qubits': [0]},
+                                          {'name': 'u3', 'qubits': [1], 'params': [angle, 0.25, angle]},
+                                          {'name': 'cx', 'qubits': [0, 1]},
+                                          {'name': 'measure', 'qubits': [1], 'memory': [1]}]
+            experiments.append(experiment)
+        qobj_dict['experiments'] = experiments
+        qobj = QasmQobj.from_dict(qobj_dict)
+
+        simulator.run(qobj)
+        compiled_qasms = [call[0][0] for call in api.execute_qasm_async.call_args_list]
+        expected_qasms = [QuantumInspireBackend._generate_cqasm(experiment) for experiment in qobj.experiments]
+        self.assertListEqual(expected_qasms, compiled_qasms)
+        self.assertIn('H q[0]\nRz q[1], 0.250000\nCNOT q[0], q[1]\n', compiled_qasms[0])
+        self.assertIn('Rz q[1], 1.500000\nRy q[1], 1.500000\nRz q[1], 0.250000\n', compiled_qasms[2])
+
+    def test_run_submits_duplicate_experiments_once(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        experiments = []
+        for index, angle in enumerate([0.5, 1.5, 0.5]):
+            experiment = json.loads(json.dumps(qobj_dict['experiments'][0]))
+            experiment['header']['name'] = 'circuit{}'.format(index)
+            experiment['instructions'] = [{'name': 'rx', 'qubits': [0], 'params': [angle]},
+                                          {'name': 'measure', 'qubits': [0], 'memory': [0]}]
+            experiments.append(experiment)
+        qobj_dict['experiments'] = experiments
+        qobj = QasmQobj.from_dict(qobj_dict)
+
+        simulator.run(qobj)
+        self.assertEqual(2, api.execute_qasm_async.call_count)
+        user_data = [json.loads(call[1]['user_data']) for call in api.execute_qasm_async.call_args_list]
+        self.assertEqual(0, user_data[0]['experiment_index'])
+        self.assertEqual(1, len(user_data[0]['duplicates']))
+        self.assertEqual('circuit2', user_data[0]['duplicates'][0]['name'])
+        self.assertEqual(2, user_data[0]['duplicates'][0]['experiment_index'])
+        self.assertEqual(1, user_data[1]['experiment_index'])
+        self.assertNotIn('duplicates', user_data[1])
+
+    def test_run_packs_experiments(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['pack_experiments'] = True
+        experiments = []
+        for index, instructions in enumerate([[{'name': 'x', 'qubits': [0]}],
+                                              [{'name': 'x', 'qubits': [1]}],
+                                              [{'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                               {'name': 'x', 'qubits': [0]}]]):
+            experiment = json.loads(json.dumps(qobj_dict['experiments'][0]))
+            experiment['header']['name'] = 'circuit{}'.format(index)
+            experiment['instructions'] = instructions + [{'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                                         {'name': 'measure', 'qubits': [1], 'memory': [1]}]
+            experiments.append(experiment)
+        qobj_dict['experiments'] = experiments
+        simulator.run(QasmQobj.from_dict(qobj_dict))
+
+        self.assertEqual(2, api.execute_qasm_async.call_count)
+        packed_call, other_call = api.execute_qasm_async.call_args_list
+        self.assertEqual('version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 4\nX q[0]\nX q[3]\n',
+                         packed_call[0][0])
+        self.assertTrue(packed_call[1]['full_state_projection'])
+        self.assertEqual('circuit0', packed_call[1]['job_name'])
+        user_data = json.loads(packed_call[1]['user_data'])
+        self.assertListEqual([[3, 1], [2, 0]], user_data['measurements']['measurements'])
+        self.assertEqual(1, len(user_data['packed']))
+        self.assertEqual(1, user_data['packed'][0]['experiment_index'])
+        self.assertListEqual([[1, 1], [0, 0]], user_data['packed'][0]['measurements']['measurements'])
+        self.assertFalse(other_call[1]['full_state_projection'])
+        self.assertEqual('circuit2', other_call[1]['job_name'])
+
+        job = dict(self._basic_job_dictionary)
+        job['name'] = 'circuit0'
+        job['user_data'] = packed_call[1]['user_data']
+        api.get_jobs_from_project.return_value = [job]
+        api.get_result_from_job.return_value = {'id': 1, 'histogram': {'9': 0.5, '1': 0.5},
+                                                'execution_time_in_seconds': 2.1, 'number_of_qubits': 4}
+        api.get_raw_data_from_result.return_value = [9, 1] * 5
+        experiment_results = simulator.get_experiment_results(QIJob('backend', '42', api))
+        self.assertListEqual(['circuit0', 'circuit1'], [result.name for result in experiment_results])
+        self.assertDictEqual({'0x1': 100}, experiment_results[0].data.counts)
+        self.assertDictEqual({'0x0': 50, '0x2': 50}, experiment_results[1].data.counts)
+        self.assertListEqual(['0x2', '0x0'] * 5, experiment_results[1].data.memory)
+        self.assertDictEqual({'0x0': 0.5, '0x2': 0.5}, experiment_results[1].data.probabilities)
+
+    def test_run_optimizes_cqasm(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['optimize_cqasm'] = True
+        qobj_dict['experiments'][0]['instructions'] = [{'name': 'h', 'qubits': [0]},
+                                                       {'name': 'x', 'qubits': [1]},
+                                                       {'name': 'h', 'qubits': [0]},
+                                                       {'name': 'rz', 'qubits': [1], 'params': [0.5]},
+                                                       {'name': 'rz', 'qubits': [1], 'params': [0.25]},
+                                                       {'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                                       {'name': 'measure', 'qubits': [1], 'memory': [1]}]
+        with self.assertLogs('quantuminspire.qiskit.backend_qx', level='INFO') as log:
+            simulator.run(QasmQobj.from_dict(qobj_dict))
+        self.assertEqual('version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 2\nX q[1]\n'
+                         'Rz q[1], 0.750000\n', api.execute_qasm_async.call_args[0][0])
+        self.assertIn('cQASM optimization removed 3 of 5 gates', log.output[0])
+
+    def test_run_compacts_cqasm(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['compact_cqasm'] = True
+        qobj_dict['experiments'][0]['instructions'] = [{'name': 'h', 'qubits': [0]},
+                                                       {'name': 'h', 'qubits': [1]},
+                                                       {'name': 'cx', 'qubits': [0, 1]},
+                                                       {'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                                       {'name': 'measure', 'qubits': [1], 'memory': [1]}]
+        simulator.run(QasmQobj.from_dict(qobj_dict))
+        self.assertEqual('version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 2\nH q[0:1]\n'
+                         'CNOT q[0], q[1]\n', api.execute_qasm_async.call_args[0][0])
+
+    def test_run_assembled_conditional_circuit(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        q = QuantumRegister(3, 'q')
+        c0 = ClassicalRegister(1, 'c0')
+        c1 = ClassicalRegister(1, 'c1')
+        c2 = ClassicalRegister(1, 'c2')
+        circuit = QuantumCircuit(q, c0, c1, c2, name='conditional')
+        circuit.h(q[0])
+        circuit.h(q[1]).c_if(c0, 0)
+        circuit.h(q[2]).c_if(c1, 1)
+        circuit.measure(q[0], c0)
+        circuit.measure(q[1], c1)
+        circuit.measure(q[2], c2)
+        # the assembler attaches the register of the conditions to the measurements
+        qobj = assemble([circuit, circuit], simulator, shots=1024)
+        self.assertListEqual([0], qobj.experiments[0].instructions[-3].register)
+        simulator.run(qobj)
+        self.assertEqual('version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 3\nH q[0]\n'
+                         'not b[0]\nC-H b[0], q[1]\nnot b[0]\nC-H b[1], q[2]\n',
+                         api.execute_qasm_async.call_args[0][0])
+
+    def test_run_compacts_qubits(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['compact_qubits'] = True
+        experiment = qobj_dict['experiments'][0]
+        experiment['header']['n_qubits'] = 5
+        experiment['instructions'] = [{'name': 'h', 'qubits': [1]},
+                                      {'name': 'barrier', 'qubits': [0, 1, 2, 3, 4]},
+                                      {'name': 'cx', 'qubits': [1, 3]},
+                                      {'name': 'measure', 'qubits': [3], 'memory': [0]},
+                                      {'name': 'measure', 'qubits': [1], 'memory': [1]}]
+        simulator.run(QasmQobj.from_dict(qobj_dict))
+        self.assertEqual('version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 2\nH q[0]\n'
+                         'CNOT q[0], q[1]\n', api.execute_qasm_async.call_args[0][0])
+        user_data = api.execute_qasm_async.call_args[1]['user_data']
+        self.assertListEqual([[0, 1], [1, 0]], json.loads(user_data)['measurements']['measurements'])
+
+        job = dict(self._basic_job_dictionary)
+        job['user_data'] = user_data
+        api.get_jobs_from_project.return_value = [job]
+        api.get_result_from_job.return_value = {'id': 1, 'histogram': {'3': 0.5, '2': 0.5},
+                                                'execution_time_in_seconds': 2.1, 'number_of_qubits': 2}
+        api.get_raw_data_from_result.return_value = [3, 2] * 50
+        experiment_result = simulator.get_experiment_results(QIJob('backend', '42', api))[0]
+        self.assertDictEqual({'0x3': 50, '0x1': 50}, experiment_result.data.counts)
+        self.assertDictEqual({'0x3': 0.5, '0x1': 0.5}, experiment_result.data.probabilities)
+
+    def test_run_compact_qubits_with_conditional(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['compact_qubits'] = True
+        experiment = qobj_dict['experiments'][0]
+        experiment['header'].update({'n_qubits': 4, 'memory_slots': 4, 'creg_sizes': [['c', 4]]})
+        experiment['instructions'] = [{'name': 'h', 'qubits': [3]},
+                                      {'name': 'measure', 'qubits': [3], 'memory': [3]},
+                                      {'mask': '0xF', 'name': 'bfunc', 'register': 4, 'relation': '==',
+                                       'val': '0x8'},
+                                      {'conditional': 4, 'name': 'x', 'qubits': [2]}]
+        simulator.run(QasmQobj.from_dict(qobj_dict))
+        self.assertEqual('version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 4\nH q[3]\n'
+                         'measure q[3]\nnot b[0,1,2]\nC-X b[0:3], q[2]\nnot b[0,1,2]\n',
+                         api.execute_qasm_async.call_args[0][0])
+
+    def test_compact_qubits_without_measurements(self):
+        experiments = []
+        for angle in [0.5, 0.25]:
+            experiments.append(QasmQobjExperiment.from_dict({
+                'instructions': [{'name': 'rx', 'qubits': [2], 'params': [angle]}, {'name': 'x', 'qubits': [0]}],
+                'header': {'n_qubits': 4, 'memory_slots': 4, 'name': 'sweep', 'creg_sizes': [['c', 4]]}}))
+        qubit_map = QuantumInspireBackend._compact_qubit_map(4, {0, 2})
+        self.assertListEqual([0, -1, 1, -1], qubit_map)
+        self.assertIsNone(QuantumInspireBackend._compact_qubit_map(2, {0, 1}))
+        self.assertListEqual([0, -1], QuantumInspireBackend._compact_qubit_map(2, set()))
+        compiled_qasms = QuantumInspireBackend._generate_cqasm_for_experiments(experiments, [True, True],
+                                                                              [qubit_map, qubit_map])
+        header = 'version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 2\n'
+        self.assertListEqual([header + 'Rx q[1], 0.500000\nX q[0]\n', header + 'Rx q[1], 0.250000\nX q[0]\n'],
+                             compiled_qasms)
+        # the qubits measured by full state projection keep their classical bits, qubits 1 and 3 stay 0
+        measurements = QuantumInspireBackend._experiment_user_data(experiments[0], 0, qubit_map)['measurements']
+        self.assertListEqual([[0, 1], [1, 3]], measurements['measurements'])
+
+    def test_run_prunes_gates(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['compact_qubits'] = True
+        qobj_dict['config']['prune_gates'] = True
+        experiment = qobj_dict['experiments'][0]
+        experiment['header']['n_qubits'] = 3
+        experiment['instructions'] = [{'name': 'h', 'qubits': [0]},
+                                      {'name': 'cx', 'qubits': [0, 1]},
+                                      {'name': 'h', 'qubits': [1]},
+                                      {'name': 'x', 'qubits': [2]},
+                                      {'name': 'bfunc', 'mask': '0x1', 'relation': '==', 'val': '0x1',
+                                       'register': 2},
+                                      {'name': 'x', 'qubits': [2], 'conditional': 2},
+                                      {'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                      {'name': 'measure', 'qubits': [1], 'memory': [1]}]
+        with self.assertLogs('quantuminspire.qiskit.backend_qx', level='INFO') as log:
+            simulator.run(QasmQobj.from_dict(qobj_dict))
+        self.assertIn('Light-cone pruning removed 3 of 8 instructions', log.output[0])
+        self.assertEqual('version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 2\nH q[0]\n'
+                         'CNOT q[0], q[1]\nH q[1]\n', api.execute_qasm_async.call_args[0][0])
+
+    def test_run_prunes_gates_after_measurements(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['prune_gates'] = True
+        experiment = qobj_dict['experiments'][0]
+        experiment['instructions'] = [{'name': 'h', 'qubits': [0]},
+                                      {'name': 'h', 'qubits': [1]},
+                                      {'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                      {'name': 'x', 'qubits': [0]},
+                                      {'name': 'measure', 'qubits': [1], 'memory': [1]},
+                                      {'name': 'z', 'qubits': [1]}]
+        # without the gates after the measurements, the experiment is run with full state projection
+        simulator.run(QasmQobj.from_dict(qobj_dict))
+        self.assertEqual('version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 2\nH q[0]\nH q[1]\n',
+                         api.execute_qasm_async.call_args[0][0])
+
+    def test_run_qubit_compaction_on_hardware_backend(self):
+        api = Mock()
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        configuration = copy(QuantumInspireBackend.DEFAULT_CONFIGURATION)
+        configuration.simulator = False
+        hardware = QuantumInspireBackend(api, Mock(), configuration=configuration)
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['compact_qubits'] = True
+        self.assertRaisesRegex(QisKitBackendError, 'Compaction of qubits is only supported by simulator backends',
+                               hardware.run, QasmQobj.from_dict(qobj_dict))
+        api.create_project.assert_not_called()
+
+    def test_pack_experiments(self):
+        bins = QuantumInspireBackend._pack_experiments([3, 2, 4, 2, 1], [True, True, False, True, True], 5)
+        self.assertListEqual([[0, 1], [2], [3, 4]], bins)
+        self.assertListEqual([[0], [1]], QuantumInspireBackend._pack_experiments([5, 5], [True, True], 5))
+
+    def test_run_packing_on_hardware_backend(self):
+        api = Mock()
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        configuration = copy(QuantumInspireBackend.DEFAULT_CONFIGURATION)
+        configuration.simulator = False
+        hardware = QuantumInspireBackend(api, Mock(), configuration=configuration)
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['pack_experiments'] = True
+        self.assertRaisesRegex(QisKitBackendError, 'Packing of experiments is only supported by simulator backends',
+                               hardware.run, QasmQobj.from_dict(qobj_dict))
+        api.create_project.assert_not_called()
+
+    def test_run_stores_requested_memory(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['memory'] = True
+        qobj_dict['experiments'][0]['instructions'] = [{'name': 'h', 'qubits': [0]},
+                                                       {'name': 'measure', 'qubits': [0], 'memory': [0]}]
+        simulator.run(QasmQobj.from_dict(qobj_dict))
+        user_data = json.loads(api.execute_qasm_async.call_args[1]['user_data'])
+        self.assertTrue(user_data['memory'])
+
+    def test_get_experiment_results_without_memory(self):
+        instructions = [{'name': 'h', 'qubits': [0]},
+                        {'name': 'cx', 'qubits': [0, 1]},
+                        {'name': 'measure', 'qubits': [1], 'memory': [1]},
+                        {'name': 'measure', 'qubits': [0], 'memory': [0]}]
+        experiment = self._instructions_to_two_qubit_experiment(instructions)
+        measurements = QuantumInspireBackend._collect_measurements(experiment)
+        api = Mock()
+        api.get_result_from_job.return_value = {'id': 1, 'histogram': {'0': 1 / 3, '1': 1 / 3, '3': 1 / 3},
+                                                'execution_time_in_seconds': 2.1, 'number_of_qubits': 2}
+        api.get_raw_data_from_result.return_value = [0] * 33 + [1] * 33 + [3] * 34
+        jobs = self._basic_job_dictionary
+        user_data = {'name': 'circuit0', 'memory_slots': 2, 'creg_sizes': [['c1', 2]], 'measurements': measurements,
+                     'experiment_index': 0, 'memory': False,
+                     'duplicates': [{'name': 'circuit1', 'memory_slots': 2, 'creg_sizes': [['c1', 2]],
+                                     'measurements': measurements, 'experiment_index': 1}]}
+        jobs['user_data'] = json.dumps(user_data)
+        api.get_jobs_from_project.return_value = [jobs]
+        simulator = QuantumInspireBackend(api, Mock())
+        experiment_results = simulator.get_experiment_results(QIJob('backend', '42', api))
+        self.assertDictEqual({'0x0': 34, '0x1': 33, '0x3': 33}, experiment_results[0].data.counts)
+        self.assertNotIn('memory', experiment_results[0].data.to_dict())
+        api.get_raw_data_from_result.assert_not_called()
+
+        self.assertEqual(100, len(experiment_results[0].data.memory))
+        self.assertEqual(34, experiment_results[1].data.memory.count('0x3'))
+        api.get_raw_data_from_result.assert_called_once_with(1)
+
+    def test_get_experiment_results_for_duplicate_experiments(self):
+        instructions = [{'name': 'h', 'qubits': [0]},
+                        {'name': 'cx', 'qubits': [0, 1]},
+                        {'name': 'measure', 'qubits': [1], 'memory': [1]},
+                        {'name': 'measure', 'qubits': [0], 'memory': [0]}]
+        experiment = self._instructions_to_two_qubit_experiment(instructions)
+        measurements = QuantumInspireBackend._collect_measurements(experiment)
+        swapped_instructions = [{'name': 'h', 'qubits': [0]},
+                                {'name': 'cx', 'qubits': [0, 1]},
+                                {'name': 'measure', 'qubits': [1], 'memory': [0]},
+                                {'name': 'measure', 'qubits': [0], 'memory': [1]}]
+        swapped_experiment = self._instructions_to_two_qubit_experiment(swapped_instructions)
+        swapped_measurements = QuantumInspireBackend._collect_measurements(swapped_experiment)
+        api = Mock()
+        api.get_result_from_job.side_effect = [{'id': 1, 'histogram': {'1': 0.6, '3': 0.4},
+                                                'execution_time_in_seconds': 2.1, 'number_of_qubits': 2},
+                                               {'id': 2, 'histogram': {'0': 1.0},
+                                                'execution_time_in_seconds': 1.1, 'number_of_qubits': 2}]
+        api.get_raw_data_from_result.side_effect = [[1] * 6 + [3] * 4, [0] * 10]
+        job = dict(self._basic_job_dictionary)
+        job['name'] = 'circuit0'
+        job['user_data'] = json.dumps({'name': 'circuit0', 'memory_slots': 2, 'creg_sizes': [['c1', 2]],
+                                       'measurements': measurements, 'experiment_index': 0,
+                                       'duplicates': [{'name': 'circuit2', 'memory_slots': 2,
+                                                       'creg_sizes': [['c1', 2]],
+                                                       'measurements': swapped_measurements,
+                                                       'experiment_index': 2}]})
+        other_job = dict(self._basic_job_dictionary)
+        other_job['id'] = 25
+        other_job['name'] = 'circuit1'
+        other_job['user_data'] = json.dumps({'name': 'circuit1', 'memory_slots': 2, 'creg_sizes': [['c1', 2]],
+                                             'measurements': measurements, 'experiment_index': 1})
+        api.get_jobs_from_project.return_value = [job, other_job]
+        simulator = QuantumInspireBackend(api, Mock())
+
+        experiment_results = simulator.get_experiment_results(QIJob('backend', '42', api))
+        self.assertEqual(2, api.get_raw_data_from_result.call_count)
+        self.assertListEqual(['circuit0', 'circuit1', 'circuit2'], [result.name for result in experiment_results])
+        self.assertDictEqual({'0x1': 6, '0x3': 4}, experiment_results[0].data.counts)
+        self.assertDictEqual({'0x0': 10}, experiment_results[1].data.counts)
+        self.assertDictEqual({'0x2': 6, '0x3': 4}, experiment_results[2].data.counts)
+        self.assertEqual('circuit2', experiment_results[2].header.name)
+        self.assertFalse(hasattr(experiment_results[2].header, 'experiment_index'))
+
+    def test_get_experiment_results_fetches_jobs_concurrently(self):
+        number_of_jobs = 12
+        measurements = {'measurements': [[0, 0]], 'number_of_clbits': 1}
+
+        def get_result_from_job(job_id):
+            # later jobs complete first
+            time.sleep(0.001 * (number_of_jobs - job_id))
+            return {'id': job_id, 'histogram': {'1': 1.0}, 'execution_time_in_seconds': 0.1 * job_id,
+                    'number_of_qubits': 1}
+
+        api = Mock()
+        api.get_result_from_job.side_effect = get_result_from_job
+        api.get_raw_data_from_result.side_effect = lambda result_id: [result_id % 2] * 10
+        jobs = []
+        for job_id in range(number_of_jobs):
+            job = dict(self._basic_job_dictionary)
+            job.update({'id': job_id, 'name': 'circuit{}'.format(job_id), 'number_of_shots': 10})
+            job['user_data'] = json.dumps({'name': 'circuit{}'.format(job_id), 'memory_slots': 1,
+                                           'creg_sizes': [['c1', 1]], 'measurements': measurements,
+                                           'experiment_index': job_id, 'memory': True})
+            jobs.append(job)
+        api.get_jobs_from_project.return_value = jobs
+        simulator = QuantumInspireBackend(api, Mock())
+
+        experiment_results = simulator.get_experiment_results(QIJob('backend', '42', api))
+        self.assertListEqual(['circuit{}'.format(job_id) for job_id in range(number_of_jobs)],
+                             [result.name for result in experiment_results])
+        self.assertListEqual([{'0x{}'.format(job_id % 2): 10} for job_id in range(number_of_jobs)],
+                             [result.data.counts for result in experiment_results])
+        self.assertEqual(number_of_jobs, api.get_raw_data_from_result.call_count)
+
+    def test_get_experiment_results_from_result_store(self):
+        measurements = {'measurements': [[0, 0]], 'number_of_clbits': 1}
+        api = Mock()
+        api.get_result_from_job.return_value = {'id': 1, 'histogram': {'0': 0.5, '1': 0.5},
+                                                'execution_time_in_seconds': 2.1, 'number_of_qubits': 1}
+        api.get_raw_data_from_result.return_value = [0, 1, 1, 0]
+        jobs = self._basic_job_dictionary
+        jobs['number_of_shots'] = 4
+        jobs['user_data'] = json.dumps({'name': 'circuit0', 'memory_slots': 1, 'creg_sizes': [['c1', 1]],
+                                        'measurements': measurements, 'experiment_index': 0, 'memory': False})
+        api.get_jobs_from_project.return_value = [jobs]
+        api.base_uri = 'https://api.quantum-inspire.com/'
+        job = Mock()
+        job.job_id.return_value = '42'
+        result_store = ResultStore()
+        simulator = QuantumInspireBackend(api, Mock(), result_store=result_store)
+        self.assertIs(result_store, simulator.result_store)
+
+        experiment_results = simulator.get_experiment_results(job)
+        self.assertListEqual(['0x0', '0x1', '0x1', '0x0'], experiment_results[0].data.memory)
+        self.assertTrue(result_store.has_project(api.base_uri, 42))
+        self.assertFalse(result_store.has_project('https://staging.quantum-inspire.com/', 42))
+
+        api.reset_mock()
+        experiment_results = simulator.get_experiment_results(job)
+        self.assertDictEqual({'0x0': 2, '0x1': 2}, experiment_results[0].data.counts)
+        self.assertListEqual(['0x0', '0x1', '0x1', '0x0'], experiment_results[0].data.memory)
+        self.assertEqual('circuit0', experiment_results[0].name)
+        simulator.retrieve_job('42')
+        api.get_jobs_from_project.assert_not_called()
+        api.get_result_from_job.assert_not_called()
+        api.get_raw_data_from_result.assert_not_called()
+        api.get_project.assert_not_called()
+
+    def test_get_experiment_results_does_not_store_incomplete_jobs(self):
+        api = Mock()
+        api.get_result_from_job.return_value = {'id': 1, 'histogram': {'0': 1.0},
+                                                'execution_time_in_seconds': 2.1, 'number_of_qubits': 1}
+        api.get_raw_data_from_result.return_value = [0, 0]
+        jobs = self._basic_job_dictionary
+        jobs['status'] = 'CANCELLED'
+        jobs['user_data'] = json.dumps({'name': 'circuit0', 'memory_slots': 1, 'creg_sizes': [['c1', 1]],
+                                        'measurements': {'measurements': [[0, 0]], 'number_of_clbits': 1}})
+        api.get_jobs_from_project.return_value = [jobs]
+        api.base_uri = 'https://api.quantum-inspire.com/'
+        job = Mock()
+        job.job_id.return_value = '42'
+        result_store = ResultStore()
+        simulator = QuantumInspireBackend(api, Mock(), result_store=result_store)
+        simulator.get_experiment_results(job)
+        self.assertFalse(result_store.has_project(api.base_uri, 42))
+
+    def test_get_experiment_results_reports_first_failing_job(self):
+        def get_result_from_job(job_id):
+            if job_id > 0:
+                raise ApiError('Job with id {} does not exist!'.format(job_id))
+            return {'id': job_id, 'histogram': {}, 'raw_text': 'Error'}
+
+        api = Mock()
+        api.get_result_from_job.side_effect = get_result_from_job
+        api.get_jobs_from_project.return_value = [{'id': job_id, 'user_data': ''} for job_id in range(3)]
+        job = Mock()
+        job.job_id.return_value = '42'
+        simulator = QuantumInspireBackend(api, Mock())
+        with self.assertRaises(ApiError) as error:
+            simulator.get_experiment_results(job)
+        self.assertEqual(('Job with id 1 does not exist!',), error.exception.args)
+
     def test_get_experiment_results_raises_simulation_error_when_no_histogram(self):
         api = Mock()
         api.get_jobs_from_project.return_value = [{'id': 42, 'results': '{}'}]
@@ -197,6 +696,26 @@ class TestQiSimulatorPy(unittest.TestCase):
         self.assertEqual(experiment_result.name, 'circuit0')
         self.assertEqual(experiment_result.shots, number_of_shots)
 
+    def test_get_experiment_results_converts_wide_registers(self):
+        number_of_qubits = 70
+        measurements = {'measurements': [[0, 1], [number_of_qubits - 1, 0], [number_of_qubits - 2, 0]],
+                        'number_of_clbits': 2}
+        api = Mock()
+        api.get_result_from_job.return_value = {'id': 1, 'histogram': {str(2 ** 69): 0.5, '1': 0.5},
+                                                'execution_time_in_seconds': 2.1,
+                                                'number_of_qubits': number_of_qubits}
+        api.get_raw_data_from_result.return_value = [2 ** 69, 1, 2 ** 69 + 3, 2]
+        jobs = self._basic_job_dictionary
+        jobs['user_data'] = json.dumps({'name': 'name', 'memory_slots': 2, 'creg_sizes': [['c1', 2]],
+                                        'measurements': measurements})
+        api.get_jobs_from_project.return_value = [jobs]
+        job = QIJob('backend', '42', api)
+        simulator = QuantumInspireBackend(api, Mock())
+        experiment_result = simulator.get_experiment_results(job)[0]
+        self.assertListEqual([1, 0, 3, 2], experiment_result.data.memory_states.tolist())
+        self.assertListEqual(['0x1', '0x0', '0x3', '0x2'], experiment_result.data.memory)
+        self.assertDictEqual({'0x0': 1, '0x1': 1, '0x2': 1, '0x3': 1}, experiment_result.data.counts)
+
     def test_get_experiment_results_returns_single_shot(self):
         number_of_shots = 1
         self._basic_job_dictionary['number_of_shots'] = number_of_shots
@@ -284,8 +803,55 @@ class TestQiSimulatorPy(unittest.TestCase):
         job = qiskit.qobj.QasmQobj.from_dict(job_dict)  # qiskit validation is satisfied
         job.config.shots = 0                            # now set the number of shots to 0 to trigger our validation
         self.assertRaisesRegex(QisKitBackendError, "Invalid shots \(number_of_shots=0\)", simulator.run, job)
-        job.config.shots = 4097                         # now set the number of shots to a too high value
-        self.assertRaisesRegex(QisKitBackendError, "Invalid shots \(number_of_shots=4097\)", simulator.run, job)
+
+    def test_run_splits_shots_over_jobs(self):
+        api = Mock()
+        api.create_project.return_value = {'id': 42}
+        api.get_jobs_from_project.return_value = []
+        api.get_backend_type_by_name.return_value = {'max_number_of_shots': 4096}
+        simulator = QuantumInspireBackend(api, Mock())
+        qobj_dict = self._basic_qobj_dictionary
+        qobj_dict['config']['shots'] = 4097
+        simulator.run(QasmQobj.from_dict(qobj_dict))
+        self.assertEqual(2049, api.create_project.call_args[0][1])
+        self.assertListEqual([2049, 2048], [call[1]['number_of_shots']
+                                            for call in api.execute_qasm_async.call_args_list])
+        user_data = [json.loads(call[1]['user_data']) for call in api.execute_qasm_async.call_args_list]
+        self.assertListEqual([0, 0], [data['experiment_index'] for data in user_data])
+
+    def test_get_experiment_results_merges_split_shots(self):
+        instructions = [{'name': 'h', 'qubits': [0]},
+                        {'name': 'measure', 'qubits': [0], 'memory': [0]}]
+        experiment = self._instructions_to_two_qubit_experiment(instructions)
+        user_data = json.dumps({'name': 'circuit0', 'memory_slots': 2, 'creg_sizes': [['c1', 2]],
+                                'measurements': QuantumInspireBackend._collect_measurements(experiment),
+                                'experiment_index': 0, 'memory': False})
+        jobs = []
+        for job_id, number_of_shots in [(24, 6), (25, 4)]:
+            job = dict(self._basic_job_dictionary)
+            job.update({'id': job_id, 'name': 'circuit0', 'number_of_shots': number_of_shots,
+                        'user_data': user_data})
+            jobs.append(job)
+        api = Mock()
+        api.get_jobs_from_project.return_value = jobs
+        api.get_result_from_job.side_effect = [{'id': 1, 'histogram': {'0': 0.5, '1': 0.5},
+                                                'execution_time_in_seconds': 2.0, 'number_of_qubits': 2},
+                                               {'id': 2, 'histogram': {'1': 1.0},
+                                                'execution_time_in_seconds': 1.5, 'number_of_qubits': 2}]
+        api.get_raw_data_from_result.side_effect = [[0, 1, 0, 1, 0, 1], [1, 1, 1, 1]]
+        simulator = QuantumInspireBackend(api, Mock())
+
+        experiment_results = simulator.get_experiment_results(QIJob('backend', '42', api))
+        self.assertEqual(1, len(experiment_results))
+        experiment_result = experiment_results[0]
+        self.assertEqual(10, experiment_result.shots)
+        self.assertEqual(3.5, experiment_result.time_taken)
+        self.assertDictEqual({'0x0': 3, '0x1': 7}, experiment_result.data.counts)
+        self.assertAlmostEqual(0.3, experiment_result.data.probabilities['0x0'])
+        self.assertAlmostEqual(0.7, experiment_result.data.probabilities['0x1'])
+        api.get_raw_data_from_result.assert_not_called()
+        self.assertListEqual(['0x0', '0x1', '0x0', '0x1', '0x0', '0x1', '0x1', '0x1', '0x1', '0x1'],
+                             experiment_result.data.memory)
 
     def test_validate_no_classical_qubits(self):
         api = Mock()
@@ -339,7 +905,9 @@ class TestQiSimulatorPy(unittest.TestCase):
             qobj = QasmQobj.from_dict(qjob_dict)
             experiment = qobj.experiments[0]
             simulator.run(qobj)
-        result_experiment.assert_called_once_with(experiment, 25, project=project, full_state_projection=False)
+        result_experiment.assert_called_once_with(experiment, 25, project=project, full_state_projection=False,
+                                                  compiled_qasm=ANY, experiment_index=0, duplicates=[],
+                                                  memory=False, qubit_maps=[None])
 
     def test_for_non_fsp_measurements_at_begin_and_end(self):
         with patch.object(QuantumInspireBackend, "_submit_experiment", return_value=Mock()) as result_experiment:
@@ -361,7 +929,9 @@ class TestQiSimulatorPy(unittest.TestCase):
             qobj = QasmQobj.from_dict(qjob_dict)
             experiment = qobj.experiments[0]
             simulator.run(qobj)
-        result_experiment.assert_called_once_with(experiment, 25, project=project, full_state_projection=False)
+        result_experiment.assert_called_once_with(experiment, 25, project=project, full_state_projection=False,
+                                                  compiled_qasm=ANY, experiment_index=0, duplicates=[],
+                                                  memory=False, qubit_maps=[None])
 
     def test_for_fsp_measurements_at_end_only(self):
         with patch.object(QuantumInspireBackend, "_submit_experiment", return_value=Mock()) as result_experiment:
@@ -382,7 +952,9 @@ class TestQiSimulatorPy(unittest.TestCase):
             qobj = QasmQobj.from_dict(qjob_dict)
             experiment = qobj.experiments[0]
             simulator.run(qobj)
-        result_experiment.assert_called_once_with(experiment, 25, project=project, full_state_projection=True)
+        result_experiment.assert_called_once_with(experiment, 25, project=project, full_state_projection=True,
+                                                  compiled_qasm=ANY, experiment_index=0, duplicates=[],
+                                                  memory=False, qubit_maps=[None])
 
     def test_for_fsp_no_measurements(self):
         with patch.object(QuantumInspireBackend, "_submit_experiment", return_value=Mock()) as result_experiment:
@@ -402,7 +974,9 @@ class TestQiSimulatorPy(unittest.TestCase):
             qobj = QasmQobj.from_dict(qjob_dict)
             experiment = qobj.experiments[0]
             simulator.run(qobj)
-        result_experiment.assert_called_once_with(experiment, 25, project=project, full_state_projection=True)
+        result_experiment.assert_called_once_with(experiment, 25, project=project, full_state_projection=True,
+                                                  compiled_qasm=ANY, experiment_index=0, duplicates=[],
+                                                  memory=False, qubit_maps=[None])
 
     def test_measurement_2_qubits_to_1_classical_bit(self):
         with patch.object(QuantumInspireBackend, "_submit_experiment", return_value=Mock()):
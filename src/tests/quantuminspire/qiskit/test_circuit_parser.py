@@ -15,6 +15,8 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import unittest
+from copy import deepcopy
+from io import StringIO
 from unittest.mock import Mock
 
 import numpy as np
@@ -23,8 +25,8 @@ from qiskit import QuantumRegister, ClassicalRegister, QuantumCircuit
 from qiskit.compiler import assemble, transpile
 from qiskit.circuit import Instruction
 from qiskit.assembler.run_config import RunConfig
-from qiskit.qobj import QobjHeader
-from quantuminspire.qiskit.circuit_parser import CircuitToString
+from qiskit.qobj import QasmQobjInstruction, QobjHeader
+from quantuminspire.qiskit.circuit_parser import CircuitToString, CqasmTemplate
 from quantuminspire.qiskit.backend_qx import QuantumInspireBackend
 from quantuminspire.exceptions import ApiError
 
@@ -592,6 +594,174 @@ class TestQiCircuitToString(unittest.TestCase):
         self.assertRaisesRegex(ApiError, 'Conditional not found: reg_idx = 2',
                                self._generate_cqasm_from_instructions, instructions, 2)
 
+    def test_generate_cqasm_bfunc_used_once_in_order(self):
+        instructions = [{'mask': '0x1', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x1'},
+                        {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x1'},
+                        {'conditional': 1, 'name': 'x', 'qubits': [0]},
+                        {'conditional': 1, 'name': 'x', 'qubits': [1]}]
+        result = self._generate_cqasm_from_instructions(instructions, 2)
+        self.assertTrue(result.endswith('C-X b[0], q[0]\nnot b[1]\nC-X b[0:1], q[1]\nnot b[1]\n'))
+
+        instructions = [{'mask': '0x1', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x1'},
+                        {'conditional': 1, 'name': 'x', 'qubits': [0]},
+                        {'conditional': 1, 'name': 'x', 'qubits': [1]}]
+        self.assertRaisesRegex(ApiError, 'Conditional not found: reg_idx = 1',
+                               self._generate_cqasm_from_instructions, instructions, 2)
+
+    def test_generate_cqasm_coalesces_negations(self):
+        instructions = [{'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x1'},
+                        {'conditional': 1, 'name': 'x', 'qubits': [0]},
+                        {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x1'},
+                        {'conditional': 1, 'name': 'y', 'qubits': [1]},
+                        {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x1'},
+                        {'conditional': 1, 'name': 'barrier', 'qubits': [1]},
+                        {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x2'},
+                        {'conditional': 1, 'name': 'z', 'qubits': [0]},
+                        {'name': 'h', 'qubits': [0]},
+                        {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x0'},
+                        {'conditional': 1, 'name': 'x', 'qubits': [1]},
+                        {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x1'},
+                        {'conditional': 1, 'name': 'u1', 'qubits': [1], 'params': [0.5]},
+                        {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x1'},
+                        {'conditional': 1, 'name': 'x', 'qubits': [1]}]
+        experiment = self._instructions_to_experiment(deepcopy(instructions))
+        result = self._generate_cqasm_from_instructions(instructions, 2)
+        self.assertEqual('not b[1]\nC-X b[0:1], q[0]\nC-Y b[0:1], q[1]\nnot b[1]\nnot b[0]\nC-Z b[0:1], q[0]\n'
+                         'not b[0]\nH q[0]\nnot b[0,1]\nC-X b[0:1], q[1]\nnot b[0,1]\nnot b[1]\n'
+                         'C-Rz b[0:1], q[1], 0.500000\nnot b[1]\nnot b[1]\nC-X b[0:1], q[1]\nnot b[1]\n',
+                         result.split('\n', 3)[3])
+
+        # the instructions can be emitted in parts, the bits that are still negated carry over to the next part
+        parser = CircuitToString(full_state_projection=True)
+        lines = []
+        number_of_instructions = len(experiment.instructions)
+        for start in range(0, number_of_instructions, 3):
+            parser.emit(lines, experiment.instructions[start:start + 3], last=start + 3 >= number_of_instructions)
+        self.assertEqual(result.split('\n', 3)[3], ''.join(lines))
+
+    def test_emit_releases_consumed_bfuncs(self):
+        parser = CircuitToString()
+        instructions = [QasmQobjInstruction.from_dict(instruction) for register in range(3) for instruction in
+                        [{'mask': '0x1', 'name': 'bfunc', 'register': register, 'relation': '==', 'val': '0x1'},
+                         {'conditional': register, 'name': 'x', 'qubits': [0]}]]
+        parser.emit([], instructions)
+        self.assertDictEqual({}, parser.bfunc_instructions)
+
+    @staticmethod
+    def _instructions_to_experiment(instructions, number_of_qubits=2):
+        experiment_dict = {'instructions': instructions,
+                           'header': {'n_qubits': number_of_qubits,
+                                      'number_of_clbits': number_of_qubits,
+                                      'compiled_circuit_qasm': ''},
+                           'config': {'coupling_map': 'all-to-all',
+                                      'basis_gates': 'x,y,z,h,rx,ry,rz,s,cx,ccx,u1,u2,u3,id,snapshot',
+                                      'n_qubits': number_of_qubits}}
+        return qiskit.qobj.QasmQobjExperiment.from_dict(experiment_dict)
+
+    def test_cqasm_template_bind_equals_generated_cqasm(self):
+        def instructions(parameters):
+            return [{'name': 'h', 'qubits': [0]},
+                    {'name': 'rx', 'qubits': [1], 'params': [parameters[0]]},
+                    {'name': 'u1', 'qubits': [0], 'params': [parameters[1]]},
+                    {'name': 'u2', 'qubits': [1], 'params': parameters[2:4]},
+                    {'name': 'cx', 'qubits': [0, 1]},
+                    {'name': 'u3', 'qubits': [2], 'params': parameters[4:7]},
+                    {'mask': '0xF', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x3'},
+                    {'conditional': 1, 'name': 'u', 'qubits': [1], 'params': parameters[7:10]},
+                    {'mask': '0x1', 'name': 'bfunc', 'register': 2, 'relation': '==', 'val': '0x1'},
+                    {'conditional': 2, 'name': 'ry', 'qubits': [0], 'params': [parameters[10]]},
+                    {'name': 'measure', 'qubits': [0], 'memory': [0]}]
+
+        parameter_sets = np.array([[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1],
+                                   [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+                                   [-np.pi, 0, np.pi / 2, 0, 0, -1.2345678, 0, 0, 0, 2, -0.0],
+                                   [1e-7, 5e-7, 12, -12, 3, 0, 1, 0, 1, 0, 4]])
+        template = CqasmTemplate(self._instructions_to_experiment(instructions([0] * 11), 3).instructions,
+                                 False, 'header\n')
+        self.assertEqual(template.number_of_parameters, 11)
+        programs = template.bind(parameter_sets)
+        self.assertEqual(len(programs), len(parameter_sets))
+        for parameters, program in zip(parameter_sets, programs):
+            experiment = self._instructions_to_experiment(instructions(list(parameters)), 3)
+            expected = QuantumInspireBackend._generate_cqasm(experiment, False)
+            self.assertEqual(expected.split('\n', 3)[3], program.split('\n', 1)[1])
+            np.testing.assert_array_equal(template.get_parameters(experiment.instructions), parameters)
+
+        self.assertNotIn('not b[2,3]', programs[1])
+        self.assertEqual(template.bind(parameter_sets[0]), programs[:1])
+
+    def test_cqasm_template_coalesces_negations(self):
+        def instructions(parameters):
+            return [{'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x1'},
+                    {'conditional': 1, 'name': 'rx', 'qubits': [0], 'params': [parameters[0]]},
+                    {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x1'},
+                    {'conditional': 1, 'name': 'u1', 'qubits': [1], 'params': [parameters[1]]},
+                    {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x2'},
+                    {'conditional': 1, 'name': 'u3', 'qubits': [0], 'params': parameters[2:5]},
+                    {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x2'},
+                    {'conditional': 1, 'name': 'x', 'qubits': [1]},
+                    {'mask': '0x3', 'name': 'bfunc', 'register': 1, 'relation': '==', 'val': '0x0'},
+                    {'conditional': 1, 'name': 'ry', 'qubits': [1], 'params': [parameters[5]]},
+                    {'name': 'rz', 'qubits': [0], 'params': [parameters[6]]}]
+
+        parameter_sets = np.array([[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7],
+                                   [0, 0, 0, 0, 0, 0, 0],
+                                   [1, 0, 0, 2, 0, -1, 0]])
+        template = CqasmTemplate(self._instructions_to_experiment(instructions([0] * 7)).instructions)
+        for parameters, program in zip(parameter_sets, template.bind(parameter_sets)):
+            experiment = self._instructions_to_experiment(instructions(list(parameters)))
+            self.assertEqual(QuantumInspireBackend._generate_cqasm(experiment).split('\n', 3)[3], program)
+        self.assertEqual('not b[1]\nC-Rx b[0:1], q[0], 0.000000\nnot b[1]\nnot b[0]\nC-X b[0:1], q[1]\nnot b[0]\n'
+                         'not b[0,1]\nC-Ry b[0:1], q[1], 0.000000\nnot b[0,1]\nRz q[0], 0.000000\n',
+                         template.bind(parameter_sets[1])[0])
+
+    def test_cqasm_template_without_parameters(self):
+        experiment = self._instructions_to_experiment([{'name': 'h', 'qubits': [0]},
+                                                       {'name': 'cx', 'qubits': [0, 1]}])
+        template = QuantumInspireBackend._generate_cqasm_template(experiment)
+        self.assertEqual(template.number_of_parameters, 0)
+        self.assertListEqual(template.bind(np.zeros((2, 0))), [QuantumInspireBackend._generate_cqasm(experiment)] * 2)
+
+    def test_cqasm_template_invalid_parameters(self):
+        experiment = self._instructions_to_experiment([{'name': 'rx', 'qubits': [0], 'params': [0.5]}])
+        template = QuantumInspireBackend._generate_cqasm_template(experiment)
+        self.assertRaisesRegex(ApiError, r'Parameter sets with shape \(1, 2\) do not match the 1 template parameters',
+                               template.bind, [[0.1, 0.2]])
+        other_experiment = self._instructions_to_experiment([{'name': 'u2', 'qubits': [0], 'params': [0.5, 0.1]}])
+        self.assertRaisesRegex(ApiError, 'Circuit has 2 parameters, template expects 1',
+                               template.get_parameters, other_experiment.instructions)
+
+    def test_cqasm_template_structure_key(self):
+        experiment_1 = self._instructions_to_experiment([{'name': 'rx', 'qubits': [0], 'params': [0.5]},
+                                                         {'name': 'cx', 'qubits': [0, 1]}])
+        experiment_2 = self._instructions_to_experiment([{'name': 'rx', 'qubits': [0], 'params': [0.7]},
+                                                         {'name': 'cx', 'qubits': [0, 1]}])
+        experiment_3 = self._instructions_to_experiment([{'name': 'rx', 'qubits': [1], 'params': [0.7]},
+                                                         {'name': 'cx', 'qubits': [0, 1]}])
+        self.assertEqual(CqasmTemplate.structure_key(experiment_1.instructions),
+                         CqasmTemplate.structure_key(experiment_2.instructions))
+        self.assertNotEqual(CqasmTemplate.structure_key(experiment_2.instructions),
+                            CqasmTemplate.structure_key(experiment_3.instructions))
+
+    def test_emit_equals_parse(self):
+        instructions = [{'name': 'h', 'qubits': [0]},
+                        {'name': 'CX', 'qubits': [0, 1]},
+                        {'name': 'u2', 'qubits': [1], 'params': [0.5, 0.0]},
+                        {'name': 'bfunc', 'mask': '0x3', 'relation': '==', 'val': '0x1', 'register': 1},
+                        {'name': 'swap', 'qubits': [0, 1], 'conditional': 1},
+                        {'name': 'measure', 'qubits': [1], 'memory': [1]}]
+        experiment = qiskit.qobj.QasmQobjExperiment.from_dict({'instructions': instructions,
+                                                               'header': {'n_qubits': 2}})
+        lines = []
+        CircuitToString(False).emit(lines, experiment.instructions)
+        parser = CircuitToString(False)
+        with StringIO() as stream:
+            for instruction in experiment.instructions:
+                parser.parse(stream, instruction)
+            self.assertEqual(stream.getvalue(), ''.join(lines))
+        self.assertEqual('H q[0]\nCNOT q[0], q[1]\nRy q[1], 1.570796\nRz q[1], 0.500000\n'
+                         'not b[1]\nC-SWAP b[0:1], q[0], q[1]\nnot b[1]\nmeasure q[1]\n', ''.join(lines))
+
     def test_get_mask_data(self):
         mask = 0
         lowest_mask_bit, mask_length = CircuitToString.get_mask_data(mask)
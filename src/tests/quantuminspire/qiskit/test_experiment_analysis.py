@@ -0,0 +1,92 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import unittest
+
+from qiskit.qobj import QasmQobjExperiment
+
+from quantuminspire.qiskit.experiment_analysis import ExperimentAnalysis
+
+
+class TestExperimentAnalysis(unittest.TestCase):
+
+    @staticmethod
+    def _experiment(instructions, number_of_qubits=2, number_of_clbits=2):
+        return QasmQobjExperiment.from_dict({'instructions': instructions,
+                                             'header': {'n_qubits': number_of_qubits,
+                                                        'memory_slots': number_of_clbits,
+                                                        'name': 'test'}})
+
+    def test_full_state_projection(self):
+        experiment = self._experiment([{'name': 'h', 'qubits': [0]},
+                                       {'name': 'measure', 'qubits': [0], 'memory': [1]},
+                                       {'name': 'measure', 'qubits': [1], 'memory': [0]}])
+        analysis = ExperimentAnalysis(experiment)
+        self.assertTrue(analysis.full_state_projection)
+        self.assertFalse(analysis.has_conditional)
+        self.assertIsNone(analysis.unsupported_measurement)
+        self.assertDictEqual({'measurements': [[1, 0], [0, 1]], 'number_of_clbits': 2}, analysis.measurements)
+
+    def test_gates_after_measurement(self):
+        experiment = self._experiment([{'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                       {'name': 'x', 'qubits': [0], 'conditional': 0}])
+        analysis = ExperimentAnalysis(experiment)
+        self.assertFalse(analysis.full_state_projection)
+        self.assertTrue(analysis.has_conditional)
+
+    def test_without_measurements(self):
+        analysis = ExperimentAnalysis(self._experiment([{'name': 'h', 'qubits': [0]}], 3, 1))
+        self.assertTrue(analysis.full_state_projection)
+        self.assertEqual(3, analysis.number_of_qubits)
+        self.assertEqual(1, analysis.number_of_clbits)
+        self.assertDictEqual({'measurements': [[0, 0], [1, 1], [2, 2]], 'number_of_clbits': 1},
+                             analysis.measurements)
+
+    def test_used_qubits(self):
+        experiment = self._experiment([{'name': 'h', 'qubits': [1]},
+                                       {'name': 'barrier', 'qubits': [0, 1, 2, 3, 4]},
+                                       {'name': 'bfunc', 'mask': '0x1', 'relation': '==', 'val': '0x1', 'register': 0},
+                                       {'name': 'cx', 'qubits': [1, 4], 'conditional': 0},
+                                       {'name': 'measure', 'qubits': [3], 'memory': [0]}], 5)
+        self.assertSetEqual({1, 3, 4}, ExperimentAnalysis(experiment).used_qubits)
+
+    def test_repeated_measurement_is_supported(self):
+        experiment = self._experiment([{'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                       {'name': 'x', 'qubits': [1]},
+                                       {'name': 'measure', 'qubits': [0], 'memory': [0]}])
+        self.assertIsNone(ExperimentAnalysis(experiment).unsupported_measurement)
+
+    def test_unsupported_measurement_reports_earliest_conflict(self):
+        experiment = self._experiment([{'name': 'measure', 'qubits': [1], 'memory': [1]},
+                                       {'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                       {'name': 'x', 'qubits': [0]},
+                                       {'name': 'measure', 'qubits': [1], 'memory': [0]}])
+        self.assertEqual('Measurement of qubit 1 to different classical registers is not supported',
+                         ExperimentAnalysis(experiment).unsupported_measurement)
+
+        experiment = self._experiment([{'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                       {'name': 'measure', 'qubits': [1], 'memory': [1]},
+                                       {'name': 'x', 'qubits': [0]},
+                                       {'name': 'measure', 'qubits': [1], 'memory': [0]}])
+        self.assertEqual('Measurement of different qubits to the same classical register 0 is not supported',
+                         ExperimentAnalysis(experiment).unsupported_measurement)
+
+        experiment = self._experiment([{'name': 'measure', 'qubits': [0], 'memory': [0]},
+                                       {'name': 'x', 'qubits': [0]},
+                                       {'name': 'measure', 'qubits': [1], 'memory': [0]},
+                                       {'name': 'measure', 'qubits': [0], 'memory': [1]}])
+        self.assertEqual('Measurement of different qubits to the same classical register 0 is not supported',
+                         ExperimentAnalysis(experiment).unsupported_measurement)
@@ -0,0 +1,67 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import unittest
+
+import numpy as np
+
+from quantuminspire.qiskit.measurement_plan import MeasurementPlan
+
+
+class TestMeasurementPlan(unittest.TestCase):
+
+    @staticmethod
+    def _reference_classical_state(qubit_register, measurements, number_of_qubits):
+        qubit_state = '{0:0{1}b}'.format(int(qubit_register), number_of_qubits)
+        classical_state = ['0'] * measurements['number_of_clbits']
+        for q, c in measurements['measurements']:
+            classical_state[c] = qubit_state[q]
+        return int(''.join(classical_state), 2)
+
+    def test_classical_states_spanning_multiple_tables(self):
+        number_of_qubits = 20
+        measurements = {'measurements': [[19, 0], [3, 1], [10, 4], [0, 7], [12, 2], [12, 3]],
+                        'number_of_clbits': 8}
+        plan = MeasurementPlan(measurements, number_of_qubits)
+        qubit_registers = np.random.RandomState(2019).randint(0, 2 ** number_of_qubits, 500).tolist()
+        classical_states = plan.classical_states(plan.to_qubit_states(qubit_registers))
+        expected = [self._reference_classical_state(register, measurements, number_of_qubits)
+                    for register in qubit_registers]
+        self.assertListEqual(expected, classical_states.tolist())
+
+    def test_classical_states_last_measurement_wins(self):
+        measurements = {'measurements': [[1, 1], [0, 1]], 'number_of_clbits': 2}
+        plan = MeasurementPlan(measurements, 2)
+        classical_states = plan.classical_states(plan.to_qubit_states(['0', '1', '2', '3']))
+        self.assertListEqual([0, 0, 1, 1], classical_states.tolist())
+
+    def test_classical_states_wide_registers(self):
+        measurements = {'measurements': [[0, 69], [69, 0]], 'number_of_clbits': 70}
+        plan = MeasurementPlan(measurements, 70)
+        classical_states = plan.classical_states(plan.to_qubit_states([2 ** 69, 1, str(2 ** 69 + 1)]))
+        self.assertListEqual([1, 2 ** 69, 2 ** 69 + 1], classical_states.tolist())
+
+    def test_convert_histogram(self):
+        measurements = {'measurements': [[1, 0]], 'number_of_clbits': 2}
+        plan = MeasurementPlan(measurements, 2)
+        histogram = plan.convert_histogram({'3': 0.4, '0': 0.1, '1': 0.2, '2': 0.3})
+        self.assertListEqual(['0x0', '0x2'], list(histogram.keys()))
+        self.assertAlmostEqual(0.4, histogram['0x0'])
+        self.assertAlmostEqual(0.6, histogram['0x2'])
+
+    def test_convert_empty_histogram(self):
+        plan = MeasurementPlan({'measurements': [[0, 0]], 'number_of_clbits': 1}, 1)
+        self.assertDictEqual({}, plan.convert_histogram({}))
@@ -0,0 +1,96 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import unittest
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.result.models import ExperimentResult, ExperimentResultData
+
+from quantuminspire.exceptions import QisKitBackendError
+from quantuminspire.qiskit.pauli_estimator import PauliEstimator
+from quantuminspire.qiskit.qi_result import QIResult
+
+
+class TestPauliEstimator(unittest.TestCase):
+
+    @staticmethod
+    def _result(histograms, shots=100):
+        experiment_results = []
+        for index, probabilities in enumerate(histograms):
+            data = ExperimentResultData.from_dict({'counts': {state: int(round(probability * shots))
+                                                              for state, probability in probabilities.items()}})
+            data.probabilities = probabilities
+            experiment_results.append(ExperimentResult(name='circuit{}'.format(index), shots=shots, success=True,
+                                                       data=data))
+        return QIResult('qi_simulator', '0.1.0', '42', '42', True, experiment_results)
+
+    def test_groups_qubit_wise_commuting_terms(self):
+        estimator = PauliEstimator([{'ZZ': 1.0, 'XX': 0.5, 'II': 0.25}, {'ZI': 2.0, 'IX': 1.0, 'YY': 1.0}])
+        self.assertListEqual(['ZZ', 'XX', 'YY'], estimator.bases)
+
+    def test_invalid_pauli_label(self):
+        self.assertRaisesRegex(QisKitBackendError, 'Invalid Pauli label ZA', PauliEstimator, [{'ZZ': 1.0, 'ZA': 1.0}])
+        self.assertRaisesRegex(QisKitBackendError, 'Invalid Pauli label Z', PauliEstimator, [{'ZZ': 1.0, 'Z': 1.0}])
+
+    def test_measurement_circuits(self):
+        estimator = PauliEstimator([{'ZI': 1.0, 'XY': 1.0}])
+        circuit = QuantumCircuit(2, name='ansatz')
+        circuit.h(0)
+        zi_circuit, xy_circuit = estimator.measurement_circuits(circuit)
+        self.assertEqual('ansatz_ZI', zi_circuit.name)
+        self.assertListEqual(['h', 'measure'], [instruction.name for instruction, _, _ in zi_circuit.data])
+        self.assertEqual(1, zi_circuit.data[1][1][0].index)
+        self.assertListEqual(['h', 'sdg', 'h', 'measure', 'h', 'measure'],
+                             [instruction.name for instruction, _, _ in xy_circuit.data])
+        self.assertEqual(1, len(circuit.data))
+        self.assertRaises(QisKitBackendError, estimator.measurement_circuits, QuantumCircuit(2, 2))
+        self.assertRaises(QisKitBackendError, estimator.measurement_circuits, QuantumCircuit(3))
+
+    def test_estimate_bell_state(self):
+        estimator = PauliEstimator([{'ZZ': 1.0, 'ZI': 1.0, 'II': 0.5}, {'XX': 2.0}])
+        result = self._result([{'0x0': 0.5, '0x3': 0.5}, {'0x0': 0.5, '0x3': 0.5}])
+        values, variances = estimator.estimate(result)
+        np.testing.assert_array_almost_equal([1.5, 2.0], values)
+        # ZZ is constant, ZI has variance 1, XX is constant
+        np.testing.assert_array_almost_equal([0.01, 0.0], variances)
+
+    def test_estimate_from_counts(self):
+        estimator = PauliEstimator([{'ZZ': 1.0, 'ZI': -1.0}])
+        result = self._result([{'0x0': 1.0}, {'0x0': 0.25, '0x1': 0.75}])
+        result.results[1].data.probabilities = {'0x0': 1.0}
+        values, _ = estimator.estimate(result, experiments=[1], use_probabilities=False)
+        np.testing.assert_array_almost_equal([-1.5], values)
+
+    def test_estimate_without_probabilities(self):
+        estimator = PauliEstimator([{'Z': 1.0}])
+        result = self._result([{'0x1': 1.0}])
+        del result.results[0].data.probabilities
+        self.assertRaisesRegex(QisKitBackendError, 'No probabilities for experiment "0"', estimator.estimate, result)
+
+    def test_estimate_without_counts(self):
+        estimator = PauliEstimator([{'Z': 1.0}])
+        result = self._result([{'0x1': 1.0}])
+        del result.results[0].data.counts
+        self.assertRaisesRegex(QisKitBackendError, 'No counts for experiment "0"', estimator.estimate, result,
+                               use_probabilities=False)
+
+    def test_parity(self):
+        values = np.arange(1024, dtype=np.int64)
+        expected = [bin(value).count('1') % 2 for value in range(1024)]
+        self.assertListEqual(expected, PauliEstimator._parity(values, 10).tolist())
+        wide_values = np.array([2 ** 70 + 1, 2 ** 70 + 3], dtype=object)
+        self.assertListEqual([0, 1], PauliEstimator._parity(wide_values, 71).tolist())
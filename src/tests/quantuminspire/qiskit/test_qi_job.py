@@ -22,6 +22,7 @@ from qiskit.qobj import QasmQobj, QobjHeader, QasmQobjConfig
 from qiskit.result.models import ExperimentResult, ExperimentResultData
 
 from quantuminspire.qiskit.qi_job import QIJob
+from quantuminspire.qiskit.result_store import ResultStore
 
 
 class TestQIJob(unittest.TestCase):
@@ -182,3 +183,20 @@ class TestQIJob(unittest.TestCase):
                                                   {'name': 'other_job', 'status': 'COMPLETE'}]
         status = job.status()
         self.assertEqual(JobStatus.RUNNING, status)
+
+    def test_status_of_stored_job(self):
+        api = Mock()
+        api.base_uri = 'https://api.quantum-inspire.com/'
+        api.get_jobs_from_project.return_value = [{'name': 'test_job', 'status': 'RUNNING'}]
+        result_store = ResultStore()
+        result_store.store_project('https://staging.quantum-inspire.com/', 42, [{'id': 1, 'status': 'COMPLETE'}],
+                                   [{'id': 2}])
+        backend = Mock()
+        backend.result_store = result_store
+        job = QIJob(backend, '42', api)
+        self.assertEqual(JobStatus.RUNNING, job.status())
+
+        api.reset_mock()
+        result_store.store_project(api.base_uri, 42, [{'id': 1, 'status': 'COMPLETE'}], [{'id': 2}])
+        self.assertEqual(JobStatus.DONE, job.status())
+        api.get_jobs_from_project.assert_not_called()
@@ -15,11 +15,13 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import unittest
+from unittest.mock import Mock
 
+import numpy as np
 from qiskit.qobj import QobjHeader
 from qiskit.result.models import ExperimentResult, ExperimentResultData
 from quantuminspire.exceptions import QisKitBackendError
-from quantuminspire.qiskit.qi_result import QIResult
+from quantuminspire.qiskit.qi_result import QIExperimentResultData, QIResult
 
 
 class TestQIResult(unittest.TestCase):
@@ -92,3 +94,42 @@ class TestQIResult(unittest.TestCase):
         qi_result = QIResult(backend_name, backend_version, qobj_id, job_id, success, experiment_result)
         self.assertRaisesRegex(QisKitBackendError, 'No probabilities for experiment "0"',
                                qi_result.get_probabilities, 0)
+
+    def test_get_memory_loads_memory_on_first_access(self):
+        memory_loader = Mock(return_value=np.array([0, 3, 3]))
+        data = QIExperimentResultData(counts={'0x0': 1, '0x3': 2}, memory_loader=memory_loader)
+        header = QobjHeader.from_dict({'name': 'Test1', 'memory_slots': 2, 'creg_sizes': [['c0', 2]]})
+        experiment_result = ExperimentResult(name='Test1', shots=3, data=data, status='DONE', success=True,
+                                             header=header)
+        qi_result = QIResult('test_backend', '1.2.0', '42', '42', True, [experiment_result])
+
+        self.assertDictEqual({'00': 1, '11': 2}, qi_result.get_counts('Test1'))
+        memory_loader.assert_not_called()
+        self.assertListEqual(['00', '11', '11'], qi_result.get_memory('Test1'))
+        self.assertListEqual(['00', '11', '11'], qi_result.get_memory(0))
+        memory_loader.assert_called_once_with()
+
+    def test_get_memory_states(self):
+        data_1 = QIExperimentResultData(counts={'0x0': 1, '0x3': 2}, memory_states=np.array([3, 0, 3]))
+        data_2 = QIExperimentResultData(counts={'0x1': 2}, memory=['0x1', '0x1'])
+        experiment_results = [ExperimentResult(name='Test{}'.format(index), shots=3, data=data, status='DONE',
+                                               success=True) for index, data in enumerate([data_1, data_2])]
+        qi_result = QIResult('test_backend', '1.2.0', '42', '42', True, experiment_results)
+
+        self.assertListEqual([3, 0, 3], qi_result.get_memory_states(0).tolist())
+        memory_states = qi_result.get_memory_states()
+        self.assertListEqual([[3, 0, 3], [1, 1]], [states.tolist() for states in memory_states])
+        self.assertNotIn('memory', data_1.to_dict())
+        self.assertListEqual(['0x3', '0x0', '0x3'], qi_result.to_dict()['results'][0]['data']['memory'])
+
+    def test_get_memory_states_without_memory(self):
+        qi_result = QIResult('test_backend', '1.2.0', '42', '42', True, [self.experiment_result_1])
+        self.assertRaisesRegex(QisKitBackendError, 'No memory for experiment "0"', qi_result.get_memory_states, 0)
+
+    def test_experiment_result_data_without_memory(self):
+        data = QIExperimentResultData(counts={'0x0': 1})
+        self.assertFalse(hasattr(data, 'memory'))
+        self.assertFalse(hasattr(data, 'memory_states'))
+        self.assertDictEqual({'counts': {'0x0': 1}}, data.to_dict())
+        data.memory = ['0x0']
+        self.assertDictEqual({'counts': {'0x0': 1}, 'memory': ['0x0']}, data.to_dict())
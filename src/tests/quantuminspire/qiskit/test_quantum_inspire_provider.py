@@ -22,6 +22,7 @@ from qiskit.providers import QiskitBackendNotFoundError
 
 from quantuminspire.exceptions import ApiError
 from quantuminspire.qiskit.quantum_inspire_provider import QuantumInspireProvider, QI_URL
+from quantuminspire.qiskit.result_store import ResultStore
 
 
 class TestQuantumInspireProvider(unittest.TestCase):
@@ -81,6 +82,45 @@ class TestQuantumInspireProvider(unittest.TestCase):
                 quantum_inpire_provider.get_backend(name='not-quantum-inspire')
             self.assertEqual(('No backend matches the criteria',), error.exception.args)
 
+    def test_backends_are_cached(self):
+        with mock.patch('quantuminspire.qiskit.quantum_inspire_provider.QuantumInspireAPI'):
+            quantum_inpire_provider = QuantumInspireProvider()
+            quantum_inpire_provider.set_basic_authentication('bla@bla.bla', 'secret')
+            api = quantum_inpire_provider._api
+            api.get_backend_types.return_value = [self.simulator_backend_type, self.hardware_backend_type]
+            with mock.patch('quantuminspire.qiskit.quantum_inspire_provider.time.monotonic', return_value=1000.0):
+                backend = quantum_inpire_provider.get_backend(name='qi_simulator')
+                self.assertIs(backend, quantum_inpire_provider.get_backend(name='qi_simulator'))
+                self.assertEqual(['qi_simulator', 'qi_hardware'],
+                                 [backend.name() for backend in quantum_inpire_provider.backends()])
+            api.get_backend_types.assert_called_once()
+            api.get_backend_type_by_name.assert_not_called()
+
+            expired_time = 1000.0 + QuantumInspireProvider.BACKENDS_CACHE_TTL
+            with mock.patch('quantuminspire.qiskit.quantum_inspire_provider.time.monotonic',
+                            return_value=expired_time):
+                self.assertIsNot(backend, quantum_inpire_provider.get_backend(name='qi_simulator'))
+            self.assertEqual(2, api.get_backend_types.call_count)
+
+            quantum_inpire_provider.refresh_backends()
+            quantum_inpire_provider.backends()
+            self.assertEqual(3, api.get_backend_types.call_count)
+
+    def test_set_result_store(self):
+        with mock.patch('quantuminspire.qiskit.quantum_inspire_provider.QuantumInspireAPI'):
+            quantum_inpire_provider = QuantumInspireProvider()
+            quantum_inpire_provider.set_basic_authentication('bla@bla.bla', 'secret')
+            quantum_inpire_provider._api.get_backend_types.return_value = [self.simulator_backend_type]
+            self.assertIsNone(quantum_inpire_provider.get_backend(name='qi_simulator').result_store)
+
+            quantum_inpire_provider.set_result_store(':memory:')
+            result_store = quantum_inpire_provider.get_backend(name='qi_simulator').result_store
+            self.assertIsInstance(result_store, ResultStore)
+            quantum_inpire_provider.set_result_store(None)
+            self.assertIsNone(quantum_inpire_provider.get_backend(name='qi_simulator').result_store)
+            quantum_inpire_provider.set_result_store(result_store)
+            self.assertIs(result_store, quantum_inpire_provider.get_backend(name='qi_simulator').result_store)
+
     def test_simulator_backend(self):
         with mock.patch('quantuminspire.qiskit.quantum_inspire_provider.QuantumInspireAPI') as api:
             quantum_inpire_provider = QuantumInspireProvider()
@@ -0,0 +1,96 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from quantuminspire.qiskit.result_store import ResultStore
+
+
+class TestResultStore(unittest.TestCase):
+    BASE_URI = 'https://api.quantum-inspire.com/'
+
+    def setUp(self):
+        self.jobs = [{'id': 12, 'name': 'circuit0', 'status': 'COMPLETE', 'user_data': '{}'},
+                     {'id': 11, 'name': 'circuit1', 'status': 'COMPLETE', 'user_data': '{}'}]
+        self.results = [{'id': 22, 'histogram': {'1': 1.0}, 'number_of_qubits': 1},
+                        {'id': 21, 'histogram': {'0': 0.5, '1': 0.5}, 'number_of_qubits': 1}]
+
+    def test_store_project(self):
+        store = ResultStore()
+        self.assertFalse(store.has_project(self.BASE_URI, 42))
+        self.assertIsNone(store.get_project(self.BASE_URI, 42))
+
+        store.store_project(self.BASE_URI, 42, self.jobs, self.results)
+        self.assertTrue(store.has_project(self.BASE_URI, 42))
+        self.assertFalse(store.has_project(self.BASE_URI, 43))
+        jobs, results = store.get_project(self.BASE_URI, 42)
+        self.assertListEqual(self.jobs, jobs)
+        self.assertListEqual(self.results, results)
+
+    def test_store_raw_data(self):
+        store = ResultStore()
+        store.store_project(self.BASE_URI, 42, self.jobs, self.results)
+        self.assertIsNone(store.get_raw_data(self.BASE_URI, 42, 12))
+
+        store.store_raw_data(self.BASE_URI, 42, 12, [1, 1, 0, 2 ** 70])
+        self.assertListEqual([1, 1, 0, 2 ** 70], store.get_raw_data(self.BASE_URI, 42, 12))
+        self.assertIsNone(store.get_raw_data(self.BASE_URI, 42, 11))
+        self.assertIsNone(store.get_raw_data(self.BASE_URI, 43, 12))
+
+    def test_store_is_persistent(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.sqlite')
+            store = ResultStore(path)
+            store.store_project(self.BASE_URI, 42, self.jobs, self.results)
+            store.store_raw_data(self.BASE_URI, 42, 11, [0, 1])
+            store.close()
+
+            store = ResultStore(path)
+            self.assertEqual(path, store.path)
+            self.assertListEqual(self.jobs, store.get_project(self.BASE_URI, 42)[0])
+            self.assertListEqual([0, 1], store.get_raw_data(self.BASE_URI, 42, 11))
+            store.close()
+
+    def test_store_keeps_servers_apart(self):
+        store = ResultStore()
+        store.store_project(self.BASE_URI, 42, self.jobs, self.results)
+        store.store_raw_data(self.BASE_URI, 42, 12, [1, 1])
+        staging_uri = 'https://staging.quantum-inspire.com/'
+        self.assertFalse(store.has_project(staging_uri, 42))
+        self.assertIsNone(store.get_raw_data(staging_uri, 42, 12))
+
+        store.store_project(staging_uri, 42, self.jobs[:1], self.results[:1])
+        self.assertListEqual(self.jobs[:1], store.get_project(staging_uri, 42)[0])
+        self.assertListEqual(self.jobs, store.get_project(self.BASE_URI, 42)[0])
+        self.assertListEqual([1, 1], store.get_raw_data(self.BASE_URI.rstrip('/'), 42, 12))
+
+    def test_store_drops_tables_of_older_schema(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.sqlite')
+            connection = sqlite3.connect(path)
+            connection.execute('CREATE TABLE projects (project_id INTEGER PRIMARY KEY, job_ids TEXT NOT NULL)')
+            connection.execute('INSERT INTO projects (project_id, job_ids) VALUES (42, "[12]")')
+            connection.commit()
+            connection.close()
+
+            store = ResultStore(path)
+            self.assertFalse(store.has_project(self.BASE_URI, 42))
+            store.store_project(self.BASE_URI, 42, self.jobs, self.results)
+            self.assertTrue(store.has_project(self.BASE_URI, 42))
+            store.close()
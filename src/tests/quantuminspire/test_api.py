@@ -1342,3 +1342,9 @@ class TestQuantumInspireAPI(TestCase):
         s = results['raw_text']
         self.assertTrue(
             re.match(r'Error raised while executing qasm: Job with name (.*?) not created: Type is not correct', s))
+
+    def test_split_number_of_shots(self):
+        self.assertListEqual([1024], QuantumInspireAPI.split_number_of_shots(1024, 4096))
+        self.assertListEqual([4096, 4096], QuantumInspireAPI.split_number_of_shots(8192, 4096))
+        self.assertListEqual([3334, 3333, 3333], QuantumInspireAPI.split_number_of_shots(10000, 4096))
+        self.assertListEqual([1], QuantumInspireAPI.split_number_of_shots(1, 4096))
@@ -0,0 +1,102 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import unittest
+
+from quantuminspire.cqasm_optimizer import CqasmCompactor, CqasmOptimizer
+
+
+class TestCqasmOptimizer(unittest.TestCase):
+    HEADER = 'version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 3\n'
+
+    def test_optimize_cancels_inverse_pairs(self):
+        optimizer = CqasmOptimizer()
+        cqasm = self.HEADER + 'H q[0]\nS q[1]\nSdag q[1]\nX q[2]\nH q[0]\nCNOT q[0], q[1]\nT q[2]\n' \
+                              'CNOT q[0], q[1]\n'
+        self.assertEqual(self.HEADER + 'X q[2]\nT q[2]\n', optimizer.optimize(cqasm))
+        self.assertEqual(8, optimizer.number_of_gates)
+        self.assertEqual(6, optimizer.number_of_removed_gates)
+
+    def test_optimize_cancels_nested_pairs(self):
+        optimizer = CqasmOptimizer()
+        cqasm = self.HEADER + 'H q[0]\nT q[0]\nX q[0]\nX q[0]\nTdag q[0]\nH q[0]\nZ q[0]\n'
+        self.assertEqual(self.HEADER + 'Z q[0]\n', optimizer.optimize(cqasm))
+        self.assertEqual(6, optimizer.number_of_removed_gates)
+
+    def test_optimize_keeps_gates_separated_by_other_gates(self):
+        optimizer = CqasmOptimizer()
+        cqasm = self.HEADER + 'H q[0]\nCNOT q[0], q[1]\nH q[0]\nCNOT q[1], q[0]\nCNOT q[0], q[1]\nX q[1]\nS q[1]\n'
+        self.assertEqual(cqasm, optimizer.optimize(cqasm))
+        self.assertEqual(0, optimizer.number_of_removed_gates)
+
+    def test_optimize_symmetric_gates(self):
+        optimizer = CqasmOptimizer()
+        cqasm = self.HEADER + 'CZ q[0], q[1]\nSWAP q[2], q[0]\nSWAP q[0], q[2]\nCZ q[1], q[0]\n'
+        self.assertEqual(self.HEADER, optimizer.optimize(cqasm))
+
+    def test_optimize_merges_rotations(self):
+        optimizer = CqasmOptimizer()
+        cqasm = self.HEADER + 'Rz q[0], 0.250000\nRx q[1], 1.000000\nRz q[0], 0.500000\nRy q[0], 0.100000\n' \
+                              'Rx q[1], -1.000000\nRz q[2], 0.000000\nI q[2]\n'
+        self.assertEqual(self.HEADER + 'Rz q[0], 0.750000\nRy q[0], 0.100000\n', optimizer.optimize(cqasm))
+        self.assertEqual(7, optimizer.number_of_gates)
+        self.assertEqual(5, optimizer.number_of_removed_gates)
+
+    def test_optimize_projectq_format(self):
+        optimizer = CqasmOptimizer('%.12g')
+        qasm = '\nrz q[0],0.25\nh q[1]\nrz q[0],0.5\ncr q[0],q[1],0.500000000000\nh q[1]\ncr q[1],q[0],0.25'
+        self.assertEqual('\nrz q[0],0.75\nh q[1]\ncr q[0],q[1],0.500000000000\nh q[1]\ncr q[1],q[0],0.25',
+                         optimizer.optimize(qasm))
+        qasm = '\ncr q[0],q[1],0.500000000000\ncr q[1],q[0],-0.5\nx q[1]\nx q[1]'
+        self.assertEqual('', optimizer.optimize(qasm))
+
+    def test_optimize_barriers(self):
+        optimizer = CqasmOptimizer()
+        cqasm = self.HEADER + 'H q[0]\nH q[1]\nmeasure q[0]\nH q[0]\nnot b[1]\nH q[1]\nX q[2]\n' \
+                              'C-X b[1], q[2]\nX q[2]\n'
+        self.assertEqual(self.HEADER + 'H q[0]\nmeasure q[0]\nH q[0]\nnot b[1]\nX q[2]\nC-X b[1], q[2]\nX q[2]\n',
+                         optimizer.optimize(cqasm))
+
+        cqasm = self.HEADER + 'X q[0]\n{ H q[1] | X q[0:2] }\nX q[0]\nY q[1]\n# barrier gate q[1];\nY q[1]\n'
+        self.assertEqual(cqasm, optimizer.optimize(cqasm))
+
+        cqasm = self.HEADER + 'X q[0]\nmeasure_all\nX q[0]\n'
+        self.assertEqual(cqasm, optimizer.optimize(cqasm))
+
+
+class TestCqasmCompactor(unittest.TestCase):
+    HEADER = 'version 1.0\n# cQASM generated by QI backend for Qiskit\nqubits 6\n'
+
+    def test_compact_ranges(self):
+        cqasm = self.HEADER + ''.join('H q[%d]\n' % qubit for qubit in range(6))
+        self.assertEqual(self.HEADER + 'H q[0:5]\n', CqasmCompactor().compact(cqasm))
+
+    def test_compact_bundles(self):
+        cqasm = self.HEADER + 'H q[0]\nX q[2]\nCNOT q[0], q[1]\nH q[4]\nX q[3]\nRz q[5], 0.500000\n' \
+                              'Rz q[3], 0.500000\nRz q[5], 0.250000\nX q[0]\n'
+        self.assertEqual(self.HEADER + '{ H q[0,4] | X q[2:3] | Rz q[5], 0.500000 }\n'
+                                       '{ CNOT q[0], q[1] | Rz q[3], 0.500000 | Rz q[5], 0.250000 }\nX q[0]\n',
+                         CqasmCompactor().compact(cqasm))
+
+    def test_compact_keeps_other_lines(self):
+        cqasm = self.HEADER + 'X q[0]\nX q[1]\nmeasure q[0]\nX q[2]\nX q[0]\nnot b[1]\nC-X b[1], q[2]\nX q[3]\n'
+        self.assertEqual(self.HEADER + 'X q[0:1]\nmeasure q[0]\nX q[0,2]\nnot b[1]\nC-X b[1], q[2]\nX q[3]\n',
+                         CqasmCompactor().compact(cqasm))
+
+    def test_compact_projectq_format(self):
+        qasm = '\nh q[0]\nh q[1]\ncr q[0],q[2],0.5\nrz q[1],0.25\nrz q[3],0.25'
+        self.assertEqual('\n{ h q[0:1] | rz q[3],0.25 }\n{ cr q[0],q[2],0.5 | rz q[1],0.25 }',
+                         CqasmCompactor().compact(qasm))
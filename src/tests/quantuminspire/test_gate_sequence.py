@@ -0,0 +1,118 @@
+""" Quantum Inspire SDK
+
+Copyright 2018 QuTech Delft
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import unittest
+
+import numpy as np
+
+from quantuminspire.gate_sequence import CqasmDialect, CqasmWriter, GateSequence
+
+
+class TestGateSequence(unittest.TestCase):
+    DIALECT = CqasmDialect({'h': 'H q[%d]\n', 'rz': 'Rz q[%d], %.6f\n', 'cnot': 'CNOT q[%d], q[%d]\n',
+                            'cr': 'CR q[%d], q[%d], %.6f\n', 'toffoli': 'Toffoli q[%d], q[%d], q[%d]\n',
+                            'measure': 'measure q[%d]\n'},
+                           {'h': 'C-H %sq[%d]\n', 'rz': 'C-Rz %sq[%d], %.6f\n'})
+    OPCODE = GateSequence.OPCODE
+
+    def _sequence(self, sequence=None):
+        sequence = GateSequence() if sequence is None else sequence
+        sequence.append(self.OPCODE['h'], [0])
+        sequence.append(self.OPCODE['rz'], [1], 0.5)
+        sequence.append_line('not b[1]\n')
+        sequence.append(self.OPCODE['rz'], [2], -0.25, control='b[1], ')
+        sequence.append_line('not b[1]\n')
+        sequence.append(self.OPCODE['cr'], [1, 0], 1.0)
+        sequence.append(self.OPCODE['toffoli'], [0, 1, 2])
+        return sequence
+
+    def test_serialize(self):
+        sequence = self._sequence()
+        self.assertEqual(7, len(sequence))
+        self.assertEqual('H q[0]\nRz q[1], 0.500000\nnot b[1]\nC-Rz b[1], q[2], -0.250000\nnot b[1]\n'
+                         'CR q[1], q[0], 1.000000\nToffoli q[0], q[1], q[2]\n', sequence.serialize(self.DIALECT))
+        self.assertEqual(['not b[1]\n', 'b[1], '], sequence.texts)
+
+    def test_serialize_in_runs(self):
+        sequence = GateSequence()
+        for qubit in range(GateSequence.RUN_LENGTH + 10):
+            sequence.append(self.OPCODE['rz'], [qubit], qubit / 4)
+            if qubit % 1000 == 0:
+                sequence.append(self.OPCODE['h'], [qubit], control='b[0], ')
+        sequence.append_line('# 100% done\n')
+        expected = ''.join('Rz q[%d], %.6f\n' % (qubit, qubit / 4) + ('C-H b[0], q[%d]\n' % qubit
+                                                                      if qubit % 1000 == 0 else '')
+                           for qubit in range(GateSequence.RUN_LENGTH + 10)) + '# 100% done\n'
+        lines = []
+        sequence.emit(lines, self.DIALECT)
+        self.assertEqual(2, len(lines))
+        self.assertEqual(expected, ''.join(lines))
+
+    def test_writer(self):
+        lines = ['version 1.0\n']
+        writer = self._sequence(CqasmWriter(lines, self.DIALECT))
+        self.assertEqual(7, len(writer))
+        self.assertEqual('version 1.0\n' + self._sequence().serialize(self.DIALECT), ''.join(lines))
+        writer.truncate(3)
+        writer.append(self.OPCODE['cnot'], [0, 1])
+        self.assertEqual('version 1.0\nH q[0]\nRz q[1], 0.500000\nnot b[1]\nCNOT q[0], q[1]\n', ''.join(lines))
+
+    def test_truncate(self):
+        sequence = self._sequence()
+        sequence.truncate(3)
+        sequence.append(self.OPCODE['cnot'], [0, 1])
+        self.assertEqual('H q[0]\nRz q[1], 0.500000\nnot b[1]\nCNOT q[0], q[1]\n', sequence.serialize(self.DIALECT))
+        self.assertEqual({2: 0}, sequence.arguments)
+
+    def test_light_cone(self):
+        operations = [((0,), False), ((1,), False), ((0, 1), False), ((1,), False), ((2,), True), ((0,), False)]
+        self.assertListEqual([True, True, True, False, True, True], GateSequence.light_cone(operations, [0]))
+        self.assertListEqual([False, False, False, False, True, False], GateSequence.light_cone(operations, []))
+
+    def test_prune(self):
+        sequence = self._sequence()
+        sequence.append(self.OPCODE['h'], [2], control='b[0], ')
+        sequence.append(self.OPCODE['measure'], [1])
+        sequence.append(self.OPCODE['h'], [2])
+        self.assertEqual(2, sequence.prune([]))
+        self.assertEqual('H q[0]\nRz q[1], 0.500000\nnot b[1]\nC-Rz b[1], q[2], -0.250000\nnot b[1]\n'
+                         'CR q[1], q[0], 1.000000\nToffoli q[0], q[1], q[2]\nmeasure q[1]\n',
+                         sequence.serialize(self.DIALECT))
+        self.assertEqual(['not b[1]\n', 'b[1], '], sequence.texts)
+        sequence.truncate(5)
+        sequence.append(self.OPCODE['measure'], [0])
+        self.assertEqual(2, sequence.prune([]))
+        self.assertEqual('H q[0]\nnot b[1]\nnot b[1]\nmeasure q[0]\n', sequence.serialize(self.DIALECT))
+        self.assertEqual(['not b[1]\n'], sequence.texts)
+
+    def test_gates_and_arrays(self):
+        sequence = self._sequence()
+        gates = sequence.gates()
+        self.assertEqual((self.OPCODE['rz'], (2,), -0.25, 1), gates[3])
+        self.assertEqual((self.OPCODE['toffoli'], (0, 1, 2), 0.0, -1), gates[6])
+        opcodes, qubits, angles, arguments = sequence.as_arrays()
+        np.testing.assert_array_equal([gate[0] for gate in gates], opcodes)
+        np.testing.assert_array_equal([[0, -1, -1], [1, -1, -1], [-1, -1, -1], [2, -1, -1], [-1, -1, -1],
+                                       [1, 0, -1], [0, 1, 2]], qubits)
+        np.testing.assert_array_equal([0, 0.5, 0, -0.25, 0, 1, 0], angles)
+        np.testing.assert_array_equal([-1, -1, 0, 1, 0, -1, -1], arguments)
+
+    def test_digest(self):
+        self.assertEqual(self._sequence().digest(), self._sequence().digest())
+        sequence = self._sequence()
+        sequence.append(self.OPCODE['h'], [1])
+        self.assertNotEqual(self._sequence().digest(), sequence.digest())
+        self.assertNotEqual(GateSequence().digest(), self._sequence().digest())